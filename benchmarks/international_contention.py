@@ -0,0 +1,173 @@
+"""
+Benchmark de contenção das transferências internacionais.
+
+Várias threads do banco 0 enviam transferências internacionais para uma única conta "quente" do
+banco 1 enquanto outras threads do banco 1 fazem transferências nacionais envolvendo essa mesma conta.
+O benchmark compara o protocolo em duas fases (TransactionExecutor) com o protocolo antigo, que
+mantinha as contas dos clientes travadas enquanto acessava as reservas, e mede a vazão e o tempo
+médio de espera pelo lock da conta quente.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.international_contention --threads 8 --transactions 2000
+"""
+import argparse
+import time
+from logging import ERROR
+from threading import Lock, Thread
+from typing import List, Optional
+
+import globals as config
+from payment_system.account import Account
+from payment_system.bank import Bank
+from payment_system.payment_processor import TransactionExecutor
+from utils.currency import Currency
+from utils.logger import CH, LOGGER
+from utils.money import EXCHANGE_FEE_BPS, convert, fee
+from utils.transaction import Transaction
+
+
+class TimedLock:
+    """
+    Lock que acumula o tempo gasto esperando por ele.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.acquisitions = 0
+        self.wait_time = 0.0
+
+    def acquire(self, *args, **kwargs):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(*args, **kwargs)
+        self.wait_time += time.perf_counter() - start
+        self.acquisitions += 1
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+
+class LockedExecutor(TransactionExecutor):
+    """
+    Protocolo antigo: contas dos clientes travadas durante todo o acesso às reservas.
+    """
+
+    def _transfer_international(
+        self, origin_acc: Account, destiny_acc: Account, group: List[Transaction], rates=None
+    ) -> List[Optional[int]]:
+        origin_reserve = self._reserve_for(origin_acc.currency).stripe(self._id)
+        destiny_reserve = self._reserve_for(destiny_acc.currency).stripe(self._id)
+        locks = [origin_acc, destiny_acc] if origin_acc._bank_id < destiny_acc._bank_id else [destiny_acc, origin_acc]
+        fees: List[Optional[int]] = []
+        for acc in locks:
+            acc.lock()
+        try:
+            for transaction in group:
+                charged = transaction.amount + fee(transaction.amount, EXCHANGE_FEE_BPS)
+                if not origin_acc.withdraw(charged):
+                    fees.append(None)
+                    continue
+                converted = convert(transaction.amount, origin_acc.currency, destiny_acc.currency, rates)
+                origin_reserve.lock()
+                origin_reserve.deposit(charged)
+                origin_reserve.unlock()
+                destiny_reserve.lock()
+                ok = destiny_reserve.withdraw(converted)
+                destiny_reserve.unlock()
+                if ok:
+                    destiny_acc.deposit(converted)
+                    fees.append(charged - transaction.amount)
+                else:
+                    fees.append(None)
+        finally:
+            for acc in reversed(locks):
+                acc.unlock()
+        return fees
+
+
+def build_banks(accounts: int, reserve_stripes: int) -> List[Bank]:
+    config.banks.clear()
+    for i, currency in enumerate([Currency.USD, Currency.EUR]):
+        bank = Bank(_id=i, currency=currency, reserve_stripes=reserve_stripes)
+        for reserve_currency in Currency:
+            getattr(bank.reserves, reserve_currency.name).deposit(10_000_000_000_000)
+        for _ in range(accounts):
+            bank.new_account(balance=10_000_000_000, overdraft_limit=0)
+        config.banks.append(bank)
+    return config.banks
+
+
+def run(
+    executor_cls, threads: int, transactions: int, accounts: int, reserve_delay: float, reserve_stripes: int
+) -> dict:
+    banks = build_banks(accounts, reserve_stripes)
+    hot = banks[1].accounts[0]
+    hot._lock = TimedLock()
+    # simula reservas lentas (ex.: acesso a um sistema externo) segurando o lock da reserva
+    if reserve_delay:
+        for currency in Currency:
+            for reserve in getattr(banks[0].reserves, currency.name).stripes:
+                original_withdraw = reserve.withdraw
+
+                def slow_withdraw(amount, _withdraw=original_withdraw):
+                    time.sleep(reserve_delay)
+                    return _withdraw(amount)
+
+                reserve.withdraw = slow_withdraw
+
+    def international(worker: int):
+        executor = executor_cls(worker, banks[0])
+        for i in range(transactions):
+            origin = (0, 1 + (worker * transactions + i) % accounts)
+            executor.execute_batch([Transaction(i, origin, (1, 1), 100, Currency.EUR)])
+
+    def national(worker: int):
+        executor = executor_cls(worker, banks[1])
+        for i in range(transactions):
+            origin = (1, 2 + (worker * transactions + i) % (accounts - 1))
+            executor.execute_batch([Transaction(i, origin, (1, 1), 100, Currency.EUR)])
+
+    workers = [Thread(target=international, args=(w,)) for w in range(threads)]
+    workers += [Thread(target=national, args=(w,)) for w in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    total = 2 * threads * transactions
+    return {
+        "protocol": executor_cls.__name__,
+        "transactions": total,
+        "seconds": elapsed,
+        "tps": total / elapsed,
+        "hot_lock_mean_wait_us": 1e6 * hot._lock.wait_time / max(hot._lock.acquisitions, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8, help="Threads por tipo de transferência")
+    parser.add_argument("--transactions", type=int, default=2000, help="Transações por thread")
+    parser.add_argument("--accounts", type=int, default=50, help="Contas por banco")
+    parser.add_argument(
+        "--reserve_delay", type=float, default=0.0001, help="Atraso (s) simulado em cada saque de reserva"
+    )
+    parser.add_argument("--reserve_stripes", type=int, default=1, help="Subcontas por reserva de moeda")
+    args = parser.parse_args()
+
+    LOGGER.setLevel(ERROR)
+    CH.setLevel(ERROR)
+    config.time_unit = 0
+
+    for executor_cls in (LockedExecutor, TransactionExecutor):
+        result = run(
+            executor_cls, args.threads, args.transactions, args.accounts, args.reserve_delay, args.reserve_stripes
+        )
+        print(
+            f"{result['protocol']:>20}: {result['transactions']} transações em {result['seconds']:.3f}s "
+            f"({result['tps']:.0f} tps), espera média pelo lock da conta quente = "
+            f"{result['hot_lock_mean_wait_us']:.1f}us"
+        )
@@ -0,0 +1,139 @@
+"""
+Benchmark do pipeline de pagamentos completo (geradores, filas e processadores).
+
+Cada cenário é uma execução de main.py, sem logs no console e com uma unidade de tempo próxima de
+zero, variando processadores por banco, contas por banco, perfil de carga, tamanho dos lotes e modo
+de execução (a quantidade de bancos é fixa: um por moeda). Para cada cenário são reportadas a
+vazão (transações finalizadas por segundo) e os percentis 50/95/99 do tempo de processamento das
+transações (Transaction.get_processing_time()) e da espera na fila. Os resultados de todos os
+cenários são gravados em JSON; com --baseline, cada cenário é comparado com o de mesmo nome de uma
+execução anterior, e quedas de vazão ou aumentos do p99 acima de --tolerance são apontados.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.pipeline --processors 1,2,4 --workloads uniform,hotspot --output bench.json
+    python -m benchmarks.pipeline --processors 1,2,4 --workloads uniform,hotspot --baseline bench.json
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_scenario(
+    engine: str,
+    processors: int,
+    accounts: int,
+    workload: str,
+    batch_size: int,
+    time_unit: float,
+    total_time: int,
+    seed: Optional[int],
+    extra: List[str],
+) -> dict:
+    """
+    Executa main.py com os parâmetros do cenário e retorna os resultados gravados por ele.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        results_file = os.path.join(directory, "results.json")
+        command = [
+            sys.executable, os.path.join(ROOT, "main.py"),
+            "--engine", engine,
+            "--time_unit", str(time_unit),
+            "--total_time", str(total_time),
+            "--min_processors", str(processors),
+            "--max_processors", str(processors),
+            "--accounts", str(accounts),
+            "--workload", workload,
+            "--batch_size", str(batch_size),
+            # as mensagens por transação são descartadas antes de serem formatadas
+            "--log_sample", "1000000000",
+            "--results_json", results_file,
+        ]
+        if seed is not None:
+            command += ["--seed", str(seed)]
+        completed = subprocess.run(
+            command + extra, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        if completed.returncode != 0 or not os.path.exists(results_file):
+            raise RuntimeError(f"Falha no cenário {' '.join(command)}:\n{completed.stderr[-2000:]}")
+        with open(results_file) as file:
+            return json.load(file)
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Retorna as regressões de `result` em relação a `baseline` (vazão menor ou p99 maior que a
+    tolerância relativa `tolerance`).
+    """
+    regressions = []
+    if result["tps"] < baseline["tps"] * (1 - tolerance):
+        regressions.append(f"vazão {baseline['tps']:.1f} -> {result['tps']:.1f} transações/s")
+    for metric in ("latency", "queue_wait"):
+        before, after = baseline[metric]["p99"], result[metric]["p99"]
+        if after > before * (1 + tolerance):
+            regressions.append(f"{metric} p99 {before * 1000:.2f} -> {after * 1000:.2f}ms")
+    return regressions
+
+
+def csv_of(kind):
+    return lambda value: [kind(item) for item in value.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", type=csv_of(str), default=["threads"], help="Modos de execução (lista)")
+    parser.add_argument("--processors", type=csv_of(int), default=[1, 2, 4], help="Processadores por banco (lista)")
+    parser.add_argument("--accounts", type=csv_of(int), default=[20], help="Contas por banco (lista)")
+    parser.add_argument("--workloads", type=csv_of(str), default=["uniform"], help="Perfis de carga (lista)")
+    parser.add_argument("--batch_sizes", type=csv_of(int), default=[1], help="Tamanhos de lote (lista)")
+    parser.add_argument("--time_unit", type=float, default=0.0001, help="Unidade de tempo da simulação")
+    parser.add_argument("--total_time", type=int, default=10000, help="Tempo total de cada simulação")
+    parser.add_argument("--repeat", type=int, default=1, help="Execuções de cada cenário")
+    parser.add_argument("--seed", type=int, default=1, help="Semente das simulações (-1 = aleatória)")
+    parser.add_argument("--output", default="bench.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="Resultados anteriores (JSON) para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Variação relativa tolerada na comparação")
+    parser.add_argument("extra", nargs="*", help="Argumentos adicionais para main.py (após --)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = {result["name"]: result for result in json.load(file)}
+
+    results = []
+    regressed = False
+    for engine, processors, accounts, workload, batch_size in itertools.product(
+        args.engines, args.processors, args.accounts, args.workloads, args.batch_sizes
+    ):
+        for run in range(args.repeat):
+            name = f"{engine}/p{processors}/a{accounts}/{workload}/b{batch_size}#{run}"
+            result = run_scenario(
+                engine, processors, accounts, workload, batch_size, args.time_unit, args.total_time,
+                None if args.seed < 0 else args.seed, args.extra,
+            )
+            result["name"] = name
+            results.append(result)
+            print(
+                f"{name:>36}: {result['tps']:9.1f} tps | latência p50/p95/p99 = "
+                + "/".join(f"{result['latency'][p] * 1000:.2f}" for p in ("p50", "p95", "p99"))
+                + "ms | fila p50/p95/p99 = "
+                + "/".join(f"{result['queue_wait'][p] * 1000:.2f}" for p in ("p50", "p95", "p99"))
+                + "ms"
+            )
+            if name in baseline:
+                for regression in compare(result, baseline[name], args.tolerance):
+                    regressed = True
+                    print(f"{'':>36}  REGRESSÃO: {regression}")
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Resultados de {len(results)} execução(ões) gravados em {args.output}")
+    sys.exit(1 if regressed else 0)
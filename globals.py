@@ -9,3 +9,120 @@ total_time = 1000
 
 # Unidade de tempo (quanto menor, mais rápida a simulação)
 time_unit = 0.1  # 0.1 = 100ms
+
+# Capacidade máxima da fila de transações de cada banco (0 = ilimitada)
+queue_capacity = 1000
+
+# Quantidade máxima de transações processadas por lote em cada PaymentProcessor (1 = sem lotes)
+batch_size = 1
+
+# Tempo máximo de espera (em unidades de tempo) para completar um lote
+batch_wait = 0
+
+# Quantidade mínima e máxima de PaymentProcessors por banco (iguais = sem autoescalonamento)
+min_processors = 2
+max_processors = 2
+
+# Modo de execução: "threads" (todos os bancos em um processo), "processes" (um processo por banco)
+# ou "asyncio" (geradores e processadores como corrotinas em um único event loop)
+engine = "threads"
+
+# Quantidade de subcontas (stripes) de cada reserva de moeda dos bancos
+reserve_stripes = 1
+
+# Controle de concorrência das transferências nacionais: "pessimistic" (locks das duas contas mantidos
+# durante toda a transferência) ou "optimistic" (versões das contas e compare-and-swap no commit)
+concurrency = "pessimistic"
+
+# Escalonamento da fila de transações de cada banco: "fifo" (ordem de chegada) ou "priority" (classes
+# nacional, internacional e de valor alto, retiradas por round-robin ponderado; ver payment_system/scheduler.py)
+scheduler = "fifo"
+
+# Prazo (em unidades de tempo, desde a criação) das transações nacionais com o escalonador "priority";
+# as outras classes têm múltiplos desse prazo e as transações vencidas falham sem serem executadas (0 = sem prazo)
+sla_deadline = 0
+
+# Valor (em unidades mínimas da moeda) a partir do qual uma transferência é da classe de valor alto
+large_amount = 50_000
+
+# Intervalo (em unidades de tempo) entre as liquidações em lotes das movimentações de reservas
+# das transferências internacionais (0 = reservas movimentadas a cada transferência)
+settlement_interval = 0
+
+# Identificador da primeira transação criada por cada banco. Ao continuar um journal, é o seguinte ao
+# maior identificador registrado nele (ver journal.recover())
+first_transaction_id = 0
+
+# Quantidade de contas de clientes de cada banco
+accounts_per_bank = 20
+
+# Armazenar as contas de cada banco em um ledger compacto (arrays tipados e locks por faixa)?
+ledger = False
+
+# Arquivo JSON com a(s) tabela(s) de câmbio e os instantes de troca ("" = taxas originais)
+rates_file = ""
+
+# Escrever os logs em uma thread separada, em lotes ("sync" = escrita direta, "async" = em lotes)
+log_mode = "sync"
+
+# Printar apenas uma a cada `log_sample` mensagens por transação (1 = todas)
+log_sample = 1
+
+# Máximo de mensagens por transação printadas por segundo (0 = sem limite)
+log_rate = 0
+
+# Diretório do journal (write-ahead log) das transações ("" = desativado). Se ele já tiver um
+# journal, o estado dos bancos é recuperado dele e a simulação continua a partir desse estado.
+journal_dir = ""
+
+# Arquivo de snapshot de onde o estado dos bancos é restaurado ("" = bancos aleatórios)
+restore_file = ""
+
+# Arquivo onde o estado final dos bancos é gravado ("" = nenhum)
+snapshot_file = ""
+
+# Printar, ao fim da simulação, os histogramas de espera pelos locks das contas?
+lock_stats = False
+
+# Instrumentar todos os locks (contas, reservas, contadores e filas) e printar, ao fim da simulação,
+# os locks com maior espera total? Desativado, os locks são threading.Lock comuns.
+lock_profile = False
+
+# Semente dos geradores de números aleatórios (None = aleatória). Com uma semente, o estado
+# inicial dos bancos e a sequência de transações gerada por cada banco são sempre os mesmos.
+seed = None
+
+# Arquivo onde as transações geradas são gravadas para serem reproduzidas depois ("" = nenhum)
+trace_file = ""
+
+# Trace (binário ou .csv) cujas transações são reproduzidas no lugar das aleatórias ("" = nenhum)
+replay_file = ""
+
+# Fator de aceleração da reprodução do trace (1 = ritmo original, 0 = o mais rápido possível)
+replay_speed = 1.0
+
+# Arquivo (.csv ou JSONL) com as transferências submetidas aos bancos no lugar das aleatórias ("" =
+# nenhum) e quantidade de transferências submetidas de uma só vez a cada banco
+ingest_file = ""
+ingest_batch = 1000
+
+# Perfil da carga gerada pelos bancos (ver payment_system.workload.WORKLOAD_PROFILES)
+workload = "uniform"
+
+# Parâmetros que sobrescrevem os do perfil de carga (None = o valor do perfil): expoente de Zipf
+# das contas (0 = uniformes), fração de transações internacionais, processo de chegada ("fixed",
+# "poisson" ou "bursty"), transações por segundo de cada banco e malha aberta
+zipf = None
+international_ratio = None
+arrival = None
+tps = None
+open_loop = None
+
+# Arquivo JSON onde a vazão e os percentis de latência da simulação são gravados ("" = nenhum)
+results_file = ""
+
+# Arquivo CSV com os instantes de cada etapa de cada transação finalizada ("" = nenhum)
+latency_export = ""
+
+# Porta local onde as métricas da simulação são servidas no formato do Prometheus (0 = desativado)
+metrics_port = 0
@@ -1,13 +1,29 @@
-import argparse, time, sys
+import argparse, json, os, random, time, sys
 from logging import INFO, DEBUG
 from random import randint
 
 from globals import *
+import globals as config
+from payment_system.async_engine import AsyncEngine
 from payment_system.bank import Bank
-from payment_system.payment_processor import PaymentProcessor
-from payment_system.transaction_generator import TransactionGenerator
+from payment_system.ingest import TransferBatch, read_transfers, split_by_origin, validate_transfers
+from payment_system.journal import close_journal, encode_genesis, journal_files, open_journal, recover
+from payment_system.latency import SEGMENTS, export_latency_records
+from payment_system.scheduler import PRIORITY_CLASSES
+from payment_system.settlement import start_settlement, stop_settlement
+from payment_system.sharded_engine import ShardedEngine, shard_trace_file
+from payment_system.snapshot import read_snapshot, write_snapshot
+from payment_system.trace import merge_traces, read_trace, start_trace, stop_trace, validate_trace
+from payment_system.workers import start_bank_workers, stop_bank_workers
+from payment_system.workload import ARRIVALS, WORKLOAD_PROFILES, WorkloadProfile
 from utils.currency import Currency
-from utils.logger import CH, LOGGER
+from utils.exchange_rates import RATES, load_rate_schedule, start_rate_schedule
+from utils.lock_manager import LOCK_MANAGER
+from utils.lock_profiler import enable_lock_profiling, report_lock_profile
+from utils.metrics import METRICS, gauge, start_metrics_server, stop_metrics_server
+from utils.money import total_money
+from utils.stats import merged
+from utils.logger import CH, LOGGER, disable_async_logging, enable_async_logging, set_log_sampling
 
 
 if __name__ == "__main__":
@@ -25,6 +41,98 @@ if __name__ == "__main__":
     )
     parser.add_argument("--total_time", "-t", help="Tempo total de simulação")
     parser.add_argument("--debug", "-d", help="Printar logs em nível DEBUG")
+    parser.add_argument(
+        "--queue_capacity", "-q", help="Capacidade máxima da fila de transações de cada banco (0 = ilimitada)"
+    )
+    parser.add_argument(
+        "--batch_size", "-b", help="Quantidade máxima de transações processadas por lote (1 = sem lotes)"
+    )
+    parser.add_argument(
+        "--batch_wait", "-w", help="Tempo máximo de espera (em unidades de tempo) para completar um lote"
+    )
+    parser.add_argument(
+        "--min_processors", help="Quantidade mínima (e inicial) de PaymentProcessors por banco"
+    )
+    parser.add_argument(
+        "--max_processors", help="Quantidade máxima de PaymentProcessors por banco (autoescalonamento)"
+    )
+    parser.add_argument(
+        "--reserve_stripes", help="Quantidade de subcontas de cada reserva de moeda dos bancos"
+    )
+    parser.add_argument(
+        "--concurrency", choices=["pessimistic", "optimistic"],
+        help="Controle de concorrência das transferências nacionais: locks mantidos ou versões com compare-and-swap",
+    )
+    parser.add_argument(
+        "--scheduler", choices=["fifo", "priority"],
+        help="Escalonamento da fila de transações: ordem de chegada ou classes de prioridade com pesos e prazos",
+    )
+    parser.add_argument("--sla", help="Prazo (em unidades de tempo) das transações nacionais com --scheduler priority")
+    parser.add_argument(
+        "--large_amount", help="Valor a partir do qual uma transferência é da classe de valor alto (--scheduler priority)"
+    )
+    parser.add_argument(
+        "--settlement", help="Liquidar as movimentações das reservas em lotes a cada N unidades de tempo (0 = a cada transferência)"
+    )
+    parser.add_argument("--accounts", help="Quantidade de contas de clientes de cada banco")
+    parser.add_argument(
+        "--ledger", action="store_true", help="Armazenar as contas em um ledger compacto (recomendado com milhões de contas)"
+    )
+    parser.add_argument(
+        "--rates", help="Arquivo JSON com a(s) tabela(s) de câmbio e os instantes (em unidades de tempo) de troca"
+    )
+    parser.add_argument(
+        "--log_mode", choices=["sync", "async"],
+        help="Escrita dos logs: direta (sync) ou em lotes por uma thread separada (async)",
+    )
+    parser.add_argument("--log_sample", help="Printar uma a cada N mensagens por transação")
+    parser.add_argument("--log_rate", help="Máximo de mensagens por transação printadas por segundo")
+    parser.add_argument(
+        "--journal", help="Diretório do journal das transações (recupera o estado dos bancos, se já existir)"
+    )
+    parser.add_argument("--restore", help="Snapshot de onde o estado inicial dos bancos é restaurado")
+    parser.add_argument("--snapshot", help="Arquivo onde o estado final dos bancos é gravado")
+    parser.add_argument(
+        "--lock_stats", action="store_true", help="Printar ao fim os histogramas de espera pelos locks das contas"
+    )
+    parser.add_argument(
+        "--lock_profile", action="store_true", help="Instrumentar os locks (contas, reservas, contadores e filas) e printar ao fim os mais disputados"
+    )
+    parser.add_argument("--seed", help="Semente dos geradores de números aleatórios (simulação reproduzível)")
+    parser.add_argument("--trace", help="Arquivo onde as transações geradas são gravadas")
+    parser.add_argument(
+        "--replay", help="Trace (binário ou .csv) a reproduzir no lugar das transações aleatórias"
+    )
+    parser.add_argument(
+        "--replay_speed", help="Fator de aceleração da reprodução do trace (1 = ritmo original, 0 = sem pausas)"
+    )
+    parser.add_argument(
+        "--ingest", help="Arquivo (.csv ou JSONL) com as transferências a submeter no lugar das aleatórias"
+    )
+    parser.add_argument("--ingest_batch", help="Transferências submetidas de uma só vez a cada banco")
+    parser.add_argument(
+        "--workload", choices=list(WORKLOAD_PROFILES), help="Perfil da carga gerada pelos bancos"
+    )
+    parser.add_argument("--zipf", help="Expoente de Zipf da escolha das contas (0 = uniforme)")
+    parser.add_argument("--international_ratio", help="Fração de transações internacionais (0 a 1)")
+    parser.add_argument("--arrival", choices=ARRIVALS, help="Processo de chegada das transações")
+    parser.add_argument("--tps", help="Transações por segundo geradas por cada banco")
+    parser.add_argument(
+        "--open_loop", action="store_true", help="Gerar as transações em malha aberta (recusadas se a fila estiver cheia)"
+    )
+    parser.add_argument(
+        "--results_json", help="Arquivo JSON onde a vazão e as latências da simulação são gravadas"
+    )
+    parser.add_argument(
+        "--latency_export", help="Arquivo CSV com os instantes de cada etapa de cada transação finalizada"
+    )
+    parser.add_argument(
+        "--metrics_port", help="Porta local onde as métricas são servidas durante a simulação (formato Prometheus)"
+    )
+    parser.add_argument(
+        "--engine", "-e", choices=["threads", "processes", "asyncio"],
+        help="Modo de execução: threads em um processo, um processo por banco ou corrotinas em um event loop",
+    )
     args = parser.parse_args()
     if args.time_unit:
         time_unit = float(args.time_unit)
@@ -32,6 +140,102 @@ if __name__ == "__main__":
         total_time = int(args.total_time)
     if args.debug:
         debug = True
+    if args.queue_capacity:
+        queue_capacity = int(args.queue_capacity)
+    if args.batch_size:
+        batch_size = int(args.batch_size)
+    if args.batch_wait:
+        batch_wait = float(args.batch_wait)
+    if args.min_processors:
+        min_processors = int(args.min_processors)
+    if args.max_processors:
+        max_processors = int(args.max_processors)
+    max_processors = max(min_processors, max_processors)
+    if args.reserve_stripes:
+        reserve_stripes = int(args.reserve_stripes)
+    if args.concurrency:
+        concurrency = args.concurrency
+    if args.scheduler:
+        scheduler = args.scheduler
+    if args.sla:
+        sla_deadline = float(args.sla)
+    if args.large_amount:
+        large_amount = int(args.large_amount)
+    if args.settlement:
+        settlement_interval = float(args.settlement)
+    if args.accounts:
+        accounts_per_bank = int(args.accounts)
+    if args.ledger:
+        ledger = True
+    if args.rates:
+        rates_file = args.rates
+    if args.log_mode:
+        log_mode = args.log_mode
+    if args.log_sample:
+        log_sample = int(args.log_sample)
+    if args.log_rate:
+        log_rate = int(args.log_rate)
+    if args.journal:
+        journal_dir = args.journal
+    if args.restore:
+        restore_file = args.restore
+    if args.snapshot:
+        snapshot_file = args.snapshot
+    if args.lock_stats:
+        lock_stats = True
+    if args.lock_profile:
+        lock_profile = True
+    if args.seed:
+        seed = int(args.seed)
+    if args.trace:
+        trace_file = args.trace
+    if args.replay:
+        replay_file = args.replay
+    if args.replay_speed:
+        replay_speed = float(args.replay_speed)
+    if args.ingest:
+        if args.replay:
+            parser.error("--ingest e --replay não podem ser usados juntos")
+        ingest_file = args.ingest
+    if args.ingest_batch:
+        ingest_batch = int(args.ingest_batch)
+    if args.workload:
+        workload = args.workload
+    if args.zipf:
+        zipf = float(args.zipf)
+    if args.international_ratio:
+        international_ratio = float(args.international_ratio)
+    if args.arrival:
+        arrival = args.arrival
+    if args.tps:
+        tps = float(args.tps)
+    if args.open_loop:
+        open_loop = True
+    if args.results_json:
+        results_file = args.results_json
+    if args.latency_export:
+        latency_export = args.latency_export
+    if args.metrics_port:
+        metrics_port = int(args.metrics_port)
+    if args.engine:
+        engine = args.engine
+
+    # Os demais módulos leem a unidade de tempo e a semente do módulo `globals`
+    config.time_unit = time_unit
+    config.concurrency = concurrency
+    config.scheduler = scheduler
+    config.sla_deadline = sla_deadline
+    config.large_amount = large_amount
+    config.seed = seed
+    if seed is not None:
+        random.seed(seed)
+
+    # Os locks só são instrumentados se o profiling for ativado antes da criação dos bancos
+    if lock_profile:
+        enable_lock_profiling()
+    # Sem --lock_stats, as aquisições de locks não são cronometradas
+    if lock_stats:
+        LOCK_MANAGER.enable_stats()
 
     # Configura logger
     if debug:
@@ -40,21 +244,65 @@ if __name__ == "__main__":
     else:
         LOGGER.setLevel(INFO)
         CH.setLevel(INFO)
+    set_log_sampling(log_sample, log_rate)
+    if log_mode == "async":
+        enable_async_logging()
+
+    workload_profile = WorkloadProfile.from_profile(
+        workload,
+        zipf=zipf,
+        international_ratio=international_ratio,
+        arrival=arrival,
+        tps=tps,
+        open_loop=open_loop,
+    )
 
     # Printa argumentos capturados da simulação
     LOGGER.info(
-        f"Iniciando simulação com os seguintes parâmetros:\n\ttotal_time = {total_time}\n\tdebug = {debug}\n"
+        f"Iniciando simulação com os seguintes parâmetros:\n\ttotal_time = {total_time}\n\tdebug = {debug}\n\tqueue_capacity = {queue_capacity}\n\tbatch_size = {batch_size}\n\tbatch_wait = {batch_wait}\n\tprocessors = {min_processors}..{max_processors}\n\treserve_stripes = {reserve_stripes}\n\tconcurrency = {concurrency}\n\tscheduler = {scheduler} (prazo {sla_deadline or 'nenhum'}, valor alto a partir de {large_amount})\n\tsettlement_interval = {settlement_interval or '(desativado)'}\n\taccounts_per_bank = {accounts_per_bank}\n\tledger = {ledger}\n\trates_file = {rates_file or '(taxas originais)'}\n\tlog_mode = {log_mode} (amostragem 1/{log_sample}, limite {log_rate or 'nenhum'}/s)\n\tjournal_dir = {journal_dir or '(desativado)'}\n\trestore_file = {restore_file or '(bancos aleatórios)'}\n\tsnapshot_file = {snapshot_file or '(nenhum)'}\n\tlock_stats = {lock_stats}\n\tlock_profile = {lock_profile}\n\tseed = {seed if seed is not None else '(aleatória)'}\n\ttrace_file = {trace_file or '(nenhum)'}\n\treplay_file = {replay_file or '(transações aleatórias)'} (velocidade {replay_speed}x)\n\tingest_file = {ingest_file or '(nenhum)'} (lotes de {ingest_batch})\n\tworkload = {workload}: {workload_profile.describe()}\n\tresults_file = {results_file or '(nenhum)'}\n\tlatency_export = {latency_export or '(nenhum)'}\n\tmetrics_port = {metrics_port or '(desativado)'}\n\tengine = {engine}\n"
     )
     time.sleep(3)
 
     # Inicializa variável `tempo`:
     t = 0
 
+    # Se o diretório do journal já tiver um journal, os bancos continuam do estado recuperado dele;
+    # senão, podem ser restaurados de um snapshot
+    recovered_states = None
+    from_journal = bool(journal_dir and journal_files(journal_dir))
+    if from_journal:
+        recovered_states, summary = recover(journal_dir, ledger)
+        first_transaction_id = config.first_transaction_id = summary["next_id"]
+        LOGGER.info(
+            f"Estado dos bancos recuperado do journal {journal_dir}: {summary['done']} transações finalizadas "
+            f"({summary['successful']} com sucesso), {summary['pending']} pendentes não processadas"
+        )
+        if restore_file:
+            LOGGER.warning(f"O snapshot {restore_file} foi ignorado: o journal tem o estado mais recente.")
+    elif restore_file:
+        start = time.perf_counter()
+        recovered_states = read_snapshot(restore_file, ledger)
+        LOGGER.info(f"Estado dos bancos restaurado do snapshot {restore_file} em {time.perf_counter() - start:.3f}s")
+
     # Cria os Bancos Nacionais e popula a lista global `banks`:
     for i, currency in enumerate(Currency):
 
         # Cria Banco Nacional
-        bank = Bank(_id=i, currency=currency)
+        bank = Bank(
+            _id=i,
+            currency=currency,
+            queue_capacity=queue_capacity,
+            reserve_stripes=reserve_stripes,
+            ledger=ledger,
+            priority=scheduler == "priority",
+        )
+
+        bank.latency.keep_records = bool(latency_export)
+
+        if recovered_states is not None:
+            bank.load_state(recovered_states[i])
+            banks.append(bank)
+            continue
 
         # Deposita valores aleatórios nas contas internas (reserves) do banco
         bank.reserves.BRL.deposit(randint(100_000_000, 10_000_000_000))
@@ -64,34 +312,142 @@ if __name__ == "__main__":
         bank.reserves.JPY.deposit(randint(100_000_000, 10_000_000_000))
         bank.reserves.USD.deposit(randint(100_000_000, 10_000_000_000))
 
+        # Cria as contas do banco (`accounts_per_bank` para cada banco) antes de iniciar qualquer
+        # thread, já que transações internacionais acessam contas de outros bancos
+        for _ in range(accounts_per_bank):
+            bank.new_account(
+                balance=randint(1000, 100_000), overdraft_limit=randint(200, 10_000)
+            )
+
         # Adiciona banco na lista global de bancos
         banks.append(bank)
 
-    # @Caio: arrays de Threads para finalização
-    transaction_generators: TransactionGenerator = []
+    # Dinheiro total por moeda (contas + reservas), que deve ser preservado exatamente até o fim
+    initial_money = total_money(banks)
 
-    # Inicializa gerador de transações e processadores de pagamentos para os Bancos Nacionais:
-    for i, bank in enumerate(banks):
-        bank.operating = True
+    # Journal das transações: o estado inicial dos bancos é gravado antes de qualquer transação
+    if journal_dir:
+        journal = open_journal(journal_dir, "main")
+        if not from_journal:
+            journal.wait(journal.append(b"".join(encode_genesis(bank.export_state()) for bank in banks)))
+        if engine == "processes":
+            # cada shard escreve no seu próprio arquivo do journal
+            close_journal()
 
-        # criando as contas do banco (20 para cada banco)
-        for _ in range(20):
-            bank.new_account(
-                balance=randint(1000, 100_000), overdraft_limit=randint(200, 10_000)
-            )
+    # Transações de um trace gravado, reproduzidas no lugar das aleatórias
+    trace = None
+    if replay_file:
+        trace = read_trace(replay_file)
+        validate_trace(trace, banks)
+        LOGGER.info(
+            f"Trace {replay_file} carregado: {sum(len(entries) for entries in trace.values())} transações"
+        )
+
+    # Transferências de um arquivo, validadas de uma só vez e submetidas em lotes no lugar das aleatórias
+    ingest = None
+    if ingest_file:
+        transfers, rejected = read_transfers(ingest_file)
+        valid, invalid = validate_transfers(transfers, [len(bank.accounts) for bank in banks])
+        rejected = sorted(rejected + invalid)
+        ingest = split_by_origin(transfers.take(valid))
+        LOGGER.info(
+            f"Arquivo {ingest_file} carregado: {len(valid)} transferências válidas, {len(rejected)} recusadas"
+        )
+        for line, reason in rejected[:10]:
+            LOGGER.warning(f"   > linha {line} recusada: {reason}")
 
-        # Inicializa um TransactionGenerator thread por banco:
-        generator = TransactionGenerator(_id=i, bank=bank)
-        bank.transaction_generator = generator
-        generator.start()
+    if trace_file and engine != "processes":
+        start_trace(trace_file, time_unit)
 
-        # Inicializa um PaymentProcessor thread por banco.
-        # Sua solução completa deverá funcionar corretamente com múltiplos PaymentProcessor threads para cada banco.
-        for j in range(2):
-            processor = PaymentProcessor(_id=j, bank=bank)
-            bank.payment_processors.append(processor)
-            processor.start()
+    # Liquidação em lotes das reservas (no modo com processos, cada shard liquida as suas)
+    if settlement_interval and engine != "processes":
+        start_settlement(settlement_interval * time_unit)
 
+    # Trocas da tabela de câmbio ao longo da simulação (cada processo aplica as suas)
+    rate_schedule = load_rate_schedule(rates_file) if rates_file else []
+    rate_scheduler = None
+    if engine != "processes":
+        rate_scheduler = start_rate_schedule(rate_schedule, time_unit)
+
+    # Inicializa gerador de transações e processadores de pagamentos para os Bancos Nacionais:
+    worker_settings = {
+        "min_processors": min_processors,
+        "max_processors": max_processors,
+        "batch_size": batch_size,
+        "batch_wait": batch_wait * time_unit,
+    }
+    replay_settings = {
+        "trace": trace,
+        "replay_speed": replay_speed,
+        "workload": workload_profile,
+        "ingest": ingest,
+        "ingest_batch": ingest_batch,
+    }
+
+    # Métricas ao vivo: no modo com processos, cada shard serve as métricas do seu banco na porta
+    # metrics_port + 1 + id do banco, e este processo apenas as métricas globais
+    metrics_server = None
+    if metrics_port:
+        METRICS.register(lambda: [
+            gauge("exchange_rate_table_version", "Versão da tabela de câmbio em uso", {}, RATES.current.version)
+        ])
+        if engine != "processes":
+            for bank in banks:
+                METRICS.register(bank.metrics)
+        metrics_server = start_metrics_server(METRICS, metrics_port)
+    run_start = time.perf_counter()
+    if engine == "processes":
+        # Um processo por banco; o estado final é reconciliado nos bancos deste processo
+        sharded_engine = ShardedEngine(
+            banks,
+            settings=dict(
+                worker_settings,
+                time_unit=time_unit,
+                debug=debug,
+                queue_capacity=queue_capacity,
+                reserve_stripes=reserve_stripes,
+                settlement_interval=settlement_interval * time_unit,
+                concurrency=concurrency,
+                first_transaction_id=first_transaction_id,
+                scheduler=scheduler,
+                sla_deadline=sla_deadline,
+                large_amount=large_amount,
+                ledger=ledger,
+                lock_stats=lock_stats,
+                lock_profile=lock_profile,
+                rate_schedule=rate_schedule,
+                log_mode=log_mode,
+                log_sample=log_sample,
+                log_rate=log_rate,
+                journal_dir=journal_dir,
+                seed=seed,
+                trace_file=trace_file,
+                latency_export=bool(latency_export),
+                metrics_port=metrics_port,
+                **replay_settings,
+            ),
+        )
+        sharded_engine.start()
+    elif engine == "threads":
+        for bank in banks:
+            bank_trace = None if trace is None else trace.get(bank._id, [])
+            bank_ingest = None if ingest is None else ingest.get(bank._id, TransferBatch())
+            start_bank_workers(
+                bank, **worker_settings, trace=bank_trace, replay_speed=replay_speed, workload=workload_profile,
+                ingest=bank_ingest, ingest_batch=ingest_batch,
+            )
+
+    # No modo asyncio, o event loop roda (e encerra) a simulação inteira; `min_processors`
+    # é a quantidade de corrotinas processadoras por banco
+    if engine == "asyncio":
+        AsyncEngine(
+            banks,
+            processors=min_processors,
+            batch_size=batch_size,
+            batch_wait=batch_wait * time_unit,
+            **replay_settings,
+        ).run(total_time * time_unit)
+        t = total_time
 
     # Enquanto o tempo total de simuação não for atingido:
     while t < total_time:
@@ -105,17 +461,124 @@ if __name__ == "__main__":
     # Termina simulação. Após esse print somente dados devem ser printados no console.
     LOGGER.info(f"A simulação chegou ao fim!\n")
 
+    # Para os bancos e aguarda o término de todas as threads (e processos)
+    if engine == "processes":
+        sharded_engine.stop()
+    elif engine == "threads":
+        stop_bank_workers(banks)
+    # as posições ainda não liquidadas são aplicadas às reservas antes de qualquer conferência
+    settlement = stop_settlement()
+    elapsed = time.perf_counter() - run_start
+    stop_metrics_server(metrics_server)
+    if rate_scheduler is not None:
+        rate_scheduler.stop()
+    close_journal()
+    stop_trace()
+    if trace_file and engine == "processes":
+        shard_traces = [shard_trace_file(trace_file, bank._id) for bank in banks]
+        recorded = merge_traces(shard_traces, trace_file)
+        for path in shard_traces:
+            os.remove(path)
+        LOGGER.info(f"Trace {trace_file}: {recorded} transações gravadas pelos shards")
+
     for bank in banks:
-        bank.operating = False
         bank.info()
 
-    # join nas threads
+    # No modo com processos, cada shard printa os histogramas e o profiling dos seus próprios locks
+    if lock_stats and engine != "processes":
+        LOCK_MANAGER.report()
+    if lock_profile and engine != "processes":
+        report_lock_profile()
+    if settlement is not None:
+        settlement.report()
+
+    # Conservação do dinheiro: nenhuma transferência cria ou destrói centavos
+    final_money = total_money(banks)
+    for currency in Currency:
+        if final_money[currency] != initial_money[currency]:
+            LOGGER.error(
+                f"Conservação do dinheiro violada em {currency.name}: "
+                f"inicial = {initial_money[currency]}, final = {final_money[currency]}"
+            )
+    if final_money == initial_money:
+        LOGGER.info("Conservação do dinheiro: OK (totais por moeda preservados exatamente)")
+
+    # Grava o estado final dos bancos para uma próxima simulação (--restore)
+    if snapshot_file:
+        size = write_snapshot(snapshot_file, [bank.export_state() for bank in banks])
+        LOGGER.info(f"Snapshot do estado final dos bancos gravado em {snapshot_file} ({size} bytes)")
+
+    # Transações que não foram processadas até o fim da simulação
+    unprocessed = 0
+    total_wait = 0.0
     for bank in banks:
-        # LOGGER.info("finalizou generator ", bank.transaction_generator)
-        bank.transaction_generator.join()
-        
-        for processor in bank.payment_processors:
-            # LOGGER.info("finalizou ", processor._id)
-            processor.join()
-            
-            
+        pending, mean_wait = bank.transaction_queue.pending()
+        unprocessed += pending
+        total_wait += pending * mean_wait
+    mean_wait = total_wait / unprocessed if unprocessed else 0.0
+    LOGGER.info(f"Transações não processadas: {unprocessed}")
+    LOGGER.info(f"Tempo médio de espera das transações não processadas: {mean_wait:.4f}s")
+
+    # Instantes de cada etapa das transações, para análise fora da simulação
+    if latency_export:
+        rows = export_latency_records(latency_export, banks)
+        LOGGER.info(f"Latências por etapa de {rows} transações gravadas em {latency_export}")
+
+    # Vazão e percentis de latência (tempo de processamento e espera na fila) para benchmarks
+    if results_file:
+        latency = merged(bank.latencies for bank in banks).summary()
+        results = {
+            "settings": {
+                "engine": engine,
+                "time_unit": time_unit,
+                "total_time": total_time,
+                "processors": [min_processors, max_processors],
+                "batch_size": batch_size,
+                "queue_capacity": queue_capacity,
+                "accounts_per_bank": accounts_per_bank,
+                "banks": len(banks),
+                "workload": workload,
+                "workload_profile": workload_profile.describe(),
+                "replay_file": replay_file,
+                "seed": seed,
+                "concurrency": concurrency,
+                "scheduler": scheduler,
+                "sla_deadline": sla_deadline,
+            },
+            "elapsed": elapsed,
+            "completed": latency["count"],
+            "successful": sum(bank.successful_transactions for bank in banks),
+            "unprocessed": unprocessed,
+            "rejected": sum(bank.transaction_queue.rejected for bank in banks),
+            "tps": latency["count"] / elapsed if elapsed else 0.0,
+            "latency": latency,
+            "queue_wait": merged(bank.transaction_queue.wait_histogram for bank in banks).summary(),
+            # grupos de transferências nacionais confirmados, conflitos e grupos feitos com locks mantidos
+            "optimistic": {
+                "commits": sum(bank.optimistic_commits for bank in banks),
+                "conflicts": sum(bank.optimistic_conflicts for bank in banks),
+                "fallbacks": sum(bank.optimistic_fallbacks for bank in banks),
+            },
+            # transações finalizadas, vencidas e percentis de latência por classe de prioridade
+            "classes": {
+                spec.name: dict(
+                    merged(bank.classes.latencies[priority_class] for bank in banks).summary(),
+                    expired=sum(bank.classes.expired[priority_class] for bank in banks),
+                )
+                for priority_class, spec in enumerate(PRIORITY_CLASSES)
+            },
+            # histogramas por etapa (faixas de WAIT_BUCKETS seguidas do tempo total), somados entre os bancos
+            "latency_breakdown": {
+                name: [sum(values) for values in zip(*(bank.latency.histograms[name] for bank in banks))]
+                for name, _, _ in SEGMENTS
+            },
+        }
+        with open(results_file, "w") as file:
+            json.dump(results, file, indent=2)
+        LOGGER.info(
+            f"Resultados gravados em {results_file}: {results['tps']:.1f} transações/s, latência "
+            f"p50 = {latency['p50']:.4f}s, p95 = {latency['p95']:.4f}s, p99 = {latency['p99']:.4f}s"
+        )
+
+    # Escreve os logs ainda enfileirados
+    disable_async_logging()
@@ -1,10 +1,14 @@
 from dataclasses import dataclass
+from logging import WARNING
 
 from utils.currency import Currency
-from utils.logger import LOGGER
+from utils.logger import LOGGER, hot
+from utils.lock_manager import LOCK_MANAGER
+from utils.lock_profiler import make_lock, set_lock_name
+from utils.money import OVERDRAFT_INTEREST_BPS, fee
 from globals import banks
 
-from threading import Lock
+from typing import List, Optional
 
 
 @dataclass
@@ -24,11 +28,16 @@ class Account:
     currency : Currency
         Moeda corrente da conta bancária.
     balance : int
-        Saldo da conta bancária.
+        Saldo da conta bancária (em unidades mínimas da moeda, ex.: centavos).
     overdraft_limit : int
-        Limite de cheque especial da conta bancária.
+        Limite de cheque especial da conta bancária (em unidades mínimas da moeda).
     _lock : Lock
-        Lock da conta bancária.
+        Lock da conta bancária (um ProfiledLock, com o profiling de locks ativado).
+    lock_key : tuple
+        Chave global (bank_id, account_id) que define a ordem de aquisição do lock da conta.
+    version : int
+        Versão do saldo da conta, incrementada (com o lock da conta) a cada depósito ou retirada;
+        usada pelas transferências otimistas para detectar conflitos.
 
     Métodos
     -------
@@ -38,8 +47,10 @@ class Account:
         Adiciona o valor `amount` ao saldo da conta bancária.
     withdraw(amount: int) -> None:
         Remove o valor `amount` do saldo da conta bancária.
-    lock() -> None:
-        Faz acquire no lock da conta
+    withdrawal(balance: int, amount: int) -> Optional[int]:
+        Retorna os juros cobrados por retirar `amount` de um saldo `balance` (None = sem saldo), sem alterar a conta.
+    lock(timeout: float = -1) -> bool:
+        Faz acquire no lock da conta, esperando no máximo `timeout` segundos (-1 = sem limite)
     unlock() -> None:
         Faz release no lock da conta
     """
@@ -50,7 +61,9 @@ class Account:
         self.balance = balance
         self.overdraft_limit = overdraft_limit
         # @Caio: cada conta possui lock proprio para operações
-        self._lock = Lock()
+        self._lock = make_lock(f"banco {_bank_id}: conta {_id}")
+        self.lock_key = (_bank_id, _id)
+        self.version = 0
 
     def info(self) -> None:
         """
@@ -74,8 +87,10 @@ class Account:
 
         # @Caio: operação já protegida com lock da conta pelo método que a chama
         self.balance += amount
+        self.version += 1
 
-        LOGGER.info(f"deposit({amount}) successful!")
+        if hot():
+            LOGGER.info(f"deposit({amount}) successful!")
         return True
 
     def withdraw(self, amount: int) -> bool:
@@ -87,30 +102,39 @@ class Account:
         """
         # TODO: IMPLEMENTE AS MODIFICAÇÕES NECESSÁRIAS NESTE MÉTODO !
 
-        # se tiver a quantia para retirar
-        if self.balance >= amount:
-            self.balance -= amount
-            LOGGER.info(f"withdraw({amount}) successful!")
-            return True
-        else:       # se não tiver a quantia, verifica se consegue usar o cheque especial
-            overdrafted_amount = abs(self.balance - amount)  # quantidade que precisa do cheque especial
-            if self.overdraft_limit >= overdrafted_amount:
-                self.balance -= ((amount - overdrafted_amount) + overdrafted_amount * 1.05)
-                
-                bank = banks[self._bank_id]
-                bank.bank_profit_lock.acquire()
-                bank.bank_profit += overdrafted_amount * 0.05
-                bank.bank_profit_lock.release()
-                
+        interest = self.withdrawal(self.balance, amount)
+        if interest is None:
+            if hot(WARNING):
+                LOGGER.warning(f"withdraw({amount}) failed, no balance!")
+            return False
+
+        self.balance -= amount + interest
+        self.version += 1
+        if interest:
+            banks[self._bank_id].add_overdraft_interest(interest)
+            if hot():
                 LOGGER.info(f"withdraw({amount}) successful with overdraft!")
+        elif hot():
+            LOGGER.info(f"withdraw({amount}) successful!")
+        return True
 
-                return True
-            else:
-                LOGGER.warning(f"withdraw({amount}) failed, no balance!")
-                return False
+    def withdrawal(self, balance: int, amount: int) -> Optional[int]:
+        """
+        Retorna os juros de cheque especial cobrados para retirar `amount` de um saldo `balance` (0 se
+        o saldo basta) ou None se nem o cheque especial cobre a retirada. Não altera a conta.
+        """
+        # se tiver a quantia para retirar
+        if balance >= amount:
+            return 0
+        # se não tiver a quantia, verifica se consegue usar o cheque especial
+        overdrafted_amount = abs(balance - amount)  # quantidade que precisa do cheque especial
+        if self.overdraft_limit >= overdrafted_amount:
+            # juros de 5% sobre o cheque especial, em centavos inteiros arredondados para cima
+            return fee(overdrafted_amount, OVERDRAFT_INTEREST_BPS)
+        return None
 
-    def lock(self):
-        self._lock.acquire()
+    def lock(self, timeout: float = -1) -> bool:
+        return self._lock.acquire(timeout=timeout)
 
     def unlock(self):
         self._lock.release()
@@ -138,11 +162,113 @@ class CurrencyReserves:
     Uma classe de dados para armazenar as reservas do banco, que serão usadas
     para câmbio e transferências internacionais.
     OBS: NÃO É PERMITIDO ALTERAR ESSA CLASSE!
+    Cada moeda é uma StripedReserve com `stripes` subcontas (1 = uma única conta).
+    """
+    def __init__(self, _bank_id: int = 0, stripes: int = 1):
+        self.USD: StripedReserve = StripedReserve(_id=1, _bank_id=_bank_id, currency=Currency.USD, stripes=stripes)
+        self.EUR: StripedReserve = StripedReserve(_id=2, _bank_id=_bank_id, currency=Currency.EUR, stripes=stripes)
+        self.GBP: StripedReserve = StripedReserve(_id=3, _bank_id=_bank_id, currency=Currency.GBP, stripes=stripes)
+        self.JPY: StripedReserve = StripedReserve(_id=4, _bank_id=_bank_id, currency=Currency.JPY, stripes=stripes)
+        self.CHF: StripedReserve = StripedReserve(_id=5, _bank_id=_bank_id, currency=Currency.CHF, stripes=stripes)
+        self.BRL: StripedReserve = StripedReserve(_id=6, _bank_id=_bank_id, currency=Currency.BRL, stripes=stripes)
+
+
+class StripedReserve:
+    """
+    Uma classe para representar a reserva de um banco em uma moeda, dividida em várias subcontas
+    (stripes), cada uma com seu próprio lock. Processadores diferentes usam subcontas diferentes
+    (escolhidas por stripe(key)), então transferências internacionais simultâneas não disputam
+    um único lock por moeda. Quando uma subconta não tem saldo suficiente, o saldo é redistribuído
+    entre as subcontas (rebalance()) antes de a operação ser considerada sem saldo.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    _id : int
+        Identificador da reserva.
+    _bank_id : int
+        Identificador do banco dono da reserva.
+    currency : Currency
+        Moeda da reserva.
+    stripes : List[Account]
+        Subcontas da reserva. A subconta i tem lock_key (bank_id, -_id, i), de modo que os locks das
+        reservas nunca colidem com os das contas dos clientes.
+    balance : int
+        Saldo total da reserva (soma das subcontas). Atribuir um valor o distribui entre as subcontas.
+
+    Métodos
+    -------
+    stripe(key: int) -> Account:
+        Retorna a subconta usada por `key` (ex.: o identificador do processador).
+    deposit(amount: int) -> bool:
+        Distribui o depósito de `amount` igualmente entre as subcontas.
+    withdraw_from(key: int, amount: int) -> bool:
+        Retira `amount` da subconta de `key`, redistribuindo o saldo se necessário.
+    rebalance() -> None:
+        Redistribui o saldo total igualmente entre as subcontas.
     """
-    def __init__(self):
-        self.USD: Account = Account(_id=1, _bank_id=0, currency=Currency.USD)
-        self.EUR: Account = Account(_id=2, _bank_id=0, currency=Currency.EUR)
-        self.GBP: Account = Account(_id=3, _bank_id=0, currency=Currency.GBP)
-        self.JPY: Account = Account(_id=4, _bank_id=0, currency=Currency.JPY)
-        self.CHF: Account = Account(_id=5, _bank_id=0, currency=Currency.CHF)
-        self.BRL: Account = Account(_id=6, _bank_id=0, currency=Currency.BRL)
\ No newline at end of file
+
+    def __init__(self, _id: int, _bank_id: int, currency: Currency, stripes: int = 1):
+        self._id = _id
+        self._bank_id = _bank_id
+        self.currency = currency
+        self.stripes: List[Account] = [
+            Account(_id=_id, _bank_id=_bank_id, currency=currency) for _ in range(max(stripes, 1))
+        ]
+        for i, stripe in enumerate(self.stripes):
+            stripe.lock_key = (_bank_id, -_id, i)
+            set_lock_name(stripe._lock, f"banco {_bank_id}: reserva {currency.name}[{i}]")
+
+    @property
+    def balance(self) -> int:
+        return sum(stripe.balance for stripe in self.stripes)
+
+    @balance.setter
+    def balance(self, value: int) -> None:
+        for stripe, share in zip(self.stripes, self._split(value)):
+            stripe.balance = share
+
+    def _split(self, amount: int) -> List[int]:
+        """
+        Divide `amount` em partes iguais, uma por subconta; o resto vai para a primeira subconta.
+        """
+        n = len(self.stripes)
+        share = amount // n
+        return [amount - share * (n - 1)] + [share] * (n - 1)
+
+    def stripe(self, key: int) -> Account:
+        return self.stripes[key % len(self.stripes)]
+
+    def deposit(self, amount: int) -> bool:
+        for stripe, share in zip(self.stripes, self._split(amount)):
+            with LOCK_MANAGER.hold(stripe):
+                stripe.deposit(share)
+        return True
+
+    def withdraw_from(self, key: int, amount: int) -> bool:
+        """
+        Retira `amount` da subconta de `key` (que não deve estar travada por quem chama). Se a
+        subconta não tiver saldo, a reserva é rebalanceada e a retirada é tentada uma segunda vez.
+        """
+        stripe = self.stripe(key)
+        for attempt in range(2):
+            with LOCK_MANAGER.hold(stripe):
+                if stripe.balance >= amount:
+                    return stripe.withdraw(amount)
+            if attempt == 0 and len(self.stripes) > 1 and self.balance >= amount:
+                self.rebalance()
+            else:
+                break
+        if hot(WARNING):
+            LOGGER.warning(f"withdraw({amount}) failed, no balance in {self.currency.name} reserve!")
+        return False
+
+    def rebalance(self) -> None:
+        """
+        Redistribui o saldo total igualmente entre as subcontas. Todas as subcontas são travadas
+        (na ordem global do LOCK_MANAGER) durante a redistribuição.
+        """
+        with LOCK_MANAGER.hold(*self.stripes):
+            self.balance = self.balance
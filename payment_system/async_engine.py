@@ -0,0 +1,471 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import globals as config
+from payment_system.bank import Bank, submit_transaction
+from payment_system.journal import get_journal
+from payment_system.latency import DEQUEUED, ENQUEUED
+from payment_system.payment_processor import TransactionExecutor
+from payment_system.trace import TraceEntry
+from payment_system.ingest import TransferBatch
+from payment_system.transaction_generator import generator_rng
+from payment_system.workload import WorkloadProfile
+from payment_system.transaction_queue import TransactionQueue
+from utils.transaction import Transaction, TransactionStatus
+from utils.logger import LOGGER
+
+
+class AsyncTransactionQueue(TransactionQueue):
+    """
+    Uma fila FIFO limitada de transações para o modo asyncio, com as mesmas estatísticas de
+    TransactionQueue. put(), get() e get_batch() são corrotinas: em vez de bloquear a thread,
+    produtores e consumidores esperam em futures acordados pela operação oposta.
+    Toda a fila é usada a partir de um único event loop, então não há disputa pelo mutex herdado.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Métodos
+    -------
+    put(transaction: Transaction, block: bool = True, timeout: Optional[float] = None) -> bool:
+        (corrotina) Enfileira uma transação, esperando enquanto a fila estiver cheia.
+    put_batch(transactions: List[Transaction], block: bool = True, timeout: Optional[float] = None) -> int:
+        (corrotina) Enfileira várias transações de uma só vez, esperando por espaço se necessário.
+    get(block: bool = True, timeout: Optional[float] = None) -> Optional[Transaction]:
+        (corrotina) Retira a transação mais antiga da fila.
+    get_batch(max_items: int, max_wait: float = 0.0, block: bool = True, timeout: Optional[float] = None) -> List[Transaction]:
+        (corrotina) Retira até `max_items` transações da fila de uma só vez.
+    close() -> None:
+        Fecha a fila e acorda todas as corrotinas esperando nela.
+    """
+
+    def __init__(self, capacity: int = 0, priority: bool = False):
+        TransactionQueue.__init__(self, capacity, priority)
+        self._getters = deque()
+        self._putters = deque()
+
+    async def _wait(self, waiters: deque, timeout: Optional[float]) -> None:
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+
+    def _wake(self, waiters: deque) -> None:
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+
+    async def put(self, transaction: Transaction, block: bool = True, timeout: Optional[float] = None) -> bool:
+        if self._full() and block and not self.closed:
+            start = time.monotonic()
+            deadline = None if timeout is None else start + timeout
+            while self._full() and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                await self._wait(self._putters, remaining)
+            self.put_wait_time += time.monotonic() - start
+
+        if self.closed or self._full():
+            self.rejected += 1
+            return False
+
+        now = time.monotonic()
+        self._items.append((now, transaction))
+        if self.latency is not None:
+            self.latency.stamp((transaction,), ENQUEUED, now)
+        self.enqueued += 1
+        if len(self._items) > self.max_depth:
+            self.max_depth = len(self._items)
+        self._wake(self._getters)
+        return True
+
+    async def put_batch(self, transactions: List[Transaction], block: bool = True, timeout: Optional[float] = None) -> int:
+        done = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while done < len(transactions) and not self.closed:
+            space = self.capacity - len(self._items) if self.capacity > 0 else len(transactions) - done
+            if space <= 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    break
+                start = time.monotonic()
+                await self._wait(self._putters, remaining)
+                self.put_wait_time += time.monotonic() - start
+                continue
+
+            chunk = transactions[done:done + space]
+            now = time.monotonic()
+            self._items.extend((now, transaction) for transaction in chunk)
+            if self.latency is not None:
+                self.latency.stamp(chunk, ENQUEUED, now)
+            self.enqueued += len(chunk)
+            done += len(chunk)
+            if len(self._items) > self.max_depth:
+                self.max_depth = len(self._items)
+            for _ in range(min(len(chunk), len(self._getters))):
+                self._wake(self._getters)
+
+        # o restante do lote (fila cheia ou fechada) é recusado, como em put()
+        self.rejected += len(transactions) - done
+        return done
+
+    async def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[Transaction]:
+        batch = await self.get_batch(1, block=block, timeout=timeout)
+        return batch[0] if batch else None
+
+    async def get_batch(
+        self, max_items: int, max_wait: float = 0.0, block: bool = True, timeout: Optional[float] = None
+    ) -> List[Transaction]:
+        if not self._items and block and not self.closed:
+            await self._wait_items(timeout)
+        if self.closed or not self._items:
+            return []
+
+        deadline = time.monotonic() + max_wait
+        batch = []
+        waits: List[float] = []
+        while len(batch) < max_items:
+            if not self._items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await self._wait_items(remaining)
+                if self.closed:
+                    # a simulação acabou durante a espera: o lote volta para a fila sem ser processado
+                    self._items.extendleft(reversed(batch))
+                    return []
+                if not self._items:
+                    break
+
+            enqueued_at, transaction = self._items.popleft()
+            waits.append(time.monotonic() - enqueued_at)
+            batch.append((enqueued_at, transaction))
+            self._wake(self._putters)
+
+        # só as transações entregues ao processador contam (um lote devolvido à fila não)
+        self.dequeued += len(batch)
+        self.queue_wait_time += sum(waits)
+        self.wait_histogram.extend(waits)
+        transactions = [transaction for _, transaction in batch]
+        if self.latency is not None:
+            self.latency.stamp(transactions, DEQUEUED)
+        return transactions
+
+    async def _wait_items(self, timeout: Optional[float]) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._items and not self.closed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            await self._wait(self._getters, remaining)
+
+    def close(self) -> None:
+        self.closed = True
+        for waiters in (self._getters, self._putters):
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+
+
+class AsyncTransactionGenerator:
+    """
+    Uma classe para gerar transações de um banco como corrotina (modo asyncio).
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    _id : int
+        Identificador do gerador de transações.
+    bank: Bank
+        Banco sob o qual o gerador de transações operará.
+    trace : Optional[List[TraceEntry]]
+        Transações de um trace a reproduzir no lugar das aleatórias (None = aleatórias).
+    speed : float
+        Fator de aceleração do trace (1 = ritmo original, 0 = o mais rápido possível).
+    workload : WorkloadProfile
+        Perfil da carga gerada (contas, bancos de destino e chegadas das transações).
+    ingest : Optional[TransferBatch]
+        Transferências de um arquivo a submeter em lotes no lugar das aleatórias (None = aleatórias).
+    ingest_batch : int
+        Quantidade de transferências submetidas de uma só vez.
+
+    Métodos
+    -------
+    run():
+        (corrotina) Gera (ou reproduz, ou submete) transações enquanto o banco estiver em operação.
+    """
+
+    def __init__(
+        self,
+        _id: int,
+        bank: Bank,
+        trace: Optional[List[TraceEntry]] = None,
+        speed: float = 1.0,
+        workload: Optional[WorkloadProfile] = None,
+        ingest: Optional[TransferBatch] = None,
+        ingest_batch: int = 1000,
+    ):
+        self._id = _id
+        self.bank = bank
+        self.trace = trace
+        self.speed = speed
+        self.workload = workload or WorkloadProfile()
+        self.ingest = ingest
+        self.ingest_batch = max(ingest_batch, 1)
+
+    async def run(self):
+        if self.ingest is not None:
+            await self._ingest()
+            return
+        if self.trace is not None:
+            await self._replay()
+            return
+
+        LOGGER.info(f"Inicializado AsyncTransactionGenerator para o Banco Nacional {self.bank._id}!")
+
+        rng = generator_rng(self.bank._id)
+        start = next_arrival = time.monotonic()
+        i = 0
+        while self.bank.operating:
+            # malha fechada: espera enquanto a fila estiver cheia (backpressure); malha aberta: a
+            # transação é recusada se a fila estiver cheia. Falha sempre se a fila for fechada.
+            transaction = self.workload.transaction(self.bank._id, config.first_transaction_id + i, rng)
+            if await self.bank.transaction_queue.put(transaction, block=not self.workload.open_loop):
+                submit_transaction(transaction)
+                i += 1
+            elif self.bank.transaction_queue.closed:
+                break
+
+            interval = self.workload.next_interval(rng, time.monotonic() - start)
+            if self.workload.open_loop:
+                next_arrival += interval
+                interval = next_arrival - time.monotonic()
+            await asyncio.sleep(max(0.0, interval))
+
+        LOGGER.info(f"O AsyncTransactionGenerator {self._id} do banco {self.bank._id} foi finalizado.")
+
+    async def _replay(self):
+        LOGGER.info(
+            f"Inicializado AsyncTransactionGenerator para o Banco Nacional {self.bank._id} "
+            f"(reprodução de {len(self.trace)} transações)!"
+        )
+
+        start = time.monotonic()
+        i = 0
+        for at, origin, destination, amount, currency in self.trace:
+            if self.speed:
+                await asyncio.sleep(max(0.0, start + at * config.time_unit / self.speed - time.monotonic()))
+            else:
+                # cede o event loop mesmo sem esperar, para não monopolizá-lo
+                await asyncio.sleep(0)
+            if not self.bank.operating:
+                break
+            transaction = Transaction(config.first_transaction_id + i, origin, destination, amount, currency=currency)
+            if not await self.bank.transaction_queue.put(transaction):
+                break
+            submit_transaction(transaction)
+            i += 1
+
+        LOGGER.info(f"O AsyncTransactionGenerator {self._id} do banco {self.bank._id} reproduziu {i} transações.")
+
+    async def _ingest(self):
+        LOGGER.info(
+            f"Inicializado AsyncTransactionGenerator para o Banco Nacional {self.bank._id} "
+            f"(ingestão de {len(self.ingest)} transferências)!"
+        )
+
+        submitted = rejected = 0
+        for start in range(0, len(self.ingest), self.ingest_batch):
+            if not self.bank.operating:
+                break
+            transactions, refused = self.bank.prepare_batch(self.ingest.slice(start, start + self.ingest_batch))
+            enqueued = await self.bank.transaction_queue.put_batch(transactions)
+            for transaction in transactions[:enqueued]:
+                submit_transaction(transaction)
+            submitted += enqueued
+            rejected += len(refused)
+            if enqueued < len(transactions):
+                break
+
+        LOGGER.info(
+            f"O AsyncTransactionGenerator {self._id} do banco {self.bank._id} enfileirou {submitted} transferências"
+            + (f" ({rejected} recusadas)." if rejected else ".")
+        )
+
+
+class AsyncPaymentProcessor(TransactionExecutor):
+    """
+    Uma classe para representar um processador de pagamentos como corrotina (modo asyncio).
+    A lógica de negócio é a mesma do PaymentProcessor (TransactionExecutor.execute_batch); apenas a
+    espera na fila e a latência simulada (asyncio.sleep) liberam o event loop, de modo que milhares
+    de processadores por banco custam apenas algumas corrotinas.
+    execute_batch() nunca é interrompido por um await, então os locks das contas adquiridos por
+    ele nunca estão ocupados por outra corrotina e não bloqueiam o event loop.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    batch_size : int
+        Quantidade máxima de transações retiradas da fila por vez (1 = sem lotes).
+    batch_wait : float
+        Tempo máximo (em segundos) de espera para completar um lote.
+    processed : int
+        Quantidade de transações processadas por esse processador.
+    busy_time : float
+        Tempo total (em segundos) gasto processando transações.
+
+    Métodos
+    -------
+    run():
+        (corrotina) Processa transações da fila do banco enquanto ele estiver em operação.
+    process_batch(transactions: List[Transaction]) -> List[TransactionStatus]:
+        (corrotina) Processa um lote de transações, esperando a latência simulada uma única vez.
+    """
+
+    def __init__(self, _id: int, bank: Bank, batch_size: int = 1, batch_wait: float = 0.0):
+        TransactionExecutor.__init__(self, _id, bank)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.processed = 0
+        self.busy_time = 0.0
+
+    async def run(self):
+        LOGGER.debug(f"Inicializado o AsyncPaymentProcessor {self._id} do Banco {self.bank._id}!")
+        queue = self.bank.transaction_queue
+
+        while self.bank.operating:
+            transactions = await queue.get_batch(self.batch_size, self.batch_wait)
+            if not transactions:
+                continue
+
+            start = time.monotonic()
+            try:
+                await self.process_batch(transactions)
+            except Exception as err:
+                LOGGER.error(f"Falha em AsyncPaymentProcessor.run(): {err}")
+            self.busy_time += time.monotonic() - start
+            self.processed += len(transactions)
+
+        LOGGER.debug(f"O AsyncPaymentProcessor {self._id} do banco {self.bank._id} foi finalizado.")
+
+    async def process_batch(self, transactions: List[Transaction]) -> List[TransactionStatus]:
+        results = self.execute_batch(transactions)
+
+        # Simula a latência de processamento sem ocupar uma thread (uma vez por lote).
+        await asyncio.sleep(3 * config.time_unit)
+
+        # os status só são confirmados depois que o journal gravou o lote
+        journal = get_journal()
+        if journal is not None:
+            while not journal.is_durable(self.journal_seq):
+                await asyncio.sleep(0.001)
+
+        self.complete_batch(transactions, results)
+        return results
+
+
+class AsyncEngine:
+    """
+    Uma classe para executar a simulação em um único event loop asyncio.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    banks : List[Bank]
+        Bancos da simulação.
+    processors : int
+        Quantidade de AsyncPaymentProcessors por banco.
+    batch_size : int
+        Quantidade máxima de transações por lote de cada processador.
+    batch_wait : float
+        Tempo máximo (em segundos) de espera para completar um lote.
+    trace : Optional[Dict[int, List[TraceEntry]]]
+        Transações de um trace a reproduzir, por banco de origem (None = transações aleatórias).
+    replay_speed : float
+        Fator de aceleração do trace (1 = ritmo original, 0 = o mais rápido possível).
+    workload : Optional[WorkloadProfile]
+        Perfil da carga gerada pelos bancos (None = o perfil "uniform").
+    ingest : Optional[Dict[int, TransferBatch]]
+        Transferências de um arquivo a submeter, por banco de origem (None = transações aleatórias).
+    ingest_batch : int
+        Quantidade de transferências submetidas de uma só vez.
+
+    Métodos
+    -------
+    run(duration: float) -> None:
+        Executa a simulação por `duration` segundos e encerra todas as corrotinas.
+    """
+
+    def __init__(
+        self,
+        banks: List[Bank],
+        processors: int,
+        batch_size: int = 1,
+        batch_wait: float = 0.0,
+        trace: Optional[Dict[int, List[TraceEntry]]] = None,
+        replay_speed: float = 1.0,
+        workload: Optional[WorkloadProfile] = None,
+        ingest: Optional[Dict[int, TransferBatch]] = None,
+        ingest_batch: int = 1000,
+    ):
+        self.banks = banks
+        self.processors = processors
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.trace = trace
+        self.replay_speed = replay_speed
+        self.workload = workload
+        self.ingest = ingest
+        self.ingest_batch = ingest_batch
+
+    def run(self, duration: float) -> None:
+        asyncio.run(self._main(duration))
+
+    async def _main(self, duration: float) -> None:
+        tasks = []
+        for bank in self.banks:
+            bank.transaction_queue = AsyncTransactionQueue(
+                capacity=bank.transaction_queue.capacity, priority=bank.transaction_queue.priority
+            )
+            bank.transaction_queue.latency = bank.latency
+            bank.operating = True
+
+            bank_trace = None if self.trace is None else self.trace.get(bank._id, [])
+            generator = AsyncTransactionGenerator(
+                _id=bank._id, bank=bank, trace=bank_trace, speed=self.replay_speed,
+                workload=self.workload,
+                ingest=None if self.ingest is None else self.ingest.get(bank._id, TransferBatch()),
+                ingest_batch=self.ingest_batch,
+            )
+            tasks.append(asyncio.create_task(generator.run()))
+            for j in range(self.processors):
+                processor = AsyncPaymentProcessor(j, bank, self.batch_size, self.batch_wait)
+                bank.payment_processors.append(processor)
+                tasks.append(asyncio.create_task(processor.run()))
+
+        LOGGER.info(f"Modo asyncio: {self.processors} AsyncPaymentProcessors por banco.")
+        await asyncio.sleep(duration)
+
+        for bank in self.banks:
+            bank.operating = False
+            bank.transaction_queue.close()
+        await asyncio.gather(*tasks)
+        for bank in self.banks:
+            bank.latency.drain()
@@ -1,11 +1,46 @@
-from typing import Tuple
+from itertools import count
+from typing import Dict, List, Optional, Tuple
 
+import globals as config
 from payment_system.account import Account, CurrencyReserves
+from payment_system.ingest import Rejection, TransferBatch, validate_transfers
+from payment_system.journal import encode_pending, get_journal
+from payment_system.latency import SEGMENTS, LatencyTracker
+from payment_system.ledger import AccountLedger
+from payment_system.scheduler import PRIORITY_CLASSES, ClassStats
+from payment_system.trace import get_trace_recorder
+from payment_system.transaction_queue import TransactionQueue
 from utils.transaction import Transaction
 from utils.currency import Currency
+from utils.lock_manager import WAIT_BUCKETS
+from utils.lock_profiler import make_lock, set_lock_name
 from utils.logger import LOGGER
+from utils.metrics import Metric, counter, gauge, histogram
+from utils.sharded_counter import ShardedCounter
+from utils.stats import Histogram
+
+
+def submit_transaction(transaction: Transaction) -> None:
+    """
+    Registra no journal e no trace (se ativos) uma transação recém enfileirada.
+    """
+    journal = get_journal()
+    if journal is not None:
+        journal.append(encode_pending(transaction))
+    recorder = get_trace_recorder()
+    if recorder is not None:
+        recorder.record(transaction)
+
+
+def _counter_property(name: str) -> property:
+    """
+    Cria a propriedade que lê (somando as parcelas) e substitui o contador `name` de Bank.counters.
+    """
+    return property(
+        lambda self: self.counters[name].value(),
+        lambda self, value: self.counters[name].set(value),
+    )
 
-from threading import Lock, Semaphore
 
 class Bank:
     """
@@ -21,58 +56,131 @@ class Bank:
     currency : Currency
         Moeda corrente das contas bancárias do banco.
     reserves : CurrencyReserves
-        Dataclass de contas bancárias contendo as reservas internas do banco.
+        Dataclass de reservas internas do banco (uma StripedReserve por moeda).
     operating : bool
         Booleano que indica se o banco está em funcionamento ou não.
-    accounts : List[Account]
-        Lista contendo as contas bancárias dos clientes do banco.
-    transaction_queue : Queue[Transaction]
-        Fila FIFO contendo as transações bancárias pendentes que ainda serão processadas.
+    accounts : List[Account] | AccountLedger
+        Lista contendo as contas bancárias dos clientes do banco (ou, com `ledger`, um AccountLedger
+        compacto que se comporta como essa lista).
+    transaction_queue : TransactionQueue
+        Fila FIFO limitada contendo as transações bancárias pendentes que ainda serão processadas
+        (ou, com `priority`, uma fila por classe de prioridade com retirada ponderada).
     payment_processors : List[PaymentProcessor]
         Lista dos PaymentProcessors do banco
+    transaction_generator : Optional[TransactionGenerator]
+        Gerador de transações do banco (None enquanto o banco não está em operação)
+    processor_supervisor : Optional[ProcessorSupervisor]
+        Supervisor de autoescalonamento dos PaymentProcessors (None se desativado)
     nacional_transactions : int
         Quantidade de transações nacionais realizadas pelo banco
-    nacional_transactions_lock : Lock()
-        Lock para proteção do contador de transações nacionais
     internacional_transactions : int
         Quantidade de transações internacionais realizadas pelo banco
-    internacional_transactions_loc: Lock
-        Lock para proteção do contador de transações internacionais
-    bank_profit : float
-        Lucro obtido pelo banco
-    bank_profit_lock = Lock()
-        Lock para proteção da variável com lucro do banco
-    queue_semaphore : Semaphore
-        Semáforo para controle da fila de operações
+    bank_profit : int
+        Lucro obtido pelo banco (em unidades mínimas da moeda do banco)
+    overdraft_interest : int
+        Parte do lucro vinda de juros de cheque especial (dinheiro que saiu das contas dos clientes)
+    latencies : Histogram
+        Distribuição do tempo de processamento (em segundos, da criação à finalização) das transações
+        finalizadas
+    successful_transactions : int
+        Quantidade de transações finalizadas com sucesso
+    latencies_lock : Lock
+        Lock para proteção das latências e do contador de sucessos
+    latency : LatencyTracker
+        Histogramas do tempo gasto pelas transações do banco em cada etapa do processamento
+    optimistic_commits : int
+        Grupos de transferências nacionais confirmados pelo modo otimista (compare-and-swap)
+    optimistic_conflicts : int
+        Tentativas otimistas descartadas porque uma das contas mudou (conflitos)
+    optimistic_fallbacks : int
+        Grupos que esgotaram as tentativas otimistas e foram feitos com os locks mantidos
+    classes : ClassStats
+        Latências e transações vencidas por classe de prioridade (com o escalonador "priority")
+    counters : Dict[str, ShardedCounter]
+        Contadores acima que são atualizados pelos processadores, com uma parcela por thread (sem
+        lock compartilhado entre os processadores); os atributos somam as parcelas quando lidos
 
     Métodos
     -------
     new_account(balance: int = 0, overdraft_limit: int = 0) -> None:
         Cria uma nova conta bancária (Account) no banco.
+    count_national(n: int = 1) -> None:
+        Soma `n` ao contador de transações nacionais.
+    count_international(n: int = 1) -> None:
+        Soma `n` ao contador de transações internacionais.
+    add_profit(amount: int) -> None:
+        Soma `amount` ao lucro do banco.
+    add_overdraft_interest(amount: int) -> None:
+        Soma `amount` de juros de cheque especial ao lucro do banco.
+    record_completed(latencies: List[float], successful: int) -> None:
+        Registra as latências de transações finalizadas, `successful` delas com sucesso.
+    record_optimistic(commits: int, conflicts: int, fallbacks: int) -> None:
+        Soma aos contadores do modo otimista das transferências nacionais.
+    prepare_batch(batch: TransferBatch) -> Tuple[List[Transaction], List[Rejection]]:
+        Valida um lote de transferências e cria as transações das válidas.
+    submit_batch(batch: TransferBatch, block: bool = True, timeout: Optional[float] = None) -> Tuple[int, List[Rejection]]:
+        Valida um lote de transferências e enfileira as válidas de uma só vez.
+    money_totals() -> Dict[Currency, int]:
+        Retorna, por moeda, o dinheiro do banco (contas, reservas e juros cobrados).
+    export_state() -> dict:
+        Retorna um dicionário (serializável) com os saldos, contadores e estatísticas do banco.
+    load_state(state: dict) -> None:
+        Substitui os saldos, contadores e estatísticas do banco pelos de `state`.
+    metrics() -> List[Metric]:
+        Retorna as métricas atuais do banco (contadores, fila, processadores e latências).
     info() -> None:
         Printa informações e estatísticas sobre o funcionamento do banco.
 
     """
 
-    def __init__(self, _id: int, currency: Currency):
+    # leituras e atribuições desses atributos vão para os contadores com uma parcela por thread
+    nacional_transactions = _counter_property("nacional_transactions")
+    internacional_transactions = _counter_property("internacional_transactions")
+    bank_profit = _counter_property("bank_profit")
+    overdraft_interest = _counter_property("overdraft_interest")
+    optimistic_commits = _counter_property("optimistic_commits")
+    optimistic_conflicts = _counter_property("optimistic_conflicts")
+    optimistic_fallbacks = _counter_property("optimistic_fallbacks")
+
+    def __init__(
+        self,
+        _id: int,
+        currency: Currency,
+        queue_capacity: int = 0,
+        reserve_stripes: int = 1,
+        ledger: bool = False,
+        priority: bool = False,
+    ):
         self._id = _id
         self.currency = currency
-        self.reserves = CurrencyReserves()
+        self.reserves = CurrencyReserves(_bank_id=_id, stripes=reserve_stripes)
         self.operating = False
-        self.accounts = []
-        self.transaction_queue = []
+        self.accounts = AccountLedger(_id, currency) if ledger else []
+        self.latency = LatencyTracker()
+        self.transaction_queue = TransactionQueue(capacity=queue_capacity, priority=priority)
+        self.transaction_queue.latency = self.latency
+        set_lock_name(self.transaction_queue._mutex, f"banco {_id}: fila de transações")
         self.payment_processors = []
-        
+        self.transaction_generator = None
+        self.processor_supervisor = None
+
         # dados para prints ao final da execução
-        self.nacional_transactions = 0
-        self.internacional_transactions = 0
-        self.bank_profit = 0
-        
-        self.nacional_transactions_lock = Lock()
-        self.internacional_transactions_lock = Lock()
-        self.bank_profit_lock = Lock()
-        self.queue_semaphore = Semaphore(value =0)
-        
+        # os contadores atualizados a cada lote têm uma parcela por thread (ver ShardedCounter)
+        self.counters = {
+            name: ShardedCounter(f"banco {_id}: {name}")
+            for name in (
+                "nacional_transactions", "internacional_transactions", "bank_profit", "overdraft_interest",
+                "optimistic_commits", "optimistic_conflicts", "optimistic_fallbacks",
+            )
+        }
+        self.latencies = Histogram()
+        self.successful_transactions = 0
+        self.latencies_lock = make_lock(f"banco {_id}: latencies_lock")
+        self.classes = ClassStats(f"banco {_id}: estatísticas por classe")
+
+        # identificadores das transações submetidas em lote (submit_batch())
+        self._transaction_ids = count(config.first_transaction_id)
+
 
     def new_account(self, balance: int = 0, overdraft_limit: int = 0) -> None:
         """
@@ -81,6 +189,11 @@ class Bank:
         """
         # TODO: IMPLEMENTE AS MODIFICAÇÕES, SE NECESSÁRIAS, NESTE MÉTODO!
 
+        # No ledger compacto, a conta é apenas uma nova posição nos arrays
+        if isinstance(self.accounts, AccountLedger):
+            self.accounts.add(balance, overdraft_limit)
+            return
+
         # Gera _id para a nova Account (1a conta de usuários: id = 7)
         acc_id = len(self.accounts) + 1
 
@@ -96,6 +209,228 @@ class Bank:
         # Adiciona a Account criada na lista de contas do banco
         self.accounts.append(acc)
 
+    def count_national(self, n: int = 1) -> None:
+        """
+        Soma `n` ao contador de transações nacionais do banco.
+        """
+        self.counters["nacional_transactions"].add(n)
+
+    def count_international(self, n: int = 1) -> None:
+        """
+        Soma `n` ao contador de transações internacionais do banco.
+        """
+        self.counters["internacional_transactions"].add(n)
+
+    def add_profit(self, amount: int) -> None:
+        """
+        Soma `amount` (taxas de câmbio) ao lucro do banco.
+        """
+        self.counters["bank_profit"].add(amount)
+
+    def add_overdraft_interest(self, amount: int) -> None:
+        """
+        Soma `amount` de juros de cheque especial ao lucro do banco. Negativo em caso de estorno.
+        """
+        self.counters["bank_profit"].add(amount)
+        self.counters["overdraft_interest"].add(amount)
+
+    def record_completed(self, latencies: List[float], successful: int) -> None:
+        """
+        Registra os tempos de processamento (em segundos) de transações finalizadas do banco, das
+        quais `successful` foram finalizadas com sucesso.
+        """
+        with self.latencies_lock:
+            self.latencies.extend(latencies)
+            self.successful_transactions += successful
+
+    def record_optimistic(self, commits: int, conflicts: int, fallbacks: int) -> None:
+        """
+        Soma `commits` grupos confirmados, `conflicts` conflitos e `fallbacks` grupos feitos com os
+        locks mantidos aos contadores do modo otimista das transferências nacionais.
+        """
+        self.counters["optimistic_commits"].add(commits)
+        self.counters["optimistic_conflicts"].add(conflicts)
+        self.counters["optimistic_fallbacks"].add(fallbacks)
+
+    def prepare_batch(self, batch: TransferBatch) -> Tuple[List[Transaction], List[Rejection]]:
+        """
+        Valida `batch` contra as contas de todos os bancos (ver validate_transfers()), recusando as
+        transferências com origem em outro banco, e cria as transações das transferências válidas.
+        Retorna as transações, na ordem do lote, e as transferências recusadas.
+        """
+        valid, rejected = validate_transfers(
+            batch, [len(bank.accounts) for bank in config.banks], origin_bank=self._id
+        )
+        transactions = [
+            Transaction(next(self._transaction_ids), origin, destination, amount, currency=currency)
+            for origin, destination, amount, currency in batch.take(valid).rows()
+        ]
+        return transactions, rejected
+
+    def submit_batch(
+        self, batch: TransferBatch, block: bool = True, timeout: Optional[float] = None
+    ) -> Tuple[int, List[Rejection]]:
+        """
+        Valida `batch` (ver prepare_batch()) e enfileira as transferências válidas de uma só vez
+        (ver TransactionQueue.put_batch()), registrando-as no journal e no trace. Retorna quantas
+        foram enfileiradas e as recusadas na validação; se a fila for fechada (ou `timeout` expirar),
+        as últimas transferências válidas não são enfileiradas.
+        """
+        transactions, rejected = self.prepare_batch(batch)
+        enqueued = self.transaction_queue.put_batch(transactions, block, timeout)
+        for transaction in transactions[:enqueued]:
+            submit_transaction(transaction)
+        return enqueued, rejected
+
+    def money_totals(self) -> Dict[Currency, int]:
+        """
+        Retorna, por moeda, a soma dos saldos das contas dos clientes, das reservas e dos juros de
+        cheque especial cobrados (que saem das contas, mas continuam sendo dinheiro do sistema).
+        Somados entre todos os bancos, esses totais não mudam durante a simulação.
+        Deve ser chamado com o banco parado.
+        """
+        totals = {currency: getattr(self.reserves, currency.name).balance for currency in Currency}
+        if isinstance(self.accounts, AccountLedger):
+            totals[self.currency] += self.accounts.total_balance()
+        else:
+            totals[self.currency] += sum(acc.balance for acc in self.accounts)
+        totals[self.currency] += self.overdraft_interest
+        return totals
+
+    def export_state(self) -> dict:
+        """
+        Retorna um dicionário com tudo que é necessário para reconstruir o estado do banco
+        em outro processo: saldos das reservas e das contas, contadores, lucro e estatísticas da fila.
+        Deve ser chamado com o banco parado.
+        """
+        return {
+            "_id": self._id,
+            "currency": self.currency.value,
+            "reserves": {currency.name: getattr(self.reserves, currency.name).balance for currency in Currency},
+            "n_accounts": len(self.accounts),
+            "accounts": (
+                self.accounts.export()
+                if isinstance(self.accounts, AccountLedger)
+                else [(acc.balance, acc.overdraft_limit) for acc in self.accounts]
+            ),
+            "nacional_transactions": self.nacional_transactions,
+            "internacional_transactions": self.internacional_transactions,
+            "bank_profit": self.bank_profit,
+            "overdraft_interest": self.overdraft_interest,
+            "latencies": self.latencies.export(),
+            "successful_transactions": self.successful_transactions,
+            "optimistic": [self.optimistic_commits, self.optimistic_conflicts, self.optimistic_fallbacks],
+            "latency": self.latency.export(),
+            "classes": self.classes.export(),
+            "queue": self.transaction_queue.stats(),
+            "queue_wait": self.transaction_queue.wait_histogram.export(),
+            "pending": self.transaction_queue.pending(),
+        }
+
+    def load_state(self, state: dict) -> None:
+        """
+        Substitui o estado do banco pelo de `state` (gerado por export_state() de um banco com o
+        mesmo tipo de armazenamento de contas). As contas são recriadas caso o banco ainda não tenha
+        a mesma quantidade de contas de `state`.
+        Deve ser chamado com o banco parado.
+        """
+        for currency in Currency:
+            getattr(self.reserves, currency.name).balance = state["reserves"][currency.name]
+
+        if isinstance(self.accounts, AccountLedger):
+            self.accounts.load(state["accounts"])
+        elif len(self.accounts) != len(state["accounts"]):
+            self.accounts = []
+            for balance, overdraft_limit in state["accounts"]:
+                self.new_account(balance=balance, overdraft_limit=overdraft_limit)
+        else:
+            for acc, (balance, overdraft_limit) in zip(self.accounts, state["accounts"]):
+                acc.balance = balance
+                acc.overdraft_limit = overdraft_limit
+
+        self.nacional_transactions = state["nacional_transactions"]
+        self.internacional_transactions = state["internacional_transactions"]
+        self.bank_profit = state["bank_profit"]
+        self.overdraft_interest = state["overdraft_interest"]
+        if "queue" in state:
+            self.latencies = Histogram.load(state["latencies"])
+            self.successful_transactions = state["successful_transactions"]
+            self.optimistic_commits, self.optimistic_conflicts, self.optimistic_fallbacks = state["optimistic"]
+            self.latency.load(state["latency"])
+            self.classes.load(state["classes"])
+            self.transaction_queue.load_stats(state["queue"], state["pending"])
+            self.transaction_queue.wait_histogram = Histogram.load(state["queue_wait"])
+
+    def metrics(self) -> List[Metric]:
+        """
+        Retorna as métricas do banco (ver utils.metrics), lidas dos contadores que os processadores,
+        o gerador e a fila já mantêm; pode ser chamado com o banco em operação.
+        """
+        bank = {"bank": str(self._id)}
+        currency = dict(bank, currency=self.currency.name)
+        completed = len(self.latencies)
+        queue = self.transaction_queue
+        metrics = [
+            counter(
+                "bank_transactions_total", "Transferências realizadas pelo banco, por tipo",
+                dict(bank, kind="national"), self.nacional_transactions,
+            ),
+            counter(
+                "bank_transactions_total", "Transferências realizadas pelo banco, por tipo",
+                dict(bank, kind="international"), self.internacional_transactions,
+            ),
+            counter(
+                "bank_transactions_completed_total", "Transações finalizadas, por status",
+                dict(bank, status="successful"), self.successful_transactions,
+            ),
+            counter(
+                "bank_transactions_completed_total", "Transações finalizadas, por status",
+                dict(bank, status="failed"), completed - self.successful_transactions,
+            ),
+            counter("bank_transactions_enqueued_total", "Transações geradas e enfileiradas", bank, queue.enqueued),
+            counter("bank_transactions_rejected_total", "Transações recusadas pela fila", bank, queue.rejected),
+            counter(
+                "bank_optimistic_attempts_total", "Tentativas otimistas de transferências nacionais, por resultado",
+                dict(bank, result="commit"), self.optimistic_commits,
+            ),
+            counter(
+                "bank_optimistic_attempts_total", "Tentativas otimistas de transferências nacionais, por resultado",
+                dict(bank, result="conflict"), self.optimistic_conflicts,
+            ),
+            counter(
+                "bank_optimistic_fallbacks_total", "Grupos de transferências nacionais que recorreram aos locks",
+                bank, self.optimistic_fallbacks,
+            ),
+            gauge("bank_profit", "Lucro do banco (unidades mínimas da moeda)", currency, self.bank_profit),
+            gauge(
+                "bank_overdraft_interest", "Juros de cheque especial cobrados (unidades mínimas da moeda)",
+                currency, self.overdraft_interest,
+            ),
+            gauge("bank_queue_depth", "Transações esperando na fila", bank, len(queue)),
+            gauge("bank_queue_max_depth", "Maior tamanho atingido pela fila", bank, queue.max_depth),
+            gauge("bank_payment_processors", "PaymentProcessors ativos", bank, len(self.payment_processors)),
+        ]
+        if queue.priority:
+            depths = queue.class_depths()
+            for spec, latencies, expired, depth in zip(PRIORITY_CLASSES, self.classes.latencies, self.classes.expired, depths):
+                labels = dict(bank, priority_class=spec.name)
+                metrics.append(counter(
+                    "bank_class_transactions_completed_total", "Transações finalizadas, por classe de prioridade",
+                    labels, len(latencies),
+                ))
+                metrics.append(counter(
+                    "bank_class_transactions_expired_total", "Transações que falharam por prazo vencido, por classe",
+                    labels, expired,
+                ))
+                metrics.append(gauge("bank_class_queue_depth", "Transações esperando na fila, por classe", labels, depth))
+        histograms = self.latency.histograms
+        for name, _, _ in SEGMENTS:
+            metrics.append(histogram(
+                "bank_transaction_stage_seconds", "Tempo das transações em cada etapa do processamento",
+                dict(bank, stage=name), WAIT_BUCKETS, histograms[name][:-1], histograms[name][-1],
+            ))
+        return metrics
+
     def info(self) -> None:
         """
         Essa função deverá printar os seguintes dados utilizando o LOGGER fornecido:
@@ -106,10 +441,10 @@ class Bank:
         5. Lucro do banco: taxas de câmbio acumuladas + juros de cheque especial acumulados
         """
         # TODO: IMPLEMENTE AS MODIFICAÇÕES, SE NECESSÁRIAS, NESTE MÉTODO!
-        print("---" * 30)
+        LOGGER.info("---" * 30)
         LOGGER.info(f"Estatísticas do Banco Nacional {self._id}:\n")
         
-        LOGGER.info(" - Saldo de cada moeda nas reservas:")
+        LOGGER.info(f" - Saldo de cada moeda nas reservas ({len(self.reserves.USD.stripes)} subconta(s) por moeda):")
         LOGGER.info(f"   > USD = {self.reserves.USD.balance}")
         LOGGER.info(f"   > EUR = {self.reserves.EUR.balance}")
         LOGGER.info(f"   > GBP = {self.reserves.GBP.balance}")
@@ -120,13 +455,38 @@ class Bank:
         LOGGER.info(f" - Número de transferências nacionais: {self.nacional_transactions}\n")
         
         LOGGER.info(f" - Número de transferências internacionais: {self.internacional_transactions}\n")
+
+        attempts = self.optimistic_commits + self.optimistic_conflicts
+        if attempts:
+            LOGGER.info(
+                f" - Transferências nacionais otimistas: {self.optimistic_commits} grupos confirmados, "
+                f"{self.optimistic_conflicts} conflitos ({self.optimistic_conflicts / attempts:.1%} das tentativas), "
+                f"{self.optimistic_fallbacks} com locks mantidos\n"
+            )
         
         LOGGER.info(f" - Número de contas bancárias no banco: {len(self.accounts)}\n")
+
+        LOGGER.info(f" - Número de PaymentProcessors ao final: {len(self.payment_processors)}\n")
         
         LOGGER.info(f" - Saldo total das contas no banco:")
-        for conta in self.accounts:
-            LOGGER.info(f"   > Conta {conta._id}: {conta.balance}")
+        if isinstance(self.accounts, AccountLedger):
+            # com milhões de contas, apenas o total é printado
+            LOGGER.info(f"   > Total: {self.accounts.total_balance()}")
+        else:
+            for conta in self.accounts:
+                LOGGER.info(f"   > Conta {conta._id}: {conta.balance}")
         LOGGER.info("\n")
         
         LOGGER.info(f"Lucro do banco: {self.bank_profit}\n")
 
+        queue_stats = self.transaction_queue.stats()
+        LOGGER.info(" - Fila de transações:")
+        LOGGER.info(f"   > Tamanho atual = {queue_stats['depth']} (capacidade = {self.transaction_queue.capacity or 'ilimitada'})")
+        LOGGER.info(f"   > Tamanho máximo atingido = {queue_stats['max_depth']}")
+        LOGGER.info(f"   > Enfileiradas = {queue_stats['enqueued']}, processadas = {queue_stats['dequeued']}, recusadas = {queue_stats['rejected']}")
+        LOGGER.info(f"   > Tempo médio na fila = {queue_stats['mean_queue_wait']:.4f}s")
+        LOGGER.info(f"   > Tempo total de bloqueio dos geradores = {queue_stats['put_wait_time']:.4f}s\n")
+
+        self.latency.report()
+        self.classes.report()
+
@@ -0,0 +1,214 @@
+import csv
+import json
+from array import array
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.currency import Currency
+
+
+# Colunas de um arquivo de transferências (CSV com cabeçalho ou JSONL com um objeto por linha).
+# A moeda, pelo nome (ex.: "USD"), é opcional: sem ela, vale a moeda do banco de destino.
+INGEST_COLUMNS = ["origin_bank", "origin_account", "destination_bank", "destination_account", "amount", "currency"]
+
+# (linha do arquivo ou posição no lote, motivo da recusa)
+Rejection = Tuple[int, str]
+
+# Limites dos campos numéricos nas colunas de TransferBatch (arrays "i" e "q")
+_INT32 = (-2 ** 31, 2 ** 31 - 1)
+_INT64 = (-2 ** 63, 2 ** 63 - 1)
+
+
+class TransferBatch:
+    """
+    Uma classe para representar um lote de transferências em colunas (um array por campo), para que
+    lotes com milhares de transferências sejam lidos, validados e divididos sem criar um objeto por
+    transferência.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    origin_bank, origin_account : array
+        Banco e conta de origem de cada transferência.
+    destination_bank, destination_account : array
+        Banco e conta de destino de cada transferência.
+    amount : array
+        Valor de cada transferência (em unidades mínimas da moeda).
+    currency : array
+        Moeda (Currency.value) de cada transferência.
+    lines : array
+        Linha do arquivo de onde veio cada transferência (ou sua posição, se não veio de um arquivo).
+
+    Métodos
+    -------
+    append(origin: Tuple[int, int], destination: Tuple[int, int], amount: int, currency: Optional[Currency] = None, line: Optional[int] = None) -> None:
+        Adiciona uma transferência ao final do lote.
+    take(indices: Iterable[int]) -> TransferBatch:
+        Retorna um novo lote com as transferências nas posições `indices`.
+    slice(start: int, stop: int) -> TransferBatch:
+        Retorna um novo lote com as transferências de `start` a `stop` (exclusive).
+    rows() -> Iterator[tuple]:
+        Itera sobre as transferências como tuplas (origem, destino, valor, moeda).
+    """
+
+    _COLUMNS = ("origin_bank", "origin_account", "destination_bank", "destination_account", "amount", "currency", "lines")
+    _TYPECODES = ("i", "q", "i", "q", "q", "b", "q")
+
+    def __init__(self):
+        for column, typecode in zip(self._COLUMNS, self._TYPECODES):
+            setattr(self, column, array(typecode))
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def append(
+        self,
+        origin: Tuple[int, int],
+        destination: Tuple[int, int],
+        amount: int,
+        currency: Optional[Currency] = None,
+        line: Optional[int] = None,
+    ) -> None:
+        # mesma moeda padrão do gerador aleatório (a do banco de destino)
+        currency = Currency(destination[0] + 1) if currency is None else currency
+        self.origin_bank.append(origin[0])
+        self.origin_account.append(origin[1])
+        self.destination_bank.append(destination[0])
+        self.destination_account.append(destination[1])
+        self.amount.append(amount)
+        self.currency.append(currency.value)
+        self.lines.append(len(self.lines) if line is None else line)
+
+    def take(self, indices: Iterable[int]) -> "TransferBatch":
+        indices = list(indices)
+        batch = TransferBatch()
+        for column, typecode in zip(self._COLUMNS, self._TYPECODES):
+            values = getattr(self, column)
+            setattr(batch, column, array(typecode, [values[i] for i in indices]))
+        return batch
+
+    def slice(self, start: int, stop: int) -> "TransferBatch":
+        batch = TransferBatch()
+        for column in self._COLUMNS:
+            setattr(batch, column, getattr(self, column)[start:stop])
+        return batch
+
+    def rows(self) -> Iterator[tuple]:
+        for origin_bank, origin_acc, destiny_bank, destiny_acc, amount, currency in zip(
+            self.origin_bank, self.origin_account, self.destination_bank, self.destination_account,
+            self.amount, self.currency,
+        ):
+            yield (origin_bank, origin_acc), (destiny_bank, destiny_acc), amount, Currency(currency)
+
+
+def _field(row: dict, column: str, limits: Tuple[int, int]) -> int:
+    value = int(row[column])
+    if not limits[0] <= value <= limits[1]:
+        raise OverflowError(f"{column} fora do intervalo: {value}")
+    return value
+
+
+def _parse_row(row: dict) -> tuple:
+    """
+    Converte uma linha lida em (origem, destino, valor, moeda). Os números são verificados contra os
+    limites das colunas de TransferBatch antes de qualquer append(), para que uma linha recusada
+    nunca deixe o lote com colunas de tamanhos diferentes.
+    """
+    if not isinstance(row, dict):
+        raise TypeError("a linha não é um objeto")
+    currency = row.get("currency")
+    return (
+        (_field(row, "origin_bank", _INT32), _field(row, "origin_account", _INT64)),
+        (_field(row, "destination_bank", _INT32), _field(row, "destination_account", _INT64)),
+        _field(row, "amount", _INT64),
+        Currency[currency] if currency else None,
+    )
+
+
+def _read_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    with open(path, newline="") as file:
+        if path.endswith(".csv"):
+            # linha 1 é o cabeçalho
+            yield from enumerate(csv.DictReader(file), start=2)
+            return
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    yield line, {}
+
+
+def read_transfers(path: str) -> Tuple[TransferBatch, List[Rejection]]:
+    """
+    Lê as transferências de `path` (.csv ou JSONL, com as colunas de INGEST_COLUMNS). Linhas
+    malformadas (JSON que não é um objeto, campos ausentes, números ou moedas inválidos) e números
+    fora dos limites das colunas são recusadas já na leitura.
+    Retorna o lote com as linhas lidas e as linhas recusadas.
+    """
+    batch = TransferBatch()
+    rejected: List[Rejection] = []
+    for line, row in _read_rows(path):
+        try:
+            origin, destination, amount, currency = _parse_row(row)
+        except OverflowError:
+            rejected.append((line, "número fora do intervalo"))
+            continue
+        except (KeyError, ValueError, TypeError):
+            rejected.append((line, "linha malformada"))
+            continue
+        batch.append(origin, destination, amount, currency, line)
+    return batch, rejected
+
+
+def validate_transfers(
+    batch: TransferBatch, account_counts: List[int], origin_bank: Optional[int] = None
+) -> Tuple[List[int], List[Rejection]]:
+    """
+    Valida `batch` coluna por coluna: bancos existentes (dentre len(`account_counts`)), contas
+    existentes (de 1 à quantidade de contas do banco), valores positivos e, se `origin_bank` não for
+    None, a origem no banco `origin_bank`. Cada verificação é uma única passada sobre as colunas
+    envolvidas, sem criar objetos por transferência.
+    Retorna as posições das transferências válidas e as recusadas, com o motivo da primeira
+    verificação em que falharam.
+    """
+    n_banks = len(account_counts)
+    origin_ok = [0 <= bank < n_banks for bank in batch.origin_bank]
+    destination_ok = [0 <= bank < n_banks for bank in batch.destination_bank]
+    checks = [
+        ("banco de origem inexistente", origin_ok),
+        ("banco de destino inexistente", destination_ok),
+        (
+            "conta de origem inexistente",
+            [ok and 1 <= acc <= account_counts[bank] for ok, bank, acc in zip(origin_ok, batch.origin_bank, batch.origin_account)],
+        ),
+        (
+            "conta de destino inexistente",
+            [ok and 1 <= acc <= account_counts[bank] for ok, bank, acc in zip(destination_ok, batch.destination_bank, batch.destination_account)],
+        ),
+        ("valor não positivo", [amount > 0 for amount in batch.amount]),
+    ]
+    if origin_bank is not None:
+        checks.append((f"origem fora do banco {origin_bank}", [bank == origin_bank for bank in batch.origin_bank]))
+
+    valid = bytearray(b"\x01") * len(batch)
+    rejected: List[Rejection] = []
+    for reason, passed in checks:
+        failed = [i for i in compress(range(len(batch)), valid) if not passed[i]]
+        for i in failed:
+            valid[i] = 0
+            rejected.append((batch.lines[i], reason))
+    rejected.sort()
+    return list(compress(range(len(batch)), valid)), rejected
+
+
+def split_by_origin(batch: TransferBatch) -> Dict[int, TransferBatch]:
+    """
+    Divide `batch` em um lote por banco de origem, preservando a ordem das transferências.
+    """
+    positions: Dict[int, List[int]] = {}
+    for i, bank in enumerate(batch.origin_bank):
+        positions.setdefault(bank, []).append(i)
+    return {bank: batch.take(indices) for bank, indices in positions.items()}
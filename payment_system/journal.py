@@ -0,0 +1,365 @@
+import glob
+import os
+import struct
+import zlib
+from array import array
+from collections import Counter
+from threading import Condition, Thread
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.currency import Currency
+from utils.logger import LOGGER
+from utils.transaction import Transaction, TransactionStatus
+
+
+# Tipos de registro do journal
+GENESIS = 1     # estado completo de um banco (contas, reservas e contadores)
+PENDING = 2     # transação enfileirada
+DONE = 3        # transação finalizada (SUCCESSFUL/FAILED), com os lançamentos que ela aplicou
+
+# Tipos de lançamento (posting) de um registro DONE: (tipo, banco, chave, delta)
+ACCOUNT = 0     # saldo da conta `chave` do banco
+RESERVE = 1     # reserva do banco na moeda de valor `chave`
+PROFIT = 2      # taxas de câmbio somadas ao lucro do banco
+INTEREST = 3    # juros de cheque especial (somados ao lucro e ao total de juros do banco)
+
+Posting = Tuple[int, int, int, int]
+
+# Marcas de um registro DONE
+EXPIRED = 1     # a transação falhou por prazo vencido na fila, sem ser executada nem contada
+
+# Cada registro é: tamanho do conteúdo, tipo, conteúdo e CRC32 de tipo + conteúdo
+_HEADER = struct.Struct("<IB")
+_CRC = struct.Struct("<I")
+_GENESIS = struct.Struct("<iiq6qqqqq")
+_PENDING = struct.Struct("<qiiiiqB")
+_DONE = struct.Struct("<qiiiiqBBiH")
+_POSTING = struct.Struct("<Biiq")
+
+
+def _record(kind: int, payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload), kind) + payload + _CRC.pack(zlib.crc32(bytes([kind]) + payload))
+
+
+def encode_genesis(state: dict) -> bytes:
+    """
+    Codifica o estado de um banco (gerado por Bank.export_state()) como registro GENESIS.
+    """
+    accounts = state["accounts"]
+    if isinstance(accounts, tuple):
+        balances, overdraft_limits = accounts
+    else:
+        balances = array("q", (balance for balance, _ in accounts))
+        overdraft_limits = array("q", (overdraft_limit for _, overdraft_limit in accounts))
+    header = _GENESIS.pack(
+        state["_id"],
+        state["currency"],
+        len(balances),
+        *(state["reserves"][currency.name] for currency in Currency),
+        state["nacional_transactions"],
+        state["internacional_transactions"],
+        state["bank_profit"],
+        state["overdraft_interest"],
+    )
+    return _record(GENESIS, header + array("q", balances).tobytes() + array("q", overdraft_limits).tobytes())
+
+
+def encode_pending(transaction: Transaction) -> bytes:
+    return _record(PENDING, _PENDING.pack(
+        transaction._id, *transaction.origin, *transaction.destination, transaction.amount,
+        transaction.currency.value,
+    ))
+
+
+def encode_done(
+    transaction: Transaction,
+    status: TransactionStatus,
+    postings: List[Posting],
+    rate_version: Optional[int] = None,
+    flags: int = 0,
+) -> bytes:
+    """
+    Codifica o registro DONE de `transaction`, com a versão da tabela de câmbio usada (None se ela
+    não envolveu câmbio) e as marcas `flags` (ex.: EXPIRED).
+    """
+    rate_version = -1 if rate_version is None else rate_version
+    payload = _DONE.pack(
+        transaction._id, *transaction.origin, *transaction.destination, transaction.amount,
+        status.value, flags, rate_version, len(postings),
+    )
+    return _record(DONE, payload + b"".join(_POSTING.pack(*posting) for posting in postings))
+
+
+def read_records(path: str) -> Iterator[Tuple[int, bytes, int]]:
+    """
+    Lê os registros válidos de um arquivo do journal, retornando (tipo, conteúdo, fim do registro).
+    A leitura para no primeiro registro incompleto ou corrompido (escrita interrompida por uma queda).
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        size, kind = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        end = start + size + _CRC.size
+        if end > len(data):
+            return
+        payload = data[start:start + size]
+        if _CRC.unpack_from(data, start + size)[0] != zlib.crc32(bytes([kind]) + payload):
+            return
+        offset = end
+        yield kind, payload, offset
+
+
+def decode_done(payload: bytes) -> Tuple[tuple, List[Posting]]:
+    """
+    Retorna os campos (id, banco e conta de origem, banco e conta de destino, valor, status, marcas,
+    versão da tabela de câmbio) e os lançamentos de um registro DONE.
+    """
+    fields = _DONE.unpack_from(payload)
+    postings = [
+        _POSTING.unpack_from(payload, _DONE.size + i * _POSTING.size) for i in range(fields[-1])
+    ]
+    return fields[:-1], postings
+
+
+def _decode_genesis(payload: bytes) -> dict:
+    fields = _GENESIS.unpack_from(payload)
+    bank_id, currency, n_accounts = fields[:3]
+    reserves = fields[3:9]
+    nacional, internacional, profit, interest = fields[9:]
+    balances = array("q")
+    balances.frombytes(payload[_GENESIS.size:_GENESIS.size + 8 * n_accounts])
+    overdraft_limits = array("q")
+    overdraft_limits.frombytes(payload[_GENESIS.size + 8 * n_accounts:])
+    return {
+        "_id": bank_id,
+        "currency": currency,
+        "reserves": {c.name: balance for c, balance in zip(Currency, reserves)},
+        "n_accounts": n_accounts,
+        "accounts": (balances, overdraft_limits),
+        "nacional_transactions": nacional,
+        "internacional_transactions": internacional,
+        "bank_profit": profit,
+        "overdraft_interest": interest,
+    }
+
+
+def journal_files(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, "*.wal")))
+
+
+def recover(directory: str, ledger: bool = False) -> Tuple[List[dict], dict]:
+    """
+    Reconstrói, a partir dos arquivos do journal em `directory`, o estado de todos os bancos: parte
+    dos registros GENESIS e aplica os lançamentos de todos os registros DONE (em qualquer ordem, já
+    que são somas). Retorna os estados, no formato de Bank.export_state() (contas como lista de
+    tuplas, ou arrays se `ledger`), e um resumo da recuperação, com o identificador a partir do qual
+    as transações da próxima execução devem ser numeradas (`next_id`), para que os registros PENDING
+    e DONE de execuções diferentes nunca se confundam.
+    """
+    states: Dict[int, dict] = {}
+    done: List[Tuple[tuple, List[Posting]]] = []
+    pending: Counter = Counter()
+    next_id = 0
+    for path in journal_files(directory):
+        for kind, payload, _ in read_records(path):
+            if kind == GENESIS:
+                state = _decode_genesis(payload)
+                states[state["_id"]] = state
+            elif kind == PENDING:
+                fields = _PENDING.unpack_from(payload)
+                pending[(fields[1], fields[0])] += 1
+                next_id = max(next_id, fields[0] + 1)
+            elif kind == DONE:
+                fields, postings = decode_done(payload)
+                pending[(fields[1], fields[0])] -= 1
+                next_id = max(next_id, fields[0] + 1)
+                done.append((fields, postings))
+
+    reserve_names = {currency.value: currency.name for currency in Currency}
+    successful = 0
+    for (_id, origin_bank, origin_acc, destiny_bank, destiny_acc, _, status, flags, _), postings in done:
+        # os contadores seguem as mesmas regras de TransactionExecutor.execute_batch(): transações
+        # vencidas na fila e transferências para a própria conta não são contadas
+        if flags & EXPIRED:
+            pass
+        elif origin_bank == destiny_bank:
+            if origin_acc != destiny_acc:
+                states[origin_bank]["nacional_transactions"] += 1
+        else:
+            states[origin_bank]["internacional_transactions"] += 1
+            states[destiny_bank]["internacional_transactions"] += 1
+        if status == TransactionStatus.SUCCESSFUL.value:
+            successful += 1
+
+        for kind, bank_id, key, delta in postings:
+            state = states[bank_id]
+            if kind == ACCOUNT:
+                state["accounts"][0][key - 1] += delta
+            elif kind == RESERVE:
+                state["reserves"][reserve_names[key]] += delta
+            elif kind == PROFIT:
+                state["bank_profit"] += delta
+            elif kind == INTEREST:
+                state["bank_profit"] += delta
+                state["overdraft_interest"] += delta
+
+    if not ledger:
+        for state in states.values():
+            state["accounts"] = list(zip(*state["accounts"]))
+    summary = {
+        "done": len(done),
+        "successful": successful,
+        "pending": sum(count for count in pending.values() if count > 0),
+        "next_id": next_id,
+    }
+    return [states[bank_id] for bank_id in sorted(states)], summary
+
+
+class Journal:
+    """
+    Uma classe para escrever o journal (write-ahead log) binário e append-only das transações.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    append() apenas copia os registros para um buffer em memória; uma thread escritora grava o
+    buffer inteiro com um único write() e um único fsync() (group commit): enquanto um fsync está
+    em andamento, os registros de todos os processadores se acumulam para o próximo. Quem precisa
+    de durabilidade (ex.: antes de confirmar o status de uma transação) espera com wait() pelo
+    número de sequência retornado por append().
+
+    Ordem dos registros DONE: os processadores adicionam o registro de uma transação antes que os
+    seus créditos fiquem visíveis para outros processadores (nas nacionais, com as duas contas ainda
+    travadas; nas internacionais, entre o prepare e o commit). Como a gravação preserva a ordem de
+    append(), o registro de uma transação que usou um valor creditado por outra sempre vem depois
+    do registro desta, e um prefixo do journal nunca contém um crédito sem o registro de quem o
+    originou. Os débitos podem ser vistos antes do registro (ex.: uma transação que falha por falta
+    de saldo): isso só torna as transações seguintes mais conservadoras e nunca quebra a
+    conservação do dinheiro na recuperação.
+
+    ...
+
+    Atributos
+    ---------
+    path : str
+        Caminho do arquivo do journal.
+    fsync : bool
+        Se os dados devem ser sincronizados com o disco a cada escrita.
+    appended : int
+        Quantidade de chamadas de append().
+    commits : int
+        Quantidade de escritas (e fsyncs) realizadas.
+    written_bytes : int
+        Quantidade de bytes gravados.
+
+    Métodos
+    -------
+    append(data: bytes) -> int:
+        Adiciona registros codificados ao journal e retorna seu número de sequência.
+    wait(seq: int) -> None:
+        Espera até que os registros de número de sequência `seq` estejam gravados.
+    is_durable(seq: int) -> bool:
+        Retorna se os registros de número de sequência `seq` já estão gravados.
+    close() -> None:
+        Grava os registros pendentes e fecha o arquivo.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self.appended = 0
+        self.commits = 0
+        self.written_bytes = 0
+
+        # descarta o final de um registro interrompido por uma queda antes de continuar o arquivo
+        valid = 0
+        if os.path.exists(path):
+            for _, _, valid in read_records(path):
+                pass
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        os.ftruncate(self._fd, valid)
+        os.lseek(self._fd, valid, os.SEEK_SET)
+
+        self._buffer: List[bytes] = []
+        self._seq = 0
+        self._durable = 0
+        self._closed = False
+        self._cond = Condition()
+        self._writer = Thread(target=self._run, name="JournalWriter", daemon=True)
+        self._writer.start()
+
+    def append(self, data: bytes) -> int:
+        with self._cond:
+            self._buffer.append(data)
+            self._seq += 1
+            self.appended += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def wait(self, seq: int) -> None:
+        with self._cond:
+            while self._durable < seq and not self._closed:
+                self._cond.wait()
+
+    def is_durable(self, seq: int) -> bool:
+        return self._durable >= seq
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                buffer, self._buffer = self._buffer, []
+                seq = self._seq
+
+            data = b"".join(buffer)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            if self.fsync:
+                os.fsync(self._fd)
+
+            with self._cond:
+                self.commits += 1
+                self.written_bytes += len(data)
+                self._durable = seq
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        os.close(self._fd)
+        LOGGER.info(
+            f"Journal {self.path}: {self.appended} append(s) em {self.commits} escrita(s) "
+            f"({self.written_bytes} bytes)"
+        )
+
+
+# Journal do processo (None = desativado)
+_journal: Optional[Journal] = None
+
+
+def open_journal(directory: str, name: str, fsync: bool = True) -> Journal:
+    """
+    Abre (ou continua) o arquivo `name`.wal do journal em `directory` como journal do processo.
+    Cada processo escreve no seu próprio arquivo.
+    """
+    global _journal
+    os.makedirs(directory, exist_ok=True)
+    _journal = Journal(os.path.join(directory, f"{name}.wal"), fsync=fsync)
+    return _journal
+
+
+def get_journal() -> Optional[Journal]:
+    return _journal
+
+
+def close_journal() -> None:
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
@@ -0,0 +1,168 @@
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from utils.lock_manager import WAIT_BUCKETS, WAIT_LABELS
+from utils.logger import LOGGER
+from utils.transaction import Transaction
+
+
+# Etapas de uma transação, na ordem em que acontecem (índices dos instantes registrados)
+ENQUEUED = 0    # entrou na fila do banco
+DEQUEUED = 1    # foi retirada da fila por um processador
+LOCKED = 2      # o processador obteve os locks da(s) conta(s) de origem (e destino, se nacional)
+MOVED = 3       # os valores foram movimentados (ou a transação falhou)
+COMPLETED = 4   # o status final foi registrado (após a latência simulada e o journal)
+STAGES = ("enqueued", "dequeued", "locked", "moved", "completed")
+
+# Intervalos medidos entre as etapas: (nome, etapa inicial, etapa final)
+SEGMENTS = (
+    ("fila", ENQUEUED, DEQUEUED),
+    ("espera por locks", DEQUEUED, LOCKED),
+    ("transferência", LOCKED, MOVED),
+    ("finalização", MOVED, COMPLETED),
+    ("total", ENQUEUED, COMPLETED),
+)
+
+
+class LatencyTracker:
+    """
+    Uma classe para medir, etapa por etapa, o tempo que as transações de um banco levam da fila
+    até a finalização.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Os instantes (time.monotonic()) de cada etapa ficam em uma estrutura à parte, indexada pelo id
+    da transação, então a Transaction não muda. Quando a transação é finalizada, a duração de cada
+    intervalo de SEGMENTS é somada a um histograma (faixas de WAIT_BUCKETS) e os instantes são
+    descartados (ou guardados em `records`, se `keep_records`). Etapas não registradas (ex.: uma
+    transação que não precisou de locks) deixam de fora apenas os intervalos que dependem delas.
+    Os instantes das transações em andamento são protegidos pelo mesmo lock em stamp() e complete();
+    os das que nunca foram finalizadas (ex.: ainda na fila ao fim da simulação) são descartados por
+    drain(), com os processadores já parados.
+
+    ...
+
+    Atributos
+    ---------
+    keep_records : bool
+        Se os instantes de cada transação finalizada devem ser guardados para exportação.
+    histograms : Dict[str, list]
+        Por intervalo, a quantidade de transações em cada faixa de WAIT_BUCKETS seguida do tempo total.
+    records : List[list]
+        Id seguido dos instantes de cada etapa das transações finalizadas (com `keep_records`).
+
+    Métodos
+    -------
+    stamp(transactions: Iterable[Transaction], stage: int, now: Optional[float] = None) -> None:
+        Registra o instante (atual, se omitido) da etapa `stage` das transações.
+    stamps(transactions: Iterable[Transaction], stage: int) -> List[Optional[float]]:
+        Retorna o instante registrado da etapa `stage` de cada transação (None se não registrado).
+    complete(transactions: Iterable[Transaction], now: Optional[float] = None) -> None:
+        Registra a finalização das transações e soma seus intervalos aos histogramas.
+    drain() -> int:
+        Descarta os instantes das transações não finalizadas e retorna quantas eram.
+    export() -> dict:
+        Retorna os histogramas e os registros (serializáveis).
+    load(state: dict) -> None:
+        Substitui os histogramas e os registros pelos de `state` (gerado por export()).
+    report() -> None:
+        Printa a média e o histograma de cada intervalo.
+    """
+
+    def __init__(self, keep_records: bool = False):
+        self.keep_records = keep_records
+        self.histograms: Dict[str, list] = {name: [0] * len(WAIT_BUCKETS) + [0.0] for name, _, _ in SEGMENTS}
+        self.records: List[list] = []
+        self._open: Dict[int, list] = {}
+        self._lock = Lock()
+
+    def stamp(self, transactions: Iterable[Transaction], stage: int, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for transaction in transactions:
+                entry = self._open.get(transaction._id)
+                if entry is None:
+                    entry = self._open[transaction._id] = [None] * len(STAGES)
+                entry[stage] = now
+
+    def stamps(self, transactions: Iterable[Transaction], stage: int) -> List[Optional[float]]:
+        with self._lock:
+            entries = [self._open.get(transaction._id) for transaction in transactions]
+        return [None if entry is None else entry[stage] for entry in entries]
+
+    def complete(self, transactions: Iterable[Transaction], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        finished = []
+        with self._lock:
+            for transaction in transactions:
+                entry = self._open.pop(transaction._id, None)
+                if entry is not None:
+                    entry[COMPLETED] = now
+                    finished.append((transaction._id, entry))
+
+        # as durações são calculadas fora do lock; só a soma nos histogramas é protegida
+        durations = [
+            (name, entry[end] - entry[start])
+            for _, entry in finished
+            for name, start, end in SEGMENTS
+            if entry[start] is not None and entry[end] is not None
+        ]
+        with self._lock:
+            for name, duration in durations:
+                histogram = self.histograms[name]
+                for i, limit in enumerate(WAIT_BUCKETS):
+                    if duration <= limit:
+                        histogram[i] += 1
+                        break
+                histogram[-1] += duration
+            if self.keep_records:
+                self.records.extend([transaction_id] + entry for transaction_id, entry in finished)
+
+    def drain(self) -> int:
+        with self._lock:
+            dropped = len(self._open)
+            self._open.clear()
+        return dropped
+
+    def export(self) -> dict:
+        with self._lock:
+            return {
+                "histograms": {name: list(histogram) for name, histogram in self.histograms.items()},
+                "records": list(self.records),
+            }
+
+    def load(self, state: dict) -> None:
+        with self._lock:
+            self.histograms = {name: list(histogram) for name, histogram in state["histograms"].items()}
+            self.records = list(state["records"])
+
+    def report(self) -> None:
+        LOGGER.info(f" - Latência das transações por etapa ({sum(self.histograms['total'][:-1])} finalizadas):")
+        for name, _, _ in SEGMENTS:
+            histogram = self.histograms[name]
+            count = sum(histogram[:-1])
+            if not count:
+                continue
+            buckets = ", ".join(f"{label}: {n}" for label, n in zip(WAIT_LABELS, histogram) if n)
+            LOGGER.info(f"   > {name}: média = {1000 * histogram[-1] / count:.3f}ms ({buckets})")
+        LOGGER.info("\n")
+
+
+def export_latency_records(path: str, banks: List) -> int:
+    """
+    Grava em `path` (CSV) os instantes de cada etapa e as durações dos intervalos das transações
+    finalizadas de todos os bancos (registradas com keep_records). Retorna a quantidade de linhas.
+    """
+    rows = 0
+    with open(path, "w") as file:
+        file.write(",".join(["bank", "transaction", *STAGES, *(name for name, _, _ in SEGMENTS)]) + "\n")
+        for bank in banks:
+            for transaction_id, *stamps in bank.latency.records:
+                durations = [
+                    "" if stamps[start] is None or stamps[end] is None else repr(stamps[end] - stamps[start])
+                    for _, start, end in SEGMENTS
+                ]
+                stamps = ["" if stamp is None else repr(stamp) for stamp in stamps]
+                file.write(",".join([str(bank._id), str(transaction_id), *stamps, *durations]) + "\n")
+                rows += 1
+    return rows
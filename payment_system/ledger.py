@@ -0,0 +1,162 @@
+from array import array
+from threading import Lock
+from typing import Iterator, List, Tuple
+
+from payment_system.account import Account
+from utils.currency import Currency
+from utils.lock_profiler import make_lock
+
+
+class LedgerAccount(Account):
+    """
+    Uma classe para representar uma conta bancária armazenada em um AccountLedger.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Objetos desta classe são apenas "visões" de uma posição do ledger, criadas sob demanda: o saldo
+    e o limite de cheque especial ficam nos arrays do ledger e o lock é o da faixa (stripe) da conta.
+    deposit(), withdraw() e info() são os mesmos de Account.
+
+    ...
+
+    Atributos
+    ---------
+    _id : int
+        Identificador da conta bancária.
+    _bank_id : int
+        Identificador do banco no qual a conta bancária foi criada.
+    currency : Currency
+        Moeda corrente da conta bancária.
+    balance : int
+        Saldo da conta bancária (lido e escrito no ledger).
+    overdraft_limit : int
+        Limite de cheque especial da conta bancária (lido e escrito no ledger).
+    lock_key : tuple
+        Chave global (bank_id, stripe + 1) do lock da faixa da conta; contas da mesma faixa
+        compartilham o lock e são travadas uma única vez pelo LOCK_MANAGER.
+    version : int
+        Versão do saldo da conta (lida e escrita no ledger).
+
+    Métodos
+    -------
+    lock(timeout: float = -1) -> bool:
+        Faz acquire no lock da faixa da conta.
+    unlock() -> None:
+        Faz release no lock da faixa da conta.
+    """
+
+    def __init__(self, ledger: "AccountLedger", index: int):
+        self._ledger = ledger
+        self._index = index
+        self._id = index + 1
+        self._bank_id = ledger.bank_id
+        self.currency = ledger.currency
+        self.lock_key = (ledger.bank_id, index % len(ledger.locks) + 1)
+
+    @property
+    def balance(self) -> int:
+        return self._ledger.balances[self._index]
+
+    @balance.setter
+    def balance(self, value: int) -> None:
+        self._ledger.balances[self._index] = value
+
+    @property
+    def version(self) -> int:
+        return self._ledger.versions[self._index]
+
+    @version.setter
+    def version(self, value: int) -> None:
+        self._ledger.versions[self._index] = value
+
+    @property
+    def overdraft_limit(self) -> int:
+        return self._ledger.overdraft_limits[self._index]
+
+    @overdraft_limit.setter
+    def overdraft_limit(self, value: int) -> None:
+        self._ledger.overdraft_limits[self._index] = value
+
+    def lock(self, timeout: float = -1) -> bool:
+        return self._ledger.locks[self._index % len(self._ledger.locks)].acquire(timeout=timeout)
+
+    def unlock(self):
+        self._ledger.locks[self._index % len(self._ledger.locks)].release()
+
+
+class AccountLedger:
+    """
+    Uma classe para armazenar as contas dos clientes de um banco em formato compacto (struct-of-arrays).
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Saldos e limites de cheque especial (inteiros, em unidades mínimas da moeda) ficam em arrays
+    tipados (8 bytes por valor) e os locks são compartilhados por faixas (a conta de índice i usa
+    locks[i % len(locks)]), de modo que milhões de contas custam poucos bytes cada. O ledger se comporta como a lista `Bank.accounts`:
+    ledger[i] e a iteração retornam LedgerAccounts.
+
+    ...
+
+    Atributos
+    ---------
+    bank_id : int
+        Identificador do banco dono das contas.
+    currency : Currency
+        Moeda corrente das contas.
+    balances : array
+        Saldos das contas.
+    overdraft_limits : array
+        Limites de cheque especial das contas.
+    versions : array
+        Versões dos saldos das contas (ver Account.version).
+    locks : List[Lock]
+        Locks das faixas de contas.
+
+    Métodos
+    -------
+    add(balance: int = 0, overdraft_limit: int = 0) -> None:
+        Adiciona uma conta ao final do ledger.
+    total_balance() -> int:
+        Retorna a soma dos saldos de todas as contas.
+    export() -> Tuple[array, array]:
+        Retorna cópias dos arrays de saldos e de limites (serializáveis).
+    load(arrays: Tuple[array, array]) -> None:
+        Substitui os saldos e limites pelos de `arrays` (gerados por export()).
+    """
+
+    def __init__(self, bank_id: int, currency: Currency, lock_stripes: int = 1024):
+        self.bank_id = bank_id
+        self.currency = currency
+        self.balances = array("q")
+        self.overdraft_limits = array("q")
+        self.versions = array("q")
+        self.locks: List[Lock] = [make_lock(f"banco {bank_id}: faixa {i} do ledger") for i in range(max(lock_stripes, 1))]
+
+    def __len__(self) -> int:
+        return len(self.balances)
+
+    def __getitem__(self, index: int) -> LedgerAccount:
+        if index < 0:
+            index += len(self.balances)
+        if not 0 <= index < len(self.balances):
+            raise IndexError("ledger index out of range")
+        return LedgerAccount(self, index)
+
+    def __iter__(self) -> Iterator[LedgerAccount]:
+        for index in range(len(self.balances)):
+            yield LedgerAccount(self, index)
+
+    def add(self, balance: int = 0, overdraft_limit: int = 0) -> None:
+        self.balances.append(balance)
+        self.overdraft_limits.append(overdraft_limit)
+        self.versions.append(0)
+
+    def total_balance(self) -> int:
+        return sum(self.balances)
+
+    def export(self) -> Tuple[array, array]:
+        return array("q", self.balances), array("q", self.overdraft_limits)
+
+    def load(self, arrays: Tuple[array, array]) -> None:
+        balances, overdraft_limits = arrays
+        self.balances = array("q", balances)
+        self.overdraft_limits = array("q", overdraft_limits)
+        self.versions = array("q", bytes(8 * len(self.balances)))
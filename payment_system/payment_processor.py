@@ -1,14 +1,455 @@
 import time
+from collections import Counter
 from threading import Thread
+from typing import Dict, List, Optional, Tuple
 
 from globals import *
+import globals as config
+from payment_system.account import Account, StripedReserve
 from payment_system.bank import Bank
+from payment_system.journal import ACCOUNT, EXPIRED, INTEREST, PROFIT, RESERVE, Posting, encode_done, get_journal
+from payment_system.latency import LOCKED, MOVED
+from payment_system.scheduler import expired
+from payment_system.settlement import get_settlement
 from utils.transaction import Transaction, TransactionStatus
-from utils.logger import LOGGER
-from utils.currency import get_exchange_rate
+from utils.logger import LOGGER, hot
+from utils.lock_manager import BLOCK, LOCK_MANAGER, LockTimeout
+from utils.currency import Currency
+from utils.exchange_rates import RATES, RateTable
+from utils.money import EXCHANGE_FEE_BPS, convert, fee
 
 
-class PaymentProcessor(Thread):
+# Tentativas otimistas de um grupo de transferências nacionais antes de recorrer aos locks mantidos
+OPTIMISTIC_RETRIES = 8
+
+
+class TransactionExecutor:
+    """
+    Uma classe com a lógica de negócio do processamento de transações de um banco, compartilhada
+    pelos processadores de pagamentos com threads (PaymentProcessor) e com asyncio
+    (AsyncPaymentProcessor). Nenhum método desta classe bloqueia esperando a latência simulada.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    _id : int
+        Identificador do processador de pagamentos.
+    bank: Bank
+        Banco sob o qual o processador de pagamentos operará.
+    journal_seq : int
+        Número de sequência, no journal, dos registros do último lote executado.
+
+    Métodos
+    -------
+    execute_batch(transactions: List[Transaction]) -> List[TransactionStatus]:
+        Executa um lote de transações e retorna seus status, sem alterar os status das transações.
+    complete_batch(transactions: List[Transaction], results: List[TransactionStatus]) -> None:
+        Registra os status finais de um lote e as latências (totais, por etapa e por classe) no banco.
+    """
+
+    def __init__(self, _id: int, bank: Bank):
+        self._id = _id
+        self.bank = bank
+        self.journal_seq = 0
+
+    def execute_batch(self, transactions: List[Transaction]) -> List[TransactionStatus]:
+        """
+        Executa um lote de transações. As transações são agrupadas pelo par (origem, destino):
+        os locks das contas de cada grupo são adquiridos uma única vez para o grupo inteiro e
+        os contadores e o lucro do banco são atualizados com uma única escrita cada. Todo o lote usa
+        a mesma tabela de câmbio, cuja versão é registrada no journal (registros DONE das internacionais).
+        Com o journal ativo, o resultado e os lançamentos de cada grupo são adicionados a ele antes que
+        os créditos do grupo fiquem visíveis para outros processadores (ver journal.py); cabe a quem
+        chama esperar que eles sejam gravados (journal_seq) antes de confirmar.
+        Com o escalonador "priority", as transações cujo prazo venceu na fila falham sem serem
+        executadas (ver scheduler.expired()).
+        Retorna os status resultantes, na mesma ordem de `transactions`; cabe a quem chama
+        simular a latência e registrar os status com complete_batch().
+        """
+        stale = expired(transactions, self.bank.latency)
+        groups: Dict[tuple, List[Transaction]] = {}
+        for transaction in transactions:
+            if hot():
+                LOGGER.info(
+                    f"PaymentProcessor {self._id} do Banco {self.bank._id} iniciando processamento da Transaction {transaction._id}!"
+                )
+            if id(transaction) not in stale:
+                groups.setdefault((transaction.origin, transaction.destination), []).append(transaction)
+
+        # a tabela é lida uma única vez: trocas durante o lote só valem para os próximos lotes
+        rates = RATES.current
+        journal = get_journal()
+        latency = self.bank.latency
+        # transações sem lançamentos (prazo vencido, mesma conta, lock não obtido): registradas no fim
+        unposted: List[Transaction] = []
+        results: Dict[int, TransactionStatus] = {}
+        nacional = 0
+        internacional: Counter = Counter()
+        profit = 0
+        # grupos confirmados, conflitos e grupos que recorreram aos locks no modo otimista
+        optimistic = [0, 0, 0]
+
+        if stale:
+            # prazo vencido na fila, a transação falha sem travar nenhuma conta e sem ser contada nos
+            # contadores de transferências (o registro DONE é marcado como EXPIRED para recover())
+            timed_out = [transaction for transaction in transactions if id(transaction) in stale]
+            for transaction in timed_out:
+                results[id(transaction)] = TransactionStatus.FAILED
+            unposted.extend(timed_out)
+            latency.stamp(timed_out, MOVED)
+            self.bank.classes.record_expired(timed_out)
+
+        for (origin, destination), group in groups.items():
+            origin_acc = self.bank.accounts[origin[1] - 1]
+
+            # se for operação com o mesmo banco (nacional)
+            if origin[0] == destination[0]:
+                if origin[1] == destination[1]:
+                    # transferência para a própria conta: nada a movimentar
+                    for transaction in group:
+                        results[id(transaction)] = TransactionStatus.SUCCESSFUL
+                    unposted.extend(group)
+                    latency.stamp(group, LOCKED)
+                    latency.stamp(group, MOVED)
+                    continue
+
+                nacional += len(group)
+                destiny_acc = self.bank.accounts[destination[1] - 1]
+
+                if config.concurrency == "optimistic":
+                    debits, conflicts = self._transfer_national_optimistic(origin_acc, destiny_acc, group)
+                    optimistic[1] += conflicts
+                    if debits is not None:
+                        optimistic[0] += 1
+                        for transaction, debited in zip(group, debits):
+                            results[id(transaction)] = (
+                                TransactionStatus.FAILED if debited is None else TransactionStatus.SUCCESSFUL
+                            )
+                        continue
+                    # tentativas esgotadas: o grupo é feito com os locks mantidos
+                    optimistic[2] += 1
+
+                try:
+                    with LOCK_MANAGER.hold(origin_acc, destiny_acc):
+                        latency.stamp(group, LOCKED)
+                        debits: List[Optional[int]] = []
+                        for transaction in group:
+                            before = origin_acc.balance
+                            ok = self._transfer_national(origin_acc, destiny_acc, transaction)
+                            latency.stamp((transaction,), MOVED)
+                            results[id(transaction)] = TransactionStatus.SUCCESSFUL if ok else TransactionStatus.FAILED
+                            debits.append(before - origin_acc.balance if ok else None)
+                        # ainda com as contas travadas: ninguém viu os novos saldos antes do registro
+                        self._journal_national(group, debits)
+                except LockTimeout as err:
+                    LOGGER.error(f"Transferência nacional do Banco {self.bank._id} abortada: {err}")
+                    for transaction in group:
+                        results[id(transaction)] = TransactionStatus.FAILED
+                    unposted.extend(group)
+                    latency.stamp(group, MOVED)
+
+            # operação internacional
+            else:
+                # incrementa uma transação internacional nos dois bancos
+                internacional[origin[0]] += len(group)
+                internacional[destination[0]] += len(group)
+
+                destiny_acc = banks[destination[0]].accounts[destination[1] - 1]
+
+                fees = self._transfer_international(origin_acc, destiny_acc, group, rates)
+                latency.stamp(group, MOVED)
+                for transaction, exchange_fee in zip(group, fees):
+                    if exchange_fee is None:
+                        results[id(transaction)] = TransactionStatus.FAILED
+                    else:
+                        profit += exchange_fee
+                        results[id(transaction)] = TransactionStatus.SUCCESSFUL
+
+        # uma única escrita protegida por lock para cada contador do lote
+        if nacional:
+            self.bank.count_national(nacional)
+        for bank_id, n in internacional.items():
+            banks[bank_id].count_international(n)
+        if profit:
+            self.bank.add_profit(profit)
+        if any(optimistic):
+            self.bank.record_optimistic(*optimistic)
+
+        if journal is not None and unposted:
+            self.journal_seq = journal.append(b"".join(
+                encode_done(
+                    transaction, results[id(transaction)], [],
+                    rates.version if transaction.origin[0] != transaction.destination[0] else None,
+                    EXPIRED if id(transaction) in stale else 0,
+                )
+                for transaction in unposted
+            ))
+        return [results[id(transaction)] for transaction in transactions]
+
+    def complete_batch(self, transactions: List[Transaction], results: List[TransactionStatus]) -> None:
+        """
+        Registra os status resultantes de execute_batch() nas transações (Transaction.set_status())
+        e os seus tempos de processamento no banco, com uma única escrita por lote.
+        """
+        latencies = []
+        successful = 0
+        for transaction, status in zip(transactions, results):
+            transaction.set_status(status)
+            latencies.append(transaction.get_processing_time().total_seconds())
+            if status == TransactionStatus.SUCCESSFUL:
+                successful += 1
+        self.bank.record_completed(latencies, successful)
+        self.bank.latency.complete(transactions)
+        if config.scheduler == "priority":
+            self.bank.classes.record(transactions, latencies)
+
+    def _reserve_for(self, currency: Currency) -> StripedReserve:
+        """
+        Retorna a reserva (conta especial interna) do banco na moeda `currency`.
+        """
+        return getattr(self.bank.reserves, currency.name)
+
+    def _journal_national(self, group: List[Transaction], debits: List[Optional[int]]) -> None:
+        """
+        Adiciona ao journal (se ativo) os registros DONE de um grupo de transferências nacionais, dado
+        o valor debitado da origem em cada transação (None se ela falhou). Deve ser chamado antes que
+        os novos saldos das contas fiquem visíveis para outros processadores.
+        """
+        journal = get_journal()
+        if journal is None:
+            return
+        bank_id = self.bank._id
+        records = []
+        for transaction, debited in zip(group, debits):
+            if debited is None:
+                records.append(encode_done(transaction, TransactionStatus.FAILED, []))
+                continue
+            postings: List[Posting] = [
+                (ACCOUNT, bank_id, transaction.origin[1], -debited),
+                (ACCOUNT, bank_id, transaction.destination[1], transaction.amount),
+            ]
+            if debited != transaction.amount:
+                postings.append((INTEREST, bank_id, 0, debited - transaction.amount))
+            records.append(encode_done(transaction, TransactionStatus.SUCCESSFUL, postings))
+        self.journal_seq = journal.append(b"".join(records))
+
+    def _transfer_national(self, origin_acc: Account, destiny_acc: Account, transaction: Transaction) -> bool:
+        """
+        Transfere `transaction.amount` entre duas contas do banco.
+        As duas contas devem estar travadas por quem chama.
+        """
+        if not origin_acc.withdraw(transaction.amount):
+            return False
+        destiny_acc.deposit(transaction.amount)
+        return True
+
+    def _transfer_national_optimistic(
+        self, origin_acc: Account, destiny_acc: Account, group: List[Transaction]
+    ) -> Tuple[Optional[List[Optional[int]]], int]:
+        """
+        Transfere as transações de `group` entre duas contas do banco sem manter os locks durante o
+        cálculo: lê as versões e os saldos das duas contas, calcula o resultado de cada transação
+        (como withdraw() e deposit()) e confirma o grupo em uma seção crítica curta, que trava as
+        duas contas apenas para comparar as versões e gravar os novos saldos (compare-and-swap). Se
+        alguma das contas mudou desde a leitura, o grupo é recalculado, até OPTIMISTIC_RETRIES vezes.
+        Nenhuma conta deve estar travada por quem chama.
+        Retorna o valor debitado da origem em cada transação (None se ela falhou por falta de saldo),
+        ou None se as tentativas se esgotaram, e a quantidade de conflitos.
+        """
+        conflicts = 0
+        for _ in range(OPTIMISTIC_RETRIES):
+            # a versão é lida antes do saldo: quem escreve altera o saldo antes de incrementar a versão
+            origin_version, destiny_version = origin_acc.version, destiny_acc.version
+            origin_balance, destiny_balance = origin_acc.balance, destiny_acc.balance
+
+            debits: List[Optional[int]] = []
+            for transaction in group:
+                interest = origin_acc.withdrawal(origin_balance, transaction.amount)
+                if interest is None:
+                    debits.append(None)
+                    continue
+                origin_balance -= transaction.amount + interest
+                destiny_balance += transaction.amount
+                debits.append(transaction.amount + interest)
+
+            with LOCK_MANAGER.hold(origin_acc, destiny_acc):
+                committed = origin_acc.version == origin_version and destiny_acc.version == destiny_version
+                if committed:
+                    self.bank.latency.stamp(group, LOCKED)
+                    self._journal_national(group, debits)
+                    origin_acc.balance = origin_balance
+                    destiny_acc.balance = destiny_balance
+                    origin_acc.version += 1
+                    destiny_acc.version += 1
+            if committed:
+                self.bank.latency.stamp(group, MOVED)
+                interest = sum(debited - transaction.amount for transaction, debited in zip(group, debits) if debited)
+                if interest:
+                    self.bank.add_overdraft_interest(interest)
+                return debits, conflicts
+            conflicts += 1
+        return None, conflicts
+
+    def _transfer_international(
+        self,
+        origin_acc: Account,
+        destiny_acc: Account,
+        group: List[Transaction],
+        rates: Optional[RateTable] = None,
+    ) -> List[Optional[int]]:
+        """
+        Transfere as transações de `group` (todas com a mesma origem e o mesmo destino) para uma conta
+        de outro banco, passando pelas reservas do banco de origem, em duas fases:
+
+        1. prepare: debita o valor + 1% de taxa da conta de origem e reserva o valor convertido
+           na reserva da moeda de destino; se a reserva não tiver saldo, a transação é desfeita
+           (a conta de origem é reembolsada, inclusive dos juros de cheque especial);
+        2. commit: deposita o valor debitado na reserva da moeda de origem e o valor convertido
+           na conta de destino.
+
+        Nenhum lock é mantido enquanto outro é adquirido e cada conta é travada uma única vez por
+        fase para o grupo inteiro. Nas reservas, o processador usa a sua própria subconta; com a
+        liquidação em lotes ativa (ver BatchSettlement), as reservas não são travadas: o débito
+        é aceito pelo BatchSettlement e o crédito é somado às suas posições. Nenhuma
+        conta deve estar travada por quem chama. Se o lock da origem ou da reserva não for obtido no
+        prepare, as transações afetadas falham; rollback e commit esperam pelos locks sem limite.
+        Transações cujo valor convertido é arredondado para zero (abaixo do quantum da moeda de
+        destino) falham antes de qualquer débito.
+        As conversões usam a tabela de câmbio `rates` (ou a tabela em uso, se omitida). Com o journal
+        ativo, os registros DONE do grupo são adicionados a ele entre o prepare e o commit, antes de
+        qualquer crédito.
+        Retorna, para cada transação, a taxa de câmbio cobrada ou None se ela falhou.
+        """
+        rates = rates or RATES.current
+        journal = get_journal()
+        origin_reserve = self._reserve_for(origin_acc.currency)
+        destiny_reserve = self._reserve_for(destiny_acc.currency)
+        fees: List[Optional[int]] = [None] * len(group)
+        # valores em centavos inteiros: taxa de 1% arredondada para cima, conversão arredondada para
+        # baixo conforme a moeda de destino (ver utils/money.py)
+        charged = [transaction.amount + fee(transaction.amount, EXCHANGE_FEE_BPS) for transaction in group]
+        converted = [
+            convert(transaction.amount, origin_acc.currency, destiny_acc.currency, rates) for transaction in group
+        ]
+
+        # prepare (1/2): debita as contas de origem, com 1% de taxa sobre o valor da operação
+        debited: Dict[int, int] = {}
+        payable = [i for i in range(len(group)) if converted[i] > 0]
+        if not payable:
+            self._journal_international(group, {}, rates)
+            return fees
+        try:
+            with LOCK_MANAGER.hold(origin_acc):
+                self.bank.latency.stamp(group, LOCKED)
+                for i in payable:
+                    before = origin_acc.balance
+                    if origin_acc.withdraw(charged[i]):
+                        debited[i] = before - origin_acc.balance
+        except LockTimeout as err:
+            LOGGER.error(f"Transferência internacional do Banco {self.bank._id} abortada: {err}")
+        if not debited:
+            self._journal_international(group, {}, rates)
+            return fees
+
+        # prepare (2/2): reserva o valor convertido na subconta deste processador da reserva da moeda
+        # de destino; o que não couber nela é tentado de novo com rebalanceamento das subcontas
+        reserved: Dict[int, int] = {}
+        missing: List[int] = []
+        destiny_stripe = destiny_reserve.stripe(self._id)
+        settlement = get_settlement()
+        if settlement is not None:
+            accepted = settlement.reserve(
+                self.bank._id, destiny_acc._bank_id, destiny_acc.currency, [converted[i] for i in debited]
+            )
+            reserved = {i: converted[i] for i, ok in zip(debited, accepted) if ok}
+        else:
+            try:
+                with LOCK_MANAGER.hold(destiny_stripe):
+                    for i in debited:
+                        if destiny_stripe.balance >= converted[i] and destiny_stripe.withdraw(converted[i]):
+                            reserved[i] = converted[i]
+                        else:
+                            missing.append(i)
+                for i in missing:
+                    if destiny_reserve.withdraw_from(self._id, converted[i]):
+                        reserved[i] = converted[i]
+            except LockTimeout as err:
+                LOGGER.error(f"Reserva em {destiny_acc.currency.name} do Banco {self.bank._id} indisponível: {err}")
+
+        # rollback das transações sem reserva: reembolsa a origem, inclusive os juros de cheque especial
+        refunds = {i: amount for i, amount in debited.items() if i not in reserved}
+        if refunds:
+            with LOCK_MANAGER.hold(origin_acc, timeout=BLOCK):
+                for amount in refunds.values():
+                    origin_acc.deposit(amount)
+            overdraft_interest = sum(amount - charged[i] for i, amount in refunds.items())
+            if overdraft_interest:
+                self.bank.add_overdraft_interest(-overdraft_interest)
+            LOGGER.warning(
+                f"{len(refunds)} transação(ões) internacional(is) do Banco {self.bank._id} desfeita(s): "
+                f"reserva em {destiny_acc.currency.name} insuficiente"
+            )
+        for i in reserved:
+            fees[i] = charged[i] - group[i].amount
+        if journal is not None:
+            bank_id = self.bank._id
+            entries: Dict[int, List[Posting]] = {}
+            for i in reserved:
+                entries[i] = [
+                    (ACCOUNT, bank_id, origin_acc._id, -debited[i]),
+                    (RESERVE, bank_id, origin_acc.currency.value, charged[i]),
+                    (RESERVE, bank_id, destiny_acc.currency.value, -converted[i]),
+                    (ACCOUNT, destiny_acc._bank_id, destiny_acc._id, converted[i]),
+                    (PROFIT, bank_id, 0, fees[i]),
+                ]
+                if debited[i] != charged[i]:
+                    entries[i].append((INTEREST, bank_id, 0, debited[i] - charged[i]))
+            self._journal_international(group, entries, rates)
+        if not reserved:
+            return fees
+
+        # commit: credita a reserva da moeda de origem e as contas de destino
+        if settlement is not None:
+            settlement.credit(
+                self.bank._id, destiny_acc._bank_id, origin_acc.currency,
+                sum(charged[i] for i in reserved), len(reserved),
+            )
+        else:
+            with LOCK_MANAGER.hold(origin_reserve.stripe(self._id), timeout=BLOCK):
+                for i in reserved:
+                    origin_reserve.stripe(self._id).deposit(charged[i])
+
+        with LOCK_MANAGER.hold(destiny_acc, timeout=BLOCK):
+            for amount in reserved.values():
+                destiny_acc.deposit(amount)
+
+        return fees
+
+    def _journal_international(
+        self, group: List[Transaction], entries: Dict[int, List[Posting]], rates: RateTable
+    ) -> None:
+        """
+        Adiciona ao journal (se ativo) os registros DONE de um grupo de transferências internacionais:
+        as transações cujos índices estão em `entries` foram bem-sucedidas, com esses lançamentos; as
+        demais falharam. Deve ser chamado antes de qualquer crédito do grupo.
+        """
+        journal = get_journal()
+        if journal is None:
+            return
+        self.journal_seq = journal.append(b"".join(
+            encode_done(
+                transaction,
+                TransactionStatus.SUCCESSFUL if i in entries else TransactionStatus.FAILED,
+                entries.get(i, []),
+                rates.version,
+            )
+            for i, transaction in enumerate(group)
+        ))
+
+
+class PaymentProcessor(TransactionExecutor, Thread):
     """
     Uma classe para representar um processador de pagamentos de um banco.
     Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
@@ -18,22 +459,40 @@ class PaymentProcessor(Thread):
     Atributos
     ---------
     _id : int
-        IdentificadPaymor do processador de pagamentos.
+        Identificador do processador de pagamentos.
     bank: Bank
         Banco sob o qual o processador de pagamentos operará.
+    batch_size : int
+        Quantidade máxima de transações retiradas da fila por vez (1 = sem lotes).
+    batch_wait : float
+        Tempo máximo (em segundos) de espera para completar um lote.
+    running : bool
+        Falso quando o processador recebeu um pedido de parada (stop()).
+    processed : int
+        Quantidade de transações processadas por esse processador.
+    busy_time : float
+        Tempo total (em segundos) gasto processando transações.
 
     Métodos
     -------
     run():
         Inicia thread to PaymentProcessor
+    stop() -> None:
+        Pede que o processador termine após concluir as transações que já retirou da fila.
     process_transaction(transaction: Transaction) -> TransactionStatus:
         Processa uma transação bancária.
+    process_batch(transactions: List[Transaction]) -> List[TransactionStatus]:
+        Processa um lote de transações bancárias, pagando a latência simulada uma única vez.
     """
 
-    def __init__(self, _id: int, bank: Bank):
+    def __init__(self, _id: int, bank: Bank, batch_size: int = 1, batch_wait: float = 0.0):
         Thread.__init__(self)
-        self._id = _id
-        self.bank = bank
+        TransactionExecutor.__init__(self, _id, bank)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.running = True
+        self.processed = 0
+        self.busy_time = 0.0
 
     def run(self):
         """
@@ -41,31 +500,46 @@ class PaymentProcessor(Thread):
         utilizando o método self.process_transaction(self, transaction: Transaction).
         Ele não deve ser finalizado prematuramente (antes do banco realmente fechar).
         """
-        # TODO: IMPLEMENTE/MODIFIQUE O CÓDIGO NECESSÁRIO ABAIXO !
-
         LOGGER.info(
             f"Inicializado o PaymentProcessor {self._id} do Banco {self.bank._id}!"
         )
-        queue = banks[self.bank._id].transaction_queue
+        queue = self.bank.transaction_queue
+
+        # espera limitada na fila para que um pedido de stop() seja percebido mesmo sem transações
+        poll_timeout = 10 * config.time_unit
 
         # @Caio: enquanto o banco está operando, processador de operações, executa
-        while self.bank.operating:
-            try:
-                self.bank.queue_semaphore.acquire()
-                transaction = queue.pop(0)
+        while self.bank.operating and self.running:
+            # retorna vazio quando a fila é fechada ou após poll_timeout sem transações
+            if self.batch_size > 1:
+                transactions = queue.get_batch(self.batch_size, self.batch_wait, timeout=poll_timeout)
+            else:
+                transaction = queue.get(timeout=poll_timeout)
+                transactions = [transaction] if transaction is not None else []
+            if not transactions:
+                continue
+
+            if hot():
                 LOGGER.info(f"Transaction_queue do Banco {self.bank._id}, tamanho da fila :{len(queue)}")
-                # LOGGER.info(f"Transaction_queue do Banco {self.bank._id}: {queue}")
-                # LOGGER.info(f"{self.bank._id} ")  # TODO: trocar de volta o print
+            start = time.monotonic()
+            try:
+                self.process_batch(transactions)
             except Exception as err:
                 LOGGER.error(f"Falha em PaymentProcessor.run(): {err}")
-            else:
-                self.process_transaction(transaction)
-            # time.sleep(3 * time_unit)  # Remova esse sleep após implementar sua solução!
+            self.busy_time += time.monotonic() - start
+            self.processed += len(transactions)
 
         LOGGER.info(
             f"O PaymentProcessor {self._id} do banco {self.bank._id} foi finalizado."
         )
 
+    def stop(self) -> None:
+        """
+        Pede que o processador termine. As transações já retiradas da fila são processadas
+        antes do término, então nenhuma transação em andamento é perdida.
+        """
+        self.running = False
+
     def process_transaction(self, transaction: Transaction) -> TransactionStatus:
         """
         Esse método deverá processar as transações bancárias do banco ao qual foi designado.
@@ -74,123 +548,23 @@ class PaymentProcessor(Thread):
         aplicada.
         Ela deve retornar o status da transacão processada.
         """
-        # TODO: IMPLEMENTE/MODIFIQUE O CÓDIGO NECESSÁRIO ABAIXO !
-        LOGGER.info(
-            f"PaymentProcessor {self._id} do Banco {self.bank._id} iniciando processamento da Transaction {transaction._id}!"
-        )
-
-        # se for operação com o mesmo banco (nacional)
-        origin_acc = self.bank.accounts[transaction.origin[1] - 1]
-        if transaction.origin[0] == transaction.destination[0]:
-            if transaction.origin[1] != transaction.destination[1]:
-                with self.bank.nacional_transactions_lock:
-                    self.bank.nacional_transactions += 1
-
-                destiny_acc = self.bank.accounts[transaction.destination[1] - 1]
-
-                if transaction.origin[1] > transaction.destination[1]:
-                    destiny_acc.lock()
-                    origin_acc.lock()
-                else:
-                    origin_acc.lock()
-                    destiny_acc.lock()
-
-                withdraw = origin_acc.withdraw(transaction.amount)
-                origin_acc.unlock()
-
-                if withdraw:
-                    destiny_acc.deposit(transaction.amount)
-                    transaction.set_status(TransactionStatus.SUCCESSFUL)
-                else:
-                    transaction.set_status(TransactionStatus.FAILED)
-
-                destiny_acc.unlock()
-
-        # operação internacional
-        else:
-            # incrementa uma transação internacional nos dois bancos
-            with self.bank.internacional_transactions_lock:
-                self.bank.internacional_transactions += 1
-            with banks[transaction.destination[0]].internacional_transactions_lock:
-                banks[transaction.destination[0]].internacional_transactions += 1
-
-            destiny_acc = banks[transaction.destination[0]].accounts[
-                transaction.destination[1] - 1
-            ]
+        return self.process_batch([transaction])[0]
 
-            if transaction.origin[0] > transaction.destination[0]:
-                destiny_acc.lock()
-                origin_acc.lock()
-
-            else:
-                origin_acc.lock()
-                destiny_acc.lock()
-
-            withdraw = origin_acc.withdraw(
-                (transaction.amount) * 1.01
-            )  # taxa de 1% sobre o valor para operação internacional
-            origin_acc.unlock()
-
-            if withdraw:
-
-                amount_after_conversion = transaction.amount * get_exchange_rate(
-                    origin_acc.currency, destiny_acc.currency
-                )
-
-                if origin_acc.currency.value == 1:
-                    origin = self.bank.reserves.USD
-
-                elif origin_acc.currency.value == 2:
-                    origin = self.bank.reserves.EUR
-
-                elif origin_acc.currency.value == 3:
-                    origin = self.bank.reserves.GBP
-
-                elif origin_acc.currency.value == 4:
-                    origin = self.bank.reserves.JPY
-
-                elif origin_acc.currency.value == 5:
-                    origin = self.bank.reserves.CHF
-
-                elif origin_acc.currency.value == 6:
-                    origin = self.bank.reserves.BRL
-
-                origin.lock()
-                origin.deposit(transaction.amount * 1.01)
-                origin.unlock()
-
-                if destiny_acc.currency.value == 1:
-                    destiny = self.bank.reserves.USD
-
-                elif destiny_acc.currency.value == 2:
-                    destiny = self.bank.reserves.EUR
-
-                elif destiny_acc.currency.value == 3:
-                    destiny = self.bank.reserves.GBP
-
-                elif destiny_acc.currency.value == 4:
-                    destiny = self.bank.reserves.JPY
-
-                elif destiny_acc.currency.value == 5:
-                    destiny = self.bank.reserves.CHF
-
-                elif destiny_acc.currency.value == 6:
-                    destiny = self.bank.reserves.BRL
-
-                destiny.lock()
-                withdraw = destiny.withdraw(amount_after_conversion)
-                destiny.unlock()
-
-                if withdraw:
-                    destiny_acc.deposit(amount_after_conversion)
-                    self.bank.bank_profit_lock.acquire()
-                    self.bank.bank_profit += transaction.amount*0.01
-                    self.bank.bank_profit_lock.release()
-            destiny_acc.unlock()
+    def process_batch(self, transactions: List[Transaction]) -> List[TransactionStatus]:
+        """
+        Processa um lote de transações com execute_batch(), pagando a latência simulada uma
+        única vez para o lote. Retorna os status das transações, na mesma ordem de `transactions`.
+        """
+        results = self.execute_batch(transactions)
 
         # NÃO REMOVA ESSE SLEEP!
-        # Ele simula uma latência de processamento para a transação.
-        time.sleep(3 * time_unit)
+        # Ele simula uma latência de processamento para a transação (uma vez por lote).
+        time.sleep(3 * config.time_unit)
+
+        # os status só são confirmados depois que o journal gravou o lote (o fsync corre durante o sleep)
+        journal = get_journal()
+        if journal is not None:
+            journal.wait(self.journal_seq)
 
-        transaction.set_status(TransactionStatus.SUCCESSFUL)
-        return transaction.status
+        self.complete_batch(transactions, results)
+        return results
@@ -0,0 +1,165 @@
+import time
+from threading import Thread
+from typing import List, Tuple
+
+from payment_system.bank import Bank
+from payment_system.payment_processor import PaymentProcessor
+from utils.logger import LOGGER
+
+
+class ProcessorSupervisor(Thread):
+    """
+    Uma classe para ajustar a quantidade de PaymentProcessors de um banco de acordo com a carga.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    A cada `interval` segundos o supervisor observa o tamanho da fila do banco, o tempo médio que
+    as transações retiradas desde a última observação esperaram na fila e a latência média de
+    processamento. Se a fila está crescendo ou a espera passa de `target_latency`, um processador
+    é adicionado; se a fila ficou vazia por `scale_down_after` observações seguidas, um processador
+    é parado (stop() + join(), sem perder transações em andamento) e removido do banco.
+
+    ...
+
+    Atributos
+    ---------
+    bank : Bank
+        Banco cujos processadores são supervisionados.
+    min_processors : int
+        Quantidade mínima de processadores do banco.
+    max_processors : int
+        Quantidade máxima de processadores do banco.
+    interval : float
+        Intervalo (em segundos) entre duas observações.
+    scale_up_depth : int
+        Tamanho de fila, por processador, a partir do qual um novo processador é criado.
+    target_latency : float
+        Tempo médio de espera na fila (em segundos) a partir do qual um novo processador é criado.
+    scale_down_after : int
+        Quantidade de observações seguidas com fila vazia antes de remover um processador.
+    processor_kwargs : dict
+        Argumentos extras repassados aos PaymentProcessors criados.
+    scaling_log : List[Tuple[float, int, int, str]]
+        Histórico das decisões: (instante, processadores antes, processadores depois, motivo).
+
+    Métodos
+    -------
+    run():
+        Inicia thread do supervisor.
+    scale_up(reason: str) -> None:
+        Adiciona um PaymentProcessor ao banco.
+    scale_down(reason: str) -> None:
+        Para e remove um PaymentProcessor do banco.
+    """
+
+    def __init__(
+        self,
+        bank: Bank,
+        min_processors: int,
+        max_processors: int,
+        interval: float,
+        scale_up_depth: int = 10,
+        target_latency: float = 0.0,
+        scale_down_after: int = 3,
+        processor_kwargs: dict = None,
+    ):
+        Thread.__init__(self)
+        self.bank = bank
+        self.min_processors = min_processors
+        self.max_processors = max_processors
+        self.interval = interval
+        self.scale_up_depth = scale_up_depth
+        self.target_latency = target_latency
+        self.scale_down_after = scale_down_after
+        self.processor_kwargs = processor_kwargs or {}
+        self.scaling_log: List[Tuple[float, int, int, str]] = []
+
+        self._next_id = len(bank.payment_processors)
+        self._idle_checks = 0
+        self._last_dequeued = 0
+        self._last_queue_wait = 0.0
+        self._last_processed = 0
+        self._last_busy_time = 0.0
+        self._retired = (0, 0.0)
+
+    def run(self):
+        LOGGER.info(f"Inicializado o ProcessorSupervisor do Banco {self.bank._id}!")
+
+        while self.bank.operating:
+            time.sleep(self.interval)
+            if self.bank.operating:
+                self._evaluate()
+
+        LOGGER.info(f"O ProcessorSupervisor do banco {self.bank._id} foi finalizado.")
+
+    def _evaluate(self) -> None:
+        """
+        Observa a carga do banco desde a última chamada e decide se deve escalar.
+        """
+        stats = self.bank.transaction_queue.stats()
+        depth = stats["depth"]
+        n = len(self.bank.payment_processors)
+
+        # espera média na fila das transações retiradas desde a última observação
+        dequeued = stats["dequeued"] - self._last_dequeued
+        queue_wait = stats["queue_wait_time"] - self._last_queue_wait
+        mean_wait = queue_wait / dequeued if dequeued else 0.0
+        self._last_dequeued = stats["dequeued"]
+        self._last_queue_wait = stats["queue_wait_time"]
+
+        # latência média de processamento observada pelos processadores
+        processed = self._retired[0] + sum(p.processed for p in self.bank.payment_processors)
+        busy_time = self._retired[1] + sum(p.busy_time for p in self.bank.payment_processors)
+        done = processed - self._last_processed
+        latency = (busy_time - self._last_busy_time) / done if done else 0.0
+        self._last_processed = processed
+        self._last_busy_time = busy_time
+
+        LOGGER.debug(
+            f"ProcessorSupervisor do Banco {self.bank._id}: fila={depth}, espera média={mean_wait:.4f}s, "
+            f"latência média={latency:.4f}s, processadores={n}"
+        )
+
+        if n < self.max_processors and depth > self.scale_up_depth * n:
+            self._idle_checks = 0
+            self.scale_up(f"fila com {depth} transações para {n} processadores")
+        elif n < self.max_processors and self.target_latency and mean_wait > self.target_latency and depth > 0:
+            self._idle_checks = 0
+            self.scale_up(f"espera média na fila de {mean_wait:.4f}s (latência de processamento {latency:.4f}s)")
+        elif depth == 0:
+            self._idle_checks += 1
+            if n > self.min_processors and self._idle_checks >= self.scale_down_after:
+                self._idle_checks = 0
+                self.scale_down(f"fila vazia por {self.scale_down_after} observações")
+        else:
+            self._idle_checks = 0
+
+    def _record(self, before: int, after: int, reason: str) -> None:
+        self.scaling_log.append((time.time(), before, after, reason))
+        LOGGER.info(
+            f"ProcessorSupervisor do Banco {self.bank._id}: {before} -> {after} PaymentProcessors ({reason})"
+        )
+
+    def scale_up(self, reason: str) -> None:
+        """
+        Cria, inicia e adiciona um novo PaymentProcessor ao banco.
+        """
+        before = len(self.bank.payment_processors)
+        processor = PaymentProcessor(_id=self._next_id, bank=self.bank, **self.processor_kwargs)
+        self._next_id += 1
+        self.bank.payment_processors.append(processor)
+        processor.start()
+        self._record(before, before + 1, reason)
+
+    def scale_down(self, reason: str) -> None:
+        """
+        Para o PaymentProcessor mais recente do banco e o remove da lista de processadores.
+        O processador termina as transações que já retirou da fila antes de ser removido.
+        """
+        before = len(self.bank.payment_processors)
+        processor = self.bank.payment_processors[-1]
+        processor.stop()
+        processor.join()
+        self.bank.payment_processors.remove(processor)
+        # mantém as estatísticas do processador removido para o cálculo da latência
+        self._retired = (self._retired[0] + processor.processed, self._retired[1] + processor.busy_time)
+        self._record(before, before - 1, reason)
@@ -0,0 +1,229 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import chain
+from typing import Iterable, Iterator, List, Set, Tuple
+
+import globals as config
+from payment_system.latency import ENQUEUED, LatencyTracker
+from utils.lock_profiler import make_lock
+from utils.logger import LOGGER
+from utils.stats import Histogram
+from utils.transaction import Transaction
+
+
+@dataclass(frozen=True)
+class PriorityClass:
+    """
+    Uma dataclass para representar uma classe de prioridade do escalonador da fila de transações.
+
+    ...
+
+    Atributos
+    ---------
+    name : str
+        Nome da classe nos relatórios e nas métricas.
+    weight : int
+        Peso da classe: enquanto todas as classes têm transações esperando, a classe recebe `weight`
+        de cada sum(pesos) transações retiradas da fila.
+    deadline : float
+        Prazo das transações da classe, em múltiplos de sla_deadline (0 = sem prazo).
+    """
+
+    name: str
+    weight: int
+    deadline: float
+
+
+# Classes de prioridade do escalonador "priority", na ordem dos índices retornados por classify()
+PRIORITY_CLASSES = (
+    PriorityClass("nacional", weight=4, deadline=1),
+    PriorityClass("internacional", weight=2, deadline=2),
+    PriorityClass("valor alto", weight=1, deadline=4),
+)
+NATIONAL, INTERNATIONAL, LARGE = range(len(PRIORITY_CLASSES))
+
+# Item da fila de transações: (instante em que entrou na fila, transação)
+QueueItem = Tuple[float, Transaction]
+
+
+def classify(transaction: Transaction) -> int:
+    """
+    Retorna a classe de prioridade de `transaction`: transferências a partir de large_amount são da
+    classe de valor alto (seja qual for o destino); as demais, nacionais ou internacionais.
+    """
+    if transaction.amount >= config.large_amount:
+        return LARGE
+    return NATIONAL if transaction.origin[0] == transaction.destination[0] else INTERNATIONAL
+
+
+def deadline(priority_class: int) -> float:
+    """
+    Retorna o prazo (em segundos, desde a entrada da transação na fila) da classe `priority_class`
+    (0 = sem prazo).
+    """
+    return PRIORITY_CLASSES[priority_class].deadline * config.sla_deadline * config.time_unit
+
+
+def expired(transactions: List[Transaction], latency: LatencyTracker) -> Set[int]:
+    """
+    Retorna o id() das transações de `transactions` cujo prazo já venceu, medido com time.monotonic()
+    desde o instante em que cada uma entrou na fila (registrado em `latency`); transações sem esse
+    registro não vencem. Sem o escalonador "priority" (ou sem sla_deadline), nenhuma transação vence.
+    """
+    if config.scheduler != "priority" or not config.sla_deadline:
+        return set()
+    now = time.monotonic()
+    stale = set()
+    for transaction, enqueued_at in zip(transactions, latency.stamps(transactions, ENQUEUED)):
+        limit = deadline(classify(transaction))
+        if limit and enqueued_at is not None and now - enqueued_at > limit:
+            stale.add(id(transaction))
+    return stale
+
+
+class PriorityItems:
+    """
+    Uma classe para representar as transações esperando na fila de um banco separadas por classe de
+    prioridade. Substitui o deque FIFO de TransactionQueue com o escalonador "priority" e oferece as
+    mesmas operações que a fila usa (append, extend, popleft, extendleft, len e iteração).
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Cada classe é uma fila FIFO própria. popleft() escolhe a classe por round-robin ponderado suave:
+    a cada retirada, cada classe com transações esperando ganha `weight` créditos, a classe com mais
+    créditos é escolhida e perde a soma dos pesos das classes disputando. Assim uma rajada de uma
+    classe (ex.: transferências internacionais de valor alto) não atrasa as outras além da sua parte,
+    e nenhuma classe com transações esperando fica sem ser atendida.
+
+    ...
+
+    Métodos
+    -------
+    append(item: QueueItem) -> None:
+        Adiciona um item ao final da fila da sua classe.
+    extend(items: Iterable[QueueItem]) -> None:
+        Adiciona itens ao final das filas das suas classes, na ordem.
+    extendleft(items: Iterable[QueueItem]) -> None:
+        Devolve itens ao início das filas das suas classes (como deque.extendleft()).
+    popleft() -> QueueItem:
+        Retira o próximo item, da classe escolhida pelo round-robin ponderado.
+    depths() -> List[int]:
+        Retorna a quantidade de itens esperando em cada classe.
+    """
+
+    def __init__(self):
+        self._queues = [deque() for _ in PRIORITY_CLASSES]
+        self._credits = [0] * len(PRIORITY_CLASSES)
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[QueueItem]:
+        return chain.from_iterable(self._queues)
+
+    def append(self, item: QueueItem) -> None:
+        self._queues[classify(item[1])].append(item)
+        self._len += 1
+
+    def extend(self, items: Iterable[QueueItem]) -> None:
+        for item in items:
+            self.append(item)
+
+    def extendleft(self, items: Iterable[QueueItem]) -> None:
+        for item in items:
+            self._queues[classify(item[1])].appendleft(item)
+            self._len += 1
+
+    def popleft(self) -> QueueItem:
+        if not self._len:
+            raise IndexError("pop from an empty PriorityItems")
+        chosen = -1
+        total = 0
+        for priority_class, queue in enumerate(self._queues):
+            if not queue:
+                # classe sem transações não acumula créditos enquanto espera
+                self._credits[priority_class] = 0
+                continue
+            weight = PRIORITY_CLASSES[priority_class].weight
+            self._credits[priority_class] += weight
+            total += weight
+            if chosen < 0 or self._credits[priority_class] > self._credits[chosen]:
+                chosen = priority_class
+        self._credits[chosen] -= total
+        self._len -= 1
+        return self._queues[chosen].popleft()
+
+    def depths(self) -> List[int]:
+        return [len(queue) for queue in self._queues]
+
+
+class ClassStats:
+    """
+    Uma classe para reunir as estatísticas por classe de prioridade das transações finalizadas de um
+    banco com o escalonador "priority".
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    latencies : List[Histogram]
+        Distribuição do tempo de processamento (em segundos, da criação à finalização) das
+        transações finalizadas, por classe.
+    expired : List[int]
+        Quantidade de transações que falharam por prazo vencido, por classe.
+
+    Métodos
+    -------
+    record(transactions: List[Transaction], latencies: List[float]) -> None:
+        Registra as latências de transações finalizadas na classe de cada uma.
+    record_expired(transactions: Iterable[Transaction]) -> None:
+        Registra transações que falharam por prazo vencido.
+    export() -> dict:
+        Retorna as estatísticas (serializáveis).
+    load(state: dict) -> None:
+        Substitui as estatísticas pelas de `state` (gerado por export()).
+    report() -> None:
+        Printa, por classe, as transações finalizadas, as vencidas e os percentis de latência.
+    """
+
+    def __init__(self, name: str = "estatísticas por classe"):
+        self.latencies = [Histogram() for _ in PRIORITY_CLASSES]
+        self.expired = [0] * len(PRIORITY_CLASSES)
+        self._lock = make_lock(name)
+
+    def record(self, transactions: List[Transaction], latencies: List[float]) -> None:
+        classes = [classify(transaction) for transaction in transactions]
+        with self._lock:
+            for priority_class, latency in zip(classes, latencies):
+                self.latencies[priority_class].add(latency)
+
+    def record_expired(self, transactions: Iterable[Transaction]) -> None:
+        classes = [classify(transaction) for transaction in transactions]
+        with self._lock:
+            for priority_class in classes:
+                self.expired[priority_class] += 1
+
+    def export(self) -> dict:
+        with self._lock:
+            return {"latencies": [latencies.export() for latencies in self.latencies], "expired": list(self.expired)}
+
+    def load(self, state: dict) -> None:
+        with self._lock:
+            self.latencies = [Histogram.load(latencies) for latencies in state["latencies"]]
+            self.expired = list(state["expired"])
+
+    def report(self) -> None:
+        if not any(self.latencies) and not any(self.expired):
+            return
+        LOGGER.info(" - Escalonamento por prioridade (classe: peso, prazo):")
+        for priority_class, (spec, latencies, expired) in enumerate(zip(PRIORITY_CLASSES, self.latencies, self.expired)):
+            limit = deadline(priority_class)
+            latency = latencies.summary()
+            LOGGER.info(
+                f"   > {spec.name} ({spec.weight}, {f'{limit:.4f}s' if limit else 'sem prazo'}): "
+                f"{latency['count']} finalizadas, {expired} vencidas, latência p50 = {latency['p50']:.4f}s, "
+                f"p95 = {latency['p95']:.4f}s, p99 = {latency['p99']:.4f}s"
+            )
+        LOGGER.info("\n")
@@ -0,0 +1,231 @@
+from collections import Counter
+from threading import Event, Thread
+from typing import Dict, List, Optional, Tuple
+
+import globals as config
+from utils.currency import Currency
+from utils.lock_manager import BLOCK, LOCK_MANAGER
+from utils.lock_profiler import make_lock
+from utils.logger import LOGGER
+
+
+class _Position:
+    """
+    Posição ainda não liquidada da reserva de um banco em uma moeda, com seu próprio lock.
+    `known` é o saldo da reserva já somado às liquidações desta posição (lido da reserva uma única
+    vez, quando a posição é criada), e `pending` é a soma dos débitos e créditos ainda não aplicados.
+    """
+
+    def __init__(self, name: str, balance: int):
+        self.lock = make_lock(name)
+        self.known = balance
+        self.pending = 0
+        self.movements = 0
+        self.rejected = 0
+        self.corridors: Counter = Counter()
+
+
+class BatchSettlement(Thread):
+    """
+    Uma classe para liquidar em lotes as movimentações de reservas das transferências internacionais.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Sem a liquidação em lotes, cada transferência internacional trava a reserva da moeda de destino
+    (para debitar o valor convertido) e a da moeda de origem (para creditar o valor cobrado) do
+    banco de origem. Com ela, as contas dos clientes continuam sendo debitadas e creditadas na hora,
+    mas as movimentações das reservas são apenas somadas na posição da reserva (banco de origem,
+    moeda). A cada `interval` segundos, a soma dos débitos e créditos de cada reserva é aplicada de
+    uma só vez (uma aquisição dos locks da reserva por moeda, em vez de duas por transferência).
+    Não há compensação bilateral entre bancos: as duas pernas de uma transferência movimentam
+    reservas do próprio banco de origem, então o que se compensa são os débitos e os créditos de
+    uma mesma reserva dentro do lote.
+
+    Cada posição tem o seu próprio lock, então transferências em reservas diferentes não disputam
+    nenhum lock. settle() troca a soma pendente de cada posição por zero com o lock da posição e só
+    depois, já sem ele, aplica a soma à reserva (travando as subcontas da reserva).
+
+    As reservas nunca ficam negativas: um débito só é aceito se o saldo conhecido da reserva mais a
+    soma pendente cobrir o valor. Como, com a liquidação em lotes ativa, as reservas só mudam pelas
+    liquidações, e cada liquidação é somada ao saldo conhecido no mesmo momento em que deixa de estar
+    pendente, a aceitação nunca lê a reserva durante uma liquidação.
+
+    ...
+
+    Atributos
+    ---------
+    interval : float
+        Intervalo (em segundos) entre duas liquidações.
+    rounds : int
+        Quantidade de liquidações que aplicaram alguma posição.
+    reserve_updates : int
+        Quantidade de atualizações de reservas feitas pelas liquidações.
+
+    Métodos
+    -------
+    run():
+        Liquida as posições a cada `interval` segundos, até stop().
+    reserve(bank_id: int, destination_bank: int, currency: Currency, amounts: List[int]) -> List[bool]:
+        Aceita (ou recusa) débitos da reserva de `bank_id` na moeda `currency`.
+    credit(bank_id: int, destination_bank: int, currency: Currency, amount: int, count: int = 1) -> None:
+        Registra um crédito (de `count` movimentações) na reserva de `bank_id` na moeda `currency`.
+    settle() -> int:
+        Aplica as somas pendentes às reservas e retorna quantas reservas foram atualizadas.
+    stats() -> dict:
+        Retorna as movimentações registradas, os débitos recusados e as movimentações por corredor.
+    stop() -> None:
+        Interrompe as liquidações periódicas e liquida as posições restantes.
+    report() -> None:
+        Printa as estatísticas da liquidação em lotes.
+    """
+
+    def __init__(self, interval: float):
+        Thread.__init__(self, name="BatchSettlement", daemon=True)
+        self.interval = interval
+        self.rounds = 0
+        self.reserve_updates = 0
+
+        self._positions: Dict[Tuple[int, Currency], _Position] = {}
+        self._positions_lock = make_lock("liquidação: posições")
+        self._stopped = Event()
+
+    def _reserve_of(self, bank_id: int, currency: Currency):
+        return getattr(config.banks[bank_id].reserves, currency.name)
+
+    def _position(self, bank_id: int, currency: Currency) -> _Position:
+        position = self._positions.get((bank_id, currency))
+        if position is None:
+            with self._positions_lock:
+                position = self._positions.get((bank_id, currency))
+                if position is None:
+                    position = _Position(
+                        f"liquidação: banco {bank_id}, {currency.name}", self._reserve_of(bank_id, currency).balance
+                    )
+                    self._positions[(bank_id, currency)] = position
+        return position
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.settle()
+
+    def reserve(self, bank_id: int, destination_bank: int, currency: Currency, amounts: List[int]) -> List[bool]:
+        """
+        Aceita, na ordem, os débitos `amounts` da reserva do banco `bank_id` na moeda `currency`
+        (transferências para o banco `destination_bank`) enquanto o saldo conhecido da reserva mais a
+        soma pendente os cobrir. Retorna, para cada débito, se ele foi aceito.
+        """
+        position = self._position(bank_id, currency)
+        accepted = []
+        with position.lock:
+            available = position.known + position.pending
+            total = 0
+            for amount in amounts:
+                ok = available - total >= amount
+                if ok:
+                    total += amount
+                else:
+                    position.rejected += 1
+                accepted.append(ok)
+            if total:
+                count = accepted.count(True)
+                position.pending -= total
+                position.movements += count
+                position.corridors[destination_bank] += count
+        return accepted
+
+    def credit(self, bank_id: int, destination_bank: int, currency: Currency, amount: int, count: int = 1) -> None:
+        """
+        Registra o crédito de `amount` (a soma de `count` movimentações) na reserva do banco
+        `bank_id` na moeda `currency`, vindo de transferências para o banco `destination_bank`.
+        """
+        position = self._position(bank_id, currency)
+        with position.lock:
+            position.pending += amount
+            position.movements += count
+            position.corridors[destination_bank] += count
+
+    def settle(self) -> int:
+        """
+        Aplica a soma pendente de cada reserva com movimentações, travando as subcontas da reserva
+        uma única vez. Cada posição é zerada com o seu lock, que é solto antes de a reserva ser
+        travada. Retorna a quantidade de reservas atualizadas.
+        """
+        with self._positions_lock:
+            positions = list(self._positions.items())
+        updated = 0
+        for (bank_id, currency), position in positions:
+            with position.lock:
+                amount, position.pending = position.pending, 0
+                position.known += amount
+            if not amount:
+                continue
+            reserve = self._reserve_of(bank_id, currency)
+            with LOCK_MANAGER.hold(*reserve.stripes, timeout=BLOCK):
+                reserve.balance = reserve.balance + amount
+            updated += 1
+        if updated:
+            self.rounds += 1
+            self.reserve_updates += updated
+        return updated
+
+    def stats(self) -> dict:
+        with self._positions_lock:
+            positions = list(self._positions.items())
+        movements = rejected = 0
+        corridors: Counter = Counter()
+        for (bank_id, _), position in positions:
+            with position.lock:
+                movements += position.movements
+                rejected += position.rejected
+                for destination_bank, count in position.corridors.items():
+                    corridors[(bank_id, destination_bank)] += count
+        return {"movements": movements, "rejected": rejected, "corridors": corridors}
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        self.settle()
+
+    def report(self) -> None:
+        stats = self.stats()
+        ratio = stats["movements"] / self.reserve_updates if self.reserve_updates else 0.0
+        LOGGER.info(
+            f"Liquidação em lotes: {stats['movements']} movimentações de reservas liquidadas com "
+            f"{self.reserve_updates} atualizações de reservas em {self.rounds} rodadas ({ratio:.1f}x menos), "
+            f"{stats['rejected']} débitos recusados por reserva insuficiente"
+        )
+        for (origin, destination), count in stats["corridors"].most_common(5):
+            LOGGER.info(f"   > Banco {origin} -> Banco {destination}: {count} movimentações")
+
+
+# Liquidação em lotes em uso pelos processadores deste processo (None = reservas movimentadas a cada
+# transferência)
+_settlement: Optional[BatchSettlement] = None
+
+
+def start_settlement(interval: float) -> BatchSettlement:
+    """
+    Ativa a liquidação em lotes das movimentações de reservas neste processo, com liquidações a cada
+    `interval` segundos.
+    """
+    global _settlement
+    _settlement = BatchSettlement(interval)
+    _settlement.start()
+    LOGGER.info(f"Liquidação em lotes ativa: posições liquidadas a cada {interval:.4f}s")
+    return _settlement
+
+
+def get_settlement() -> Optional[BatchSettlement]:
+    return _settlement
+
+
+def stop_settlement() -> Optional[BatchSettlement]:
+    """
+    Liquida as posições restantes, desativa a liquidação em lotes e retorna o BatchSettlement que
+    estava ativo.
+    """
+    global _settlement
+    settlement, _settlement = _settlement, None
+    if settlement is not None:
+        settlement.stop()
+    return settlement
@@ -0,0 +1,349 @@
+import multiprocessing
+import random
+from logging import DEBUG, INFO
+from threading import Thread
+from typing import List
+
+import globals as config
+from payment_system.bank import Bank
+from payment_system.ingest import TransferBatch
+from payment_system.journal import close_journal, open_journal
+from payment_system.settlement import start_settlement, stop_settlement
+from payment_system.trace import start_trace, stop_trace
+from payment_system.workers import start_bank_workers, stop_bank_workers
+from utils.currency import Currency
+from utils.exchange_rates import start_rate_schedule
+from utils.lock_manager import BLOCK, LOCK_MANAGER
+from utils.lock_profiler import enable_lock_profiling, report_lock_profile
+from utils.logger import CH, LOGGER, disable_async_logging, enable_async_logging, set_log_sampling
+from utils.metrics import METRICS, start_metrics_server, stop_metrics_server
+
+
+class RemoteAccount:
+    """
+    Uma classe para representar, dentro de um shard, a conta de um banco que roda em outro processo.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Contas remotas só recebem depósitos (o destino de uma transferência internacional): o depósito
+    é enviado como mensagem para a caixa de entrada do shard dono da conta, que o aplica com o lock
+    da conta real. Por isso lock() sempre tem sucesso imediato e unlock() não faz nada.
+
+    ...
+
+    Atributos
+    ---------
+    _id : int
+        Identificador da conta bancária.
+    _bank_id : int
+        Identificador do banco (remoto) da conta.
+    currency : Currency
+        Moeda corrente da conta bancária.
+    lock_key : tuple
+        Chave global (bank_id, account_id) da conta, usada pelo LOCK_MANAGER.
+
+    Métodos
+    -------
+    deposit(amount: int) -> bool:
+        Envia um depósito de `amount` para o shard dono da conta.
+    lock(timeout: float = -1) -> bool:
+        Retorna True (o lock real é adquirido pelo shard dono da conta).
+    unlock() -> None:
+        Não faz nada (o lock real é adquirido pelo shard dono da conta).
+    """
+
+    def __init__(self, _id: int, _bank_id: int, currency: Currency, outbox):
+        self._id = _id
+        self._bank_id = _bank_id
+        self.currency = currency
+        self.lock_key = (_bank_id, _id)
+        self._outbox = outbox
+
+    def deposit(self, amount: int) -> bool:
+        self._outbox.put(("deposit", self._id, amount))
+        return True
+
+    def lock(self, timeout: float = -1) -> bool:
+        return True
+
+    def unlock(self):
+        pass
+
+
+class RemoteAccounts:
+    """
+    Sequência das contas de um banco remoto. As RemoteAccounts são criadas sob demanda, de modo que
+    bancos remotos com milhões de contas não ocupam memória no shard.
+    """
+
+    def __init__(self, bank_id: int, currency: Currency, n_accounts: int, outbox):
+        self.bank_id = bank_id
+        self.currency = currency
+        self.n_accounts = n_accounts
+        self._outbox = outbox
+
+    def __len__(self) -> int:
+        return self.n_accounts
+
+    def __getitem__(self, index: int) -> RemoteAccount:
+        if not 0 <= index < self.n_accounts:
+            raise IndexError("remote account index out of range")
+        return RemoteAccount(index + 1, self.bank_id, self.currency, self._outbox)
+
+
+class RemoteBank:
+    """
+    Uma classe para representar, dentro de um shard, um banco que roda em outro processo.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    _id : int
+        Identificador do banco.
+    currency : Currency
+        Moeda corrente das contas bancárias do banco.
+    accounts : RemoteAccounts
+        Contas do banco, acessíveis apenas para depósito.
+
+    Métodos
+    -------
+    count_international(n: int = 1) -> None:
+        Envia ao shard dono do banco um incremento do contador de transações internacionais.
+    """
+
+    def __init__(self, _id: int, currency: Currency, n_accounts: int, outbox):
+        self._id = _id
+        self.currency = currency
+        self.accounts = RemoteAccounts(_id, currency, n_accounts, outbox)
+        self._outbox = outbox
+
+    def count_international(self, n: int = 1) -> None:
+        self._outbox.put(("count_international", n))
+
+
+class ShardInbox(Thread):
+    """
+    Uma classe para aplicar, no shard dono do banco, as mensagens enviadas pelos outros shards.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    A thread termina depois de receber a mensagem "done" de todos os outros shards; como as
+    mensagens de um mesmo processo chegam em ordem, nesse momento todos os depósitos já foram
+    aplicados.
+
+    ...
+
+    Atributos
+    ---------
+    bank : Bank
+        Banco local do shard.
+    inbox : multiprocessing.Queue
+        Caixa de entrada de mensagens do shard.
+    peers : int
+        Quantidade de outros shards.
+
+    Métodos
+    -------
+    run():
+        Aplica as mensagens recebidas até que todos os outros shards tenham terminado.
+    """
+
+    def __init__(self, bank: Bank, inbox, peers: int):
+        Thread.__init__(self)
+        self.bank = bank
+        self.inbox = inbox
+        self.peers = peers
+
+    def run(self):
+        done = 0
+        while done < self.peers:
+            message = self.inbox.get()
+            if message[0] == "deposit":
+                acc = self.bank.accounts[message[1] - 1]
+                with LOCK_MANAGER.hold(acc, timeout=BLOCK):
+                    acc.deposit(message[2])
+            elif message[0] == "count_international":
+                self.bank.count_international(message[1])
+            elif message[0] == "done":
+                done += 1
+
+
+def shard_trace_file(trace_file: str, bank_id: int) -> str:
+    """
+    Retorna o arquivo onde o shard do banco `bank_id` grava seu trace.
+    """
+    return f"{trace_file}.shard-{bank_id}"
+
+
+def run_shard(bank_id: int, states: List[dict], settings: dict, inboxes: list, results, stop_event) -> None:
+    """
+    Ponto de entrada do processo de um shard: reconstrói o banco `bank_id` a partir de `states`,
+    executa seu gerador e seus processadores até `stop_event` ser sinalizado e envia o estado
+    final do banco para `results`.
+    """
+    # cada processo precisa da própria semente (com fork, todos herdariam a do processo pai)
+    random.seed(None if settings["seed"] is None else f"{settings['seed']}-shard-{bank_id}")
+    config.seed = settings["seed"]
+    config.time_unit = settings["time_unit"]
+    config.concurrency = settings["concurrency"]
+    config.first_transaction_id = settings["first_transaction_id"]
+    config.scheduler = settings["scheduler"]
+    config.sla_deadline = settings["sla_deadline"]
+    config.large_amount = settings["large_amount"]
+    LOGGER.setLevel(DEBUG if settings["debug"] else INFO)
+    CH.setLevel(DEBUG if settings["debug"] else INFO)
+    set_log_sampling(settings["log_sample"], settings["log_rate"])
+    if settings["log_mode"] == "async":
+        # a thread escritora do processo principal não existe neste processo
+        enable_async_logging()
+    if settings["lock_profile"]:
+        enable_lock_profiling()
+    if settings["lock_stats"]:
+        LOCK_MANAGER.enable_stats()
+
+    bank = Bank(
+        _id=bank_id,
+        currency=Currency(states[bank_id]["currency"]),
+        queue_capacity=settings["queue_capacity"],
+        reserve_stripes=settings["reserve_stripes"],
+        ledger=settings["ledger"],
+        priority=settings["scheduler"] == "priority",
+    )
+    bank.load_state(states[bank_id])
+    bank.latency.keep_records = settings["latency_export"]
+
+    # a lista global de bancos do shard tem o banco local e representantes dos bancos remotos
+    config.banks.clear()
+    for state in states:
+        if state["_id"] == bank_id:
+            config.banks.append(bank)
+        else:
+            config.banks.append(
+                RemoteBank(state["_id"], Currency(state["currency"]), state["n_accounts"], inboxes[state["_id"]])
+            )
+
+    rate_scheduler = start_rate_schedule(settings["rate_schedule"], settings["time_unit"])
+
+    # as transferências internacionais só movimentam as reservas do banco de origem (o local)
+    if settings["settlement_interval"]:
+        start_settlement(settings["settlement_interval"])
+
+    # os depósitos recebidos pela caixa de entrada já estão no journal do shard de origem
+    if settings["journal_dir"]:
+        open_journal(settings["journal_dir"], f"shard-{bank_id}")
+
+    # cada shard grava seu próprio trace; o processo principal junta os traces ao final
+    if settings["trace_file"]:
+        start_trace(shard_trace_file(settings["trace_file"], bank_id), settings["time_unit"])
+
+    # cada shard serve as métricas do seu próprio banco
+    metrics_server = None
+    if settings["metrics_port"]:
+        METRICS.register(bank.metrics)
+        metrics_server = start_metrics_server(METRICS, settings["metrics_port"] + 1 + bank_id)
+
+    inbox = ShardInbox(bank, inboxes[bank_id], peers=len(states) - 1)
+    inbox.start()
+
+    start_bank_workers(
+        bank,
+        min_processors=settings["min_processors"],
+        max_processors=settings["max_processors"],
+        batch_size=settings["batch_size"],
+        batch_wait=settings["batch_wait"],
+        trace=None if settings["trace"] is None else settings["trace"].get(bank_id, []),
+        replay_speed=settings["replay_speed"],
+        workload=settings["workload"],
+        ingest=None if settings["ingest"] is None else settings["ingest"].get(bank_id, TransferBatch()),
+        ingest_batch=settings["ingest_batch"],
+    )
+    stop_event.wait()
+    stop_bank_workers([bank])
+    close_journal()
+    stop_trace()
+    stop_metrics_server(metrics_server)
+    if rate_scheduler is not None:
+        rate_scheduler.stop()
+
+    # avisa os outros shards que nenhuma mensagem nova sairá daqui e espera os avisos deles
+    for other in config.banks:
+        if other is not bank:
+            inboxes[other._id].put(("done", bank_id))
+    inbox.join()
+    settlement = stop_settlement()
+
+    if settings["lock_stats"] or settings["lock_profile"] or settlement is not None:
+        LOGGER.info(f"Shard do Banco {bank_id}:")
+    if settings["lock_stats"]:
+        LOCK_MANAGER.report()
+    if settings["lock_profile"]:
+        report_lock_profile()
+    if settlement is not None:
+        settlement.report()
+    results.put(bank.export_state())
+    disable_async_logging()
+
+
+class ShardedEngine:
+    """
+    Uma classe para executar cada Banco em seu próprio processo (shard).
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Cada shard recebe o estado inicial do seu banco e roda seu gerador e seus processadores em
+    threads locais, escapando do GIL do processo principal. Transferências internacionais
+    creditam a conta de destino por meio de mensagens para a caixa de entrada do shard dono do
+    banco de destino. Ao final, os estados dos shards são reconciliados nos objetos Bank do
+    processo principal, de modo que Bank.info() funcione como no modo com threads.
+
+    ...
+
+    Atributos
+    ---------
+    banks : List[Bank]
+        Bancos do processo principal (estado inicial e, após stop(), estado final).
+    settings : dict
+        Parâmetros da simulação repassados aos shards.
+    processes : List[multiprocessing.Process]
+        Processos dos shards.
+
+    Métodos
+    -------
+    start() -> None:
+        Inicia um processo por banco.
+    stop() -> None:
+        Encerra os shards e reconcilia o estado final nos bancos do processo principal.
+    """
+
+    def __init__(self, banks: List[Bank], settings: dict):
+        self.banks = banks
+        self.settings = settings
+        self.processes: List[multiprocessing.Process] = []
+        self._inboxes = [multiprocessing.Queue() for _ in banks]
+        self._results = multiprocessing.Queue()
+        self._stop_event = multiprocessing.Event()
+
+    def start(self) -> None:
+        states = [bank.export_state() for bank in self.banks]
+        for state in states:
+            # estatísticas de fila não fazem sentido antes da simulação
+            del state["queue"], state["pending"]
+
+        for bank in self.banks:
+            process = multiprocessing.Process(
+                target=run_shard,
+                args=(bank._id, states, self.settings, self._inboxes, self._results, self._stop_event),
+                name=f"Shard-{bank._id}",
+            )
+            self.processes.append(process)
+            process.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+        # os resultados precisam ser lidos antes do join, senão um shard pode travar ao enviá-los
+        for _ in self.processes:
+            state = self._results.get()
+            self.banks[state["_id"]].load_state(state)
+
+        for process in self.processes:
+            process.join()
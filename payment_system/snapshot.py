@@ -0,0 +1,101 @@
+import mmap
+import os
+import struct
+from array import array
+from typing import List
+
+from utils.currency import Currency
+
+
+# Formato do snapshot: cabeçalho do arquivo, um cabeçalho de tamanho fixo por banco e, depois, os
+# arrays de saldos e de limites de cheque especial de cada banco (inteiros de 8 bytes, alinhados),
+# exatamente como ficam na memória de um AccountLedger.
+MAGIC = b"BANKSNP1"
+_FILE_HEADER = struct.Struct("<8sI4x")
+_BANK_HEADER = struct.Struct("<iiq6qqqqqqq")
+
+
+def write_snapshot(path: str, states: List[dict]) -> int:
+    """
+    Grava em `path` o estado de todos os bancos (gerados por Bank.export_state(), com o banco
+    parado) usando um arquivo mapeado em memória. Retorna o tamanho do arquivo em bytes.
+    """
+    arrays = []
+    for state in states:
+        accounts = state["accounts"]
+        if isinstance(accounts, tuple):
+            arrays.append(accounts)
+        else:
+            arrays.append((
+                array("q", (balance for balance, _ in accounts)),
+                array("q", (overdraft_limit for _, overdraft_limit in accounts)),
+            ))
+
+    offset = _FILE_HEADER.size + _BANK_HEADER.size * len(states)
+    offsets = []
+    for balances, _ in arrays:
+        offsets.append(offset)
+        offset += 2 * 8 * len(balances)
+    size = offset
+
+    with open(path, "wb+") as file:
+        file.truncate(size)
+        with mmap.mmap(file.fileno(), size) as mm:
+            _FILE_HEADER.pack_into(mm, 0, MAGIC, len(states))
+            for i, (state, (balances, overdraft_limits), start) in enumerate(zip(states, arrays, offsets)):
+                _BANK_HEADER.pack_into(
+                    mm,
+                    _FILE_HEADER.size + i * _BANK_HEADER.size,
+                    state["_id"],
+                    state["currency"],
+                    len(balances),
+                    *(state["reserves"][currency.name] for currency in Currency),
+                    state["nacional_transactions"],
+                    state["internacional_transactions"],
+                    state["bank_profit"],
+                    state["overdraft_interest"],
+                    start,
+                    start + 8 * len(balances),
+                )
+                mm[start:start + 8 * len(balances)] = balances.tobytes()
+                mm[start + 8 * len(balances):start + 16 * len(balances)] = overdraft_limits.tobytes()
+            mm.flush()
+        os.fsync(file.fileno())
+    return size
+
+
+def read_snapshot(path: str, ledger: bool = False) -> List[dict]:
+    """
+    Mapeia o snapshot em `path` e retorna os estados dos bancos no formato de Bank.export_state().
+    Os arrays de contas são copiados do mapeamento de uma só vez, sem interpretar conta a conta;
+    apenas sem `ledger` eles são convertidos para a lista de tuplas (saldo, limite).
+    """
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, n_banks = _FILE_HEADER.unpack_from(mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} não é um snapshot de bancos")
+
+            states = []
+            for i in range(n_banks):
+                fields = _BANK_HEADER.unpack_from(mm, _FILE_HEADER.size + i * _BANK_HEADER.size)
+                bank_id, currency, n_accounts = fields[:3]
+                nacional, internacional, profit, interest, balances_at, overdrafts_at = fields[9:]
+
+                balances = array("q")
+                balances.frombytes(mm[balances_at:balances_at + 8 * n_accounts])
+                overdraft_limits = array("q")
+                overdraft_limits.frombytes(mm[overdrafts_at:overdrafts_at + 8 * n_accounts])
+
+                states.append({
+                    "_id": bank_id,
+                    "currency": currency,
+                    "reserves": {c.name: balance for c, balance in zip(Currency, fields[3:9])},
+                    "n_accounts": n_accounts,
+                    "accounts": (balances, overdraft_limits) if ledger else list(zip(balances, overdraft_limits)),
+                    "nacional_transactions": nacional,
+                    "internacional_transactions": internacional,
+                    "bank_profit": profit,
+                    "overdraft_interest": interest,
+                })
+    return states
@@ -0,0 +1,176 @@
+import csv
+import struct
+import time
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.currency import Currency
+from utils.logger import LOGGER
+from utils.transaction import Transaction
+
+
+# Formato do trace: MAGIC seguido de um registro de tamanho fixo por transação gerada, na ordem de
+# geração: instante (em unidades de tempo desde o início da gravação), banco e conta de origem,
+# banco e conta de destino, valor e moeda (Currency.value). Traces produzidos fora da simulação
+# também podem ser dados em CSV (extensão .csv), com as colunas de TRACE_COLUMNS e a moeda pelo nome.
+MAGIC = b"BANKTRC1"
+_ENTRY = struct.Struct("<diiiiqB")
+TRACE_COLUMNS = ["at", "origin_bank", "origin_account", "destination_bank", "destination_account", "amount", "currency"]
+
+# (instante, (banco, conta) de origem, (banco, conta) de destino, valor, moeda)
+TraceEntry = Tuple[float, Tuple[int, int], Tuple[int, int], int, Currency]
+
+
+def _read_binary(path: str) -> Iterator[TraceEntry]:
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} não é um trace de transações")
+    # um registro incompleto no final (gravação interrompida) é ignorado
+    end = len(MAGIC) + (len(data) - len(MAGIC)) // _ENTRY.size * _ENTRY.size
+    for at, origin_bank, origin_acc, destiny_bank, destiny_acc, amount, currency in _ENTRY.iter_unpack(
+        data[len(MAGIC):end]
+    ):
+        yield at, (origin_bank, origin_acc), (destiny_bank, destiny_acc), amount, Currency(currency)
+
+
+def _read_csv(path: str) -> Iterator[TraceEntry]:
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            yield (
+                float(row["at"]),
+                (int(row["origin_bank"]), int(row["origin_account"])),
+                (int(row["destination_bank"]), int(row["destination_account"])),
+                int(row["amount"]),
+                Currency[row["currency"]],
+            )
+
+
+def read_trace(path: str) -> Dict[int, List[TraceEntry]]:
+    """
+    Lê o trace em `path` (binário ou .csv) e retorna as transações de cada banco de origem, na
+    ordem do trace.
+    """
+    entries = _read_csv(path) if path.endswith(".csv") else _read_binary(path)
+    trace: Dict[int, List[TraceEntry]] = {}
+    for entry in entries:
+        trace.setdefault(entry[1][0], []).append(entry)
+    return trace
+
+
+def write_trace(path: str, entries: List[TraceEntry]) -> None:
+    """
+    Grava `entries` em `path`, no formato binário ou, se a extensão for .csv, em CSV.
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(TRACE_COLUMNS)
+            for at, origin, destination, amount, currency in entries:
+                writer.writerow([repr(at), *origin, *destination, amount, currency.name])
+        return
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        for at, origin, destination, amount, currency in entries:
+            file.write(_ENTRY.pack(at, *origin, *destination, amount, currency.value))
+
+
+def merge_traces(paths: List[str], path: str) -> int:
+    """
+    Junta os traces `paths` (ex.: um por shard) em um único trace `path`, ordenado pelo instante
+    das transações. Retorna a quantidade de transações.
+    """
+    entries = []
+    for part in paths:
+        for bank_entries in read_trace(part).values():
+            entries.extend(bank_entries)
+    entries.sort(key=lambda entry: entry[0])
+    write_trace(path, entries)
+    return len(entries)
+
+
+def validate_trace(trace: Dict[int, List[TraceEntry]], banks: List) -> None:
+    """
+    Verifica se todas as contas referenciadas pelo trace existem nos bancos `banks`.
+    """
+    for entries in trace.values():
+        for _, origin, destination, _, _ in entries:
+            for bank_id, acc_id in (origin, destination):
+                if not 0 <= bank_id < len(banks) or not 1 <= acc_id <= len(banks[bank_id].accounts):
+                    raise ValueError(f"O trace referencia a conta inexistente {acc_id} do banco {bank_id}")
+
+
+class TraceRecorder:
+    """
+    Uma classe para gravar, em um trace binário, as transações geradas durante a simulação.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Os registros são escritos por um arquivo com buffer, protegido por um lock, já que todos os
+    geradores do processo gravam no mesmo trace.
+
+    ...
+
+    Atributos
+    ---------
+    path : str
+        Caminho do arquivo do trace.
+    time_unit : float
+        Unidade de tempo da simulação; os instantes são gravados em unidades de tempo, para que
+        o trace possa ser reproduzido com outra unidade de tempo.
+    recorded : int
+        Quantidade de transações gravadas.
+
+    Métodos
+    -------
+    record(transaction: Transaction) -> None:
+        Grava uma transação, com o instante atual.
+    close() -> None:
+        Grava os registros pendentes e fecha o arquivo.
+    """
+
+    def __init__(self, path: str, time_unit: float):
+        self.path = path
+        self.time_unit = time_unit
+        self.recorded = 0
+        self._start = time.monotonic()
+        self._lock = Lock()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+
+    def record(self, transaction: Transaction) -> None:
+        at = (time.monotonic() - self._start) / self.time_unit
+        data = _ENTRY.pack(
+            at, *transaction.origin, *transaction.destination, transaction.amount, transaction.currency.value
+        )
+        with self._lock:
+            self._file.write(data)
+            self.recorded += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        LOGGER.info(f"Trace {self.path}: {self.recorded} transações gravadas")
+
+
+# Trace do processo (None = desativado)
+_recorder: Optional[TraceRecorder] = None
+
+
+def start_trace(path: str, time_unit: float) -> TraceRecorder:
+    """
+    Começa a gravar em `path` as transações geradas pelo processo.
+    """
+    global _recorder
+    _recorder = TraceRecorder(path, time_unit)
+    return _recorder
+
+
+def get_trace_recorder() -> Optional[TraceRecorder]:
+    return _recorder
+
+
+def stop_trace() -> None:
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
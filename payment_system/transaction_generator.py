@@ -1,14 +1,27 @@
-from random import randint
+import random
 import time
 from threading import Thread
+from typing import List, Optional
 
 from globals import *
-from payment_system.bank import Bank
+import globals as config
+from payment_system.bank import Bank, submit_transaction
+from payment_system.ingest import TransferBatch
+from payment_system.trace import TraceEntry
+from payment_system.workload import WorkloadProfile
 from utils.transaction import Transaction
-from utils.currency import Currency
 from utils.logger import LOGGER
 
 
+def generator_rng(bank_id: int) -> random.Random:
+    """
+    Retorna o gerador de números aleatórios do gerador de transações do banco `bank_id`: com uma
+    semente (config.seed), cada banco gera sempre a mesma sequência de transações, independente
+    da ordem em que as threads (ou processos) rodam.
+    """
+    return random.Random(None if config.seed is None else f"{config.seed}-{bank_id}")
+
+
 class TransactionGenerator(Thread):
     """
     Uma classe para gerar e simular clientes de um banco por meio da geracão de transações bancárias.
@@ -22,6 +35,10 @@ class TransactionGenerator(Thread):
         Identificador do gerador de transações.
     bank: Bank
         Banco sob o qual o gerador de transações operará.
+    rng : random.Random
+        Gerador de números aleatórios das transações (ver generator_rng()).
+    workload : WorkloadProfile
+        Perfil da carga gerada (contas, bancos de destino e chegadas das transações).
 
     Métodos
     -------
@@ -29,10 +46,12 @@ class TransactionGenerator(Thread):
         ....
     """
 
-    def __init__(self, _id: int, bank: Bank):
+    def __init__(self, _id: int, bank: Bank, workload: Optional[WorkloadProfile] = None):
         Thread.__init__(self)
         self._id  = _id
         self.bank = bank
+        self.rng = generator_rng(bank._id)
+        self.workload = workload or WorkloadProfile()
 
 
     def run(self):
@@ -44,19 +63,126 @@ class TransactionGenerator(Thread):
 
         LOGGER.info(f"Inicializado TransactionGenerator para o Banco Nacional {self.bank._id}!")
 
+        queue = self.bank.transaction_queue
+        start = next_arrival = time.monotonic()
         i = 0
         while banks[self.bank._id].operating:
-            origin = (self.bank._id, randint(1, 20))
-            destination_bank = randint(0, 5)
-            destination = (destination_bank, randint(1, 20))
-            amount = randint(100, 100_000)
-            
-            new_transaction = Transaction(i, origin, destination, amount, currency=Currency(destination_bank+1))
-
-            banks[self.bank._id].transaction_queue.append(new_transaction)
-            banks[self.bank._id].queue_semaphore.release()
-            i=+1
-            time.sleep(0.2 * time_unit)
+            new_transaction = self.workload.transaction(self.bank._id, config.first_transaction_id + i, self.rng)
+
+            # malha fechada: bloqueia enquanto a fila estiver cheia (backpressure); malha aberta: a
+            # transação é recusada se a fila estiver cheia. Falha sempre se a fila for fechada.
+            if queue.put(new_transaction, block=not self.workload.open_loop):
+                submit_transaction(new_transaction)
+                i += 1
+            elif queue.closed:
+                break
+
+            # em malha aberta, as chegadas seguem o seu próprio relógio, sem acumular atrasos
+            interval = self.workload.next_interval(self.rng, time.monotonic() - start)
+            if self.workload.open_loop:
+                next_arrival += interval
+                interval = next_arrival - time.monotonic()
+            if interval > 0:
+                time.sleep(interval)
 
         LOGGER.info(f"O TransactionGenerator {self._id} do banco {self.bank._id} foi finalizado.")
 
+
+
+class TraceReplayGenerator(TransactionGenerator):
+    """
+    Uma classe para reproduzir, na fila de um banco, as transações de um trace gravado (ou
+    produzido fora da simulação), nos seus instantes originais divididos por `speed`.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    trace : List[TraceEntry]
+        Transações do trace com origem no banco, na ordem em que serão enfileiradas.
+    speed : float
+        Fator de aceleração do trace (1 = ritmo original, 0 = o mais rápido possível).
+
+    Métodos
+    -------
+    run():
+        Enfileira as transações do trace enquanto o banco estiver em operação.
+    """
+
+    def __init__(self, _id: int, bank: Bank, trace: List[TraceEntry], speed: float = 1.0):
+        TransactionGenerator.__init__(self, _id, bank)
+        self.trace = trace
+        self.speed = speed
+
+    def run(self):
+        LOGGER.info(
+            f"Inicializado TraceReplayGenerator para o Banco Nacional {self.bank._id} ({len(self.trace)} transações)!"
+        )
+
+        start = time.monotonic()
+        i = 0
+        for at, origin, destination, amount, currency in self.trace:
+            if self.speed:
+                delay = start + at * config.time_unit / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if not self.bank.operating:
+                break
+            transaction = Transaction(config.first_transaction_id + i, origin, destination, amount, currency=currency)
+            if not self.bank.transaction_queue.put(transaction):
+                break
+            submit_transaction(transaction)
+            i += 1
+
+        LOGGER.info(f"O TraceReplayGenerator {self._id} do banco {self.bank._id} reproduziu {i} transações.")
+
+
+
+class IngestGenerator(TransactionGenerator):
+    """
+    Uma classe para submeter à fila de um banco, em lotes, as transferências de um arquivo (ver
+    payment_system.ingest), no lugar das transações aleatórias.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    batch : TransferBatch
+        Transferências com origem no banco, na ordem em que serão enfileiradas.
+    chunk_size : int
+        Quantidade de transferências submetidas por chamada de Bank.submit_batch().
+
+    Métodos
+    -------
+    run():
+        Submete os lotes de transferências enquanto o banco estiver em operação.
+    """
+
+    def __init__(self, _id: int, bank: Bank, batch: TransferBatch, chunk_size: int = 1000):
+        TransactionGenerator.__init__(self, _id, bank)
+        self.batch = batch
+        self.chunk_size = max(chunk_size, 1)
+
+    def run(self):
+        LOGGER.info(
+            f"Inicializado IngestGenerator para o Banco Nacional {self.bank._id} ({len(self.batch)} transferências)!"
+        )
+
+        submitted = rejected = 0
+        for start in range(0, len(self.batch), self.chunk_size):
+            if not self.bank.operating:
+                break
+            chunk = self.batch.slice(start, start + self.chunk_size)
+            enqueued, refused = self.bank.submit_batch(chunk)
+            submitted += enqueued
+            rejected += len(refused)
+            if enqueued + len(refused) < len(chunk):
+                # a fila foi fechada: a simulação acabou
+                break
+
+        LOGGER.info(
+            f"O IngestGenerator {self._id} do banco {self.bank._id} enfileirou {submitted} transferências"
+            + (f" ({rejected} recusadas)." if rejected else ".")
+        )
@@ -0,0 +1,291 @@
+import time
+from collections import deque
+from threading import Condition
+from typing import List, Optional, Tuple
+
+from payment_system.latency import DEQUEUED, ENQUEUED, LatencyTracker
+from payment_system.scheduler import PriorityItems
+from utils.lock_profiler import make_lock
+from utils.stats import Histogram
+from utils.transaction import Transaction
+
+
+class TransactionQueue:
+    """
+    Uma fila FIFO limitada de transações bancárias, com suporte a backpressure.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Enfileirar e desenfileirar são O(1) (`deque.append` / `deque.popleft`) e a região
+    crítica se resume a essas operações, então produtores e consumidores quase nunca
+    disputam o mutex por muito tempo. Com `priority`, as transações esperam em uma fila por classe
+    de prioridade e são retiradas por round-robin ponderado (ver PriorityItems), também em O(1).
+
+    ...
+
+    Atributos
+    ---------
+    capacity : int
+        Quantidade máxima de transações na fila (0 = ilimitada).
+    priority : bool
+        Indica se as transações são retiradas por classe de prioridade em vez de na ordem de chegada.
+    closed : bool
+        Indica se a fila foi fechada (nenhuma transação entra ou sai após o fechamento).
+    enqueued : int
+        Quantidade de transações enfileiradas.
+    dequeued : int
+        Quantidade de transações retiradas da fila para processamento.
+    rejected : int
+        Quantidade de transações recusadas (fila cheia ou fechada).
+    max_depth : int
+        Maior tamanho atingido pela fila.
+    put_wait_time : float
+        Tempo total (em segundos) que produtores ficaram bloqueados esperando espaço na fila.
+    queue_wait_time : float
+        Tempo total (em segundos) que as transações retiradas ficaram esperando na fila.
+    wait_histogram : Histogram
+        Distribuição do tempo (em segundos) que as transações retiradas ficaram esperando na fila.
+    latency : Optional[LatencyTracker]
+        Onde os instantes de entrada e de saída das transações são registrados (None = em nenhum).
+
+    Métodos
+    -------
+    put(transaction: Transaction, block: bool = True, timeout: Optional[float] = None) -> bool:
+        Enfileira uma transação, bloqueando enquanto a fila estiver cheia.
+    put_batch(transactions: List[Transaction], block: bool = True, timeout: Optional[float] = None) -> int:
+        Enfileira várias transações de uma só vez, com uma única notificação por trecho enfileirado.
+    get(block: bool = True, timeout: Optional[float] = None) -> Optional[Transaction]:
+        Retira a transação mais antiga da fila.
+    get_batch(max_items: int, max_wait: float = 0.0, block: bool = True, timeout: Optional[float] = None) -> List[Transaction]:
+        Retira até `max_items` transações da fila de uma só vez.
+    close() -> None:
+        Fecha a fila e acorda todas as threads bloqueadas nela.
+    pending() -> Tuple[int, float]:
+        Retorna a quantidade de transações na fila e o tempo médio que estão esperando.
+    class_depths() -> List[int]:
+        Retorna a quantidade de transações na fila em cada classe de prioridade.
+    stats() -> dict:
+        Retorna os contadores da fila.
+    load_stats(stats: dict, pending: Tuple[int, float]) -> None:
+        Substitui os contadores por valores observados em outra fila (ex.: em outro processo).
+    """
+
+    def __init__(self, capacity: int = 0, priority: bool = False):
+        self.capacity = capacity
+        self.priority = priority
+        self.closed = False
+
+        self._items = PriorityItems() if priority else deque()
+        self._mutex = make_lock("fila de transações")
+        self._not_empty = Condition(self._mutex)
+        self._not_full = Condition(self._mutex)
+
+        # contadores de profundidade e tempo de espera
+        self.enqueued = 0
+        self.dequeued = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.put_wait_time = 0.0
+        self.queue_wait_time = 0.0
+        self.wait_histogram = Histogram()
+        self.latency: Optional[LatencyTracker] = None
+        self._loaded_pending: Optional[Tuple[int, float]] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _full(self) -> bool:
+        return self.capacity > 0 and len(self._items) >= self.capacity
+
+    def put(self, transaction: Transaction, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Enfileira `transaction`. Se a fila estiver cheia, o produtor é bloqueado (backpressure)
+        até que haja espaço, até `timeout` segundos ou até a fila ser fechada.
+        Com `block=False`, retorna imediatamente. Retorna se a transação foi enfileirada.
+        """
+        with self._not_full:
+            if self._full() and block and not self.closed:
+                start = time.monotonic()
+                self._not_full.wait_for(lambda: self.closed or not self._full(), timeout)
+                self.put_wait_time += time.monotonic() - start
+
+            if self.closed or self._full():
+                self.rejected += 1
+                return False
+
+            now = time.monotonic()
+            self._items.append((now, transaction))
+            if self.latency is not None:
+                self.latency.stamp((transaction,), ENQUEUED, now)
+            self.enqueued += 1
+            if len(self._items) > self.max_depth:
+                self.max_depth = len(self._items)
+            self._not_empty.notify()
+            return True
+
+    def put_batch(self, transactions: List[Transaction], block: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        Enfileira `transactions`, na ordem: cada trecho que cabe na fila é enfileirado de uma vez, sem
+        soltar o mutex, e os processadores são acordados com uma única notificação por trecho.
+        Se a fila encher, o produtor espera por espaço como em put() (no máximo `timeout` segundos
+        no total). Retorna quantas transações (as primeiras) foram enfileiradas; as demais são contadas
+        em `rejected`, como as recusas de put().
+        """
+        done = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_full:
+            while done < len(transactions) and not self.closed:
+                space = self.capacity - len(self._items) if self.capacity > 0 else len(transactions) - done
+                if space <= 0:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if not block or (remaining is not None and remaining <= 0):
+                        break
+                    start = time.monotonic()
+                    self._not_full.wait_for(lambda: self.closed or not self._full(), remaining)
+                    self.put_wait_time += time.monotonic() - start
+                    continue
+
+                chunk = transactions[done:done + space]
+                now = time.monotonic()
+                self._items.extend((now, transaction) for transaction in chunk)
+                if self.latency is not None:
+                    self.latency.stamp(chunk, ENQUEUED, now)
+                self.enqueued += len(chunk)
+                done += len(chunk)
+                if len(self._items) > self.max_depth:
+                    self.max_depth = len(self._items)
+                self._not_empty.notify(len(chunk))
+
+            # o restante do lote (fila cheia ou fechada) é recusado, como em put()
+            self.rejected += len(transactions) - done
+        return done
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[Transaction]:
+        """
+        Retira a transação mais antiga da fila. Retorna None caso a fila esteja vazia após
+        `timeout` segundos (ou imediatamente, com `block=False`) ou caso a fila tenha sido fechada.
+        """
+        with self._not_empty:
+            if not self._items and block and not self.closed:
+                self._not_empty.wait_for(lambda: self.closed or self._items, timeout)
+
+            if self.closed or not self._items:
+                return None
+
+            enqueued_at, transaction = self._items.popleft()
+            now = time.monotonic()
+            self.dequeued += 1
+            self.queue_wait_time += now - enqueued_at
+            self.wait_histogram.add(now - enqueued_at)
+            if self.latency is not None:
+                self.latency.stamp((transaction,), DEQUEUED, now)
+            self._not_full.notify()
+            return transaction
+
+    def get_batch(
+        self, max_items: int, max_wait: float = 0.0, block: bool = True, timeout: Optional[float] = None
+    ) -> List[Transaction]:
+        """
+        Retira até `max_items` transações da fila, na ordem de chegada (ou na do escalonador, com
+        `priority`). Espera pela primeira transação como get() e, depois dela, aguarda no máximo
+        `max_wait` segundos para completar o lote. Retorna uma lista vazia caso a fila esteja vazia
+        ou seja fechada.
+        """
+        with self._not_empty:
+            if not self._items and block and not self.closed:
+                self._not_empty.wait_for(lambda: self.closed or self._items, timeout)
+
+            if self.closed or not self._items:
+                return []
+
+            deadline = time.monotonic() + max_wait
+            batch = []
+            waits: List[float] = []
+            while len(batch) < max_items:
+                if not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait_for(lambda: self.closed or self._items, remaining)
+                    if self.closed:
+                        # a simulação acabou durante a espera: o lote volta para a fila sem ser processado
+                        self._items.extendleft(reversed(batch))
+                        return []
+                    if not self._items:
+                        break
+
+                enqueued_at, transaction = self._items.popleft()
+                waits.append(time.monotonic() - enqueued_at)
+                batch.append((enqueued_at, transaction))
+                self._not_full.notify()
+
+            # só as transações entregues ao processador contam (um lote devolvido à fila não)
+            self.dequeued += len(batch)
+            self.queue_wait_time += sum(waits)
+            self.wait_histogram.extend(waits)
+            transactions = [transaction for _, transaction in batch]
+            if self.latency is not None:
+                self.latency.stamp(transactions, DEQUEUED)
+            return transactions
+
+    def close(self) -> None:
+        """
+        Fecha a fila: produtores e consumidores bloqueados são acordados e as próximas
+        chamadas de put() e get() falham imediatamente.
+        """
+        with self._mutex:
+            self.closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def pending(self) -> Tuple[int, float]:
+        """
+        Retorna a quantidade de transações que continuam na fila e o tempo médio
+        (em segundos) que elas estão esperando.
+        """
+        with self._mutex:
+            if self._loaded_pending is not None:
+                return self._loaded_pending
+            now = time.monotonic()
+            waits: List[float] = [now - enqueued_at for enqueued_at, _ in self._items]
+        if not waits:
+            return 0, 0.0
+        return len(waits), sum(waits) / len(waits)
+
+    def class_depths(self) -> List[int]:
+        """
+        Retorna a quantidade de transações esperando em cada classe de prioridade (ver
+        PRIORITY_CLASSES). Sem `priority`, retorna apenas o tamanho da fila.
+        """
+        with self._mutex:
+            return self._items.depths() if self.priority else [len(self._items)]
+
+    def stats(self) -> dict:
+        """
+        Retorna um dicionário com os contadores de profundidade e tempo de espera da fila.
+        """
+        with self._mutex:
+            return {
+                "depth": self._loaded_pending[0] if self._loaded_pending is not None else len(self._items),
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dequeued": self.dequeued,
+                "rejected": self.rejected,
+                "put_wait_time": self.put_wait_time,
+                "queue_wait_time": self.queue_wait_time,
+                "mean_queue_wait": self.queue_wait_time / self.dequeued if self.dequeued else 0.0,
+            }
+
+    def load_stats(self, stats: dict, pending: Tuple[int, float] = (0, 0.0)) -> None:
+        """
+        Substitui os contadores da fila pelos de `stats` (gerado por stats()) e registra
+        `pending` como as transações que ficaram sem processamento. Usado para exibir, no
+        processo principal, as estatísticas de uma fila que operou em outro processo.
+        """
+        with self._mutex:
+            self.max_depth = stats["max_depth"]
+            self.enqueued = stats["enqueued"]
+            self.dequeued = stats["dequeued"]
+            self.rejected = stats["rejected"]
+            self.put_wait_time = stats["put_wait_time"]
+            self.queue_wait_time = stats["queue_wait_time"]
+            self._loaded_pending = pending
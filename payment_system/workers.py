@@ -0,0 +1,86 @@
+from typing import List, Optional
+
+import globals as config
+from payment_system.bank import Bank
+from payment_system.ingest import TransferBatch
+from payment_system.payment_processor import PaymentProcessor
+from payment_system.processor_supervisor import ProcessorSupervisor
+from payment_system.trace import TraceEntry
+from payment_system.transaction_generator import IngestGenerator, TraceReplayGenerator, TransactionGenerator
+from payment_system.workload import WorkloadProfile
+
+
+def start_bank_workers(
+    bank: Bank,
+    min_processors: int = 2,
+    max_processors: int = 2,
+    batch_size: int = 1,
+    batch_wait: float = 0.0,
+    trace: Optional[List[TraceEntry]] = None,
+    replay_speed: float = 1.0,
+    workload: Optional[WorkloadProfile] = None,
+    ingest: Optional[TransferBatch] = None,
+    ingest_batch: int = 1000,
+) -> None:
+    """
+    Coloca o banco em operação e inicia suas threads: um TransactionGenerator (ou, com `trace`, um
+    TraceReplayGenerator e, com `ingest`, um IngestGenerator que submete as transferências em lotes
+    de `ingest_batch`), `min_processors` PaymentProcessors e, se `max_processors` >
+    `min_processors`, um ProcessorSupervisor que ajusta a quantidade de processadores de acordo com
+    a fila do banco. `batch_wait` é dado em segundos; `workload` é o perfil da carga gerada.
+    """
+    bank.operating = True
+
+    # Inicializa um TransactionGenerator thread por banco:
+    if ingest is not None:
+        generator = IngestGenerator(_id=bank._id, bank=bank, batch=ingest, chunk_size=ingest_batch)
+    elif trace is not None:
+        generator = TraceReplayGenerator(_id=bank._id, bank=bank, trace=trace, speed=replay_speed)
+    else:
+        generator = TransactionGenerator(_id=bank._id, bank=bank, workload=workload)
+    bank.transaction_generator = generator
+    generator.start()
+
+    # Inicializa `min_processors` PaymentProcessor threads por banco.
+    processor_kwargs = {"batch_size": batch_size, "batch_wait": batch_wait}
+    for j in range(min_processors):
+        processor = PaymentProcessor(_id=j, bank=bank, **processor_kwargs)
+        bank.payment_processors.append(processor)
+        processor.start()
+
+    # Supervisor que ajusta a quantidade de processadores de acordo com a fila do banco
+    if max_processors > min_processors:
+        supervisor = ProcessorSupervisor(
+            bank=bank,
+            min_processors=min_processors,
+            max_processors=max_processors,
+            interval=10 * config.time_unit,
+            target_latency=3 * config.time_unit,
+            processor_kwargs=processor_kwargs,
+        )
+        bank.processor_supervisor = supervisor
+        supervisor.start()
+
+
+def stop_bank_workers(banks: List[Bank]) -> None:
+    """
+    Tira os bancos de operação, fecha suas filas (acordando geradores e processadores bloqueados
+    nelas) e aguarda o término de todas as threads dos bancos. Os instantes das transações que
+    ficaram sem finalização são então descartados (ver LatencyTracker.drain()).
+    """
+    for bank in banks:
+        bank.operating = False
+        bank.transaction_queue.close()
+
+    # supervisores primeiro, já que eles alteram as listas de processadores
+    for bank in banks:
+        if bank.processor_supervisor is not None:
+            bank.processor_supervisor.join()
+
+    for bank in banks:
+        if bank.transaction_generator is not None:
+            bank.transaction_generator.join()
+
+        for processor in bank.payment_processors:
+            processor.join()
+        bank.latency.drain()
@@ -0,0 +1,158 @@
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+import globals as config
+from utils.currency import Currency
+from utils.transaction import Transaction
+
+
+# Processos de chegada das transações de cada banco
+ARRIVALS = ["fixed", "poisson", "bursty"]
+
+# Perfis pré-definidos (parâmetros de WorkloadProfile); parâmetros passados na linha de comando
+# sobrescrevem os do perfil
+WORKLOAD_PROFILES: Dict[str, dict] = {
+    # o gerador original: contas e bancos uniformes, uma transação a cada 0.2 unidades de tempo
+    "uniform": {},
+    # poucas contas concentram a maior parte das transações, quase todas nacionais
+    "hotspot": {"zipf": 1.1, "international_ratio": 0.2, "arrival": "poisson"},
+    # rajadas periódicas de transações (com as mesmas contas quentes), em malha aberta
+    "bursty": {"zipf": 0.8, "arrival": "bursty", "open_loop": True},
+}
+
+
+class WorkloadProfile:
+    """
+    Uma classe para descrever a carga gerada pelos geradores de transações de cada banco.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    As contas de origem e de destino seguem uma distribuição de Zipf (a conta 1 é a mais quente)
+    ou, com zipf = 0, uniforme. O banco de destino é o próprio banco com probabilidade
+    1 - `international_ratio` e, senão, um dos outros bancos (uniforme); a conta de destino nunca é a
+    própria conta de origem (salvo em um banco com uma única conta). As chegadas são a
+    intervalos fixos, um processo de Poisson ou rajadas: nos primeiros `burst_duty` de cada
+    período de `burst_period` unidades de tempo a taxa é `burst_factor` vezes a média, e no
+    restante do período ela é reduzida para manter a taxa média (se possível).
+
+    Em malha fechada, o gerador espera enquanto a fila do banco estiver cheia (backpressure); em
+    malha aberta, as chegadas seguem o seu próprio relógio e transações que encontram a fila cheia
+    são recusadas (ver TransactionQueue.rejected), como clientes que não esperam pelo sistema.
+
+    ...
+
+    Atributos
+    ---------
+    zipf : float
+        Expoente da distribuição de Zipf das contas (0 = uniforme).
+    international_ratio : Optional[float]
+        Fração de transações internacionais (None = banco de destino uniforme entre todos).
+    arrival : str
+        Processo de chegada: "fixed", "poisson" ou "bursty".
+    tps : float
+        Taxa média de transações por segundo de cada banco (0 = 5 por unidade de tempo).
+    open_loop : bool
+        Se as chegadas independem da fila (malha aberta) ou esperam por espaço nela (malha fechada).
+    burst_factor : float
+        Multiplicador da taxa durante as rajadas.
+    burst_period : float
+        Período (em unidades de tempo) das rajadas.
+    burst_duty : float
+        Fração de cada período ocupada pela rajada.
+
+    Métodos
+    -------
+    transaction(bank_id: int, i: int, rng: random.Random) -> Transaction:
+        Gera a transação `i` de um cliente do banco `bank_id`.
+    next_interval(rng: random.Random, elapsed: float) -> float:
+        Retorna o intervalo (em segundos) até a próxima chegada, `elapsed` segundos após o início.
+    describe() -> str:
+        Retorna uma descrição do perfil para os logs.
+    """
+
+    def __init__(
+        self,
+        zipf: float = 0.0,
+        international_ratio: Optional[float] = None,
+        arrival: str = "fixed",
+        tps: float = 0.0,
+        open_loop: bool = False,
+        burst_factor: float = 5.0,
+        burst_period: float = 100.0,
+        burst_duty: float = 0.1,
+    ):
+        if arrival not in ARRIVALS:
+            raise ValueError(f"Processo de chegada desconhecido: {arrival}")
+        self.zipf = zipf
+        self.international_ratio = international_ratio
+        self.arrival = arrival
+        self.tps = tps
+        self.open_loop = open_loop
+        self.burst_factor = burst_factor
+        self.burst_period = burst_period
+        self.burst_duty = burst_duty
+        # distribuições acumuladas de Zipf, por quantidade de contas
+        self._cdfs: Dict[int, List[float]] = {}
+
+    @classmethod
+    def from_profile(cls, name: str, **overrides) -> "WorkloadProfile":
+        """
+        Cria o perfil pré-definido `name` (ver WORKLOAD_PROFILES), com os parâmetros `overrides`
+        que não forem None.
+        """
+        params = dict(WORKLOAD_PROFILES[name])
+        params.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**params)
+
+    def _account(self, n_accounts: int, rng: random.Random) -> int:
+        if not self.zipf:
+            return rng.randint(1, n_accounts)
+        cdf = self._cdfs.get(n_accounts)
+        if cdf is None:
+            cdf = list(accumulate(1 / k ** self.zipf for k in range(1, n_accounts + 1)))
+            self._cdfs[n_accounts] = cdf
+        return min(bisect_left(cdf, rng.random() * cdf[-1]), n_accounts - 1) + 1
+
+    def transaction(self, bank_id: int, i: int, rng: random.Random) -> Transaction:
+        banks = config.banks
+        origin = (bank_id, self._account(len(banks[bank_id].accounts), rng))
+        if self.international_ratio is None:
+            destination_bank = rng.randint(0, len(banks) - 1)
+        elif rng.random() < self.international_ratio:
+            destination_bank = rng.choice([other for other in range(len(banks)) if other != bank_id])
+        else:
+            destination_bank = bank_id
+        n_accounts = len(banks[destination_bank].accounts)
+        destination = (destination_bank, self._account(n_accounts, rng))
+        # transferência para a própria conta: sorteia outra conta de destino
+        while destination == origin and n_accounts > 1:
+            destination = (destination_bank, self._account(n_accounts, rng))
+        amount = rng.randint(100, 100_000)
+
+        return Transaction(i, origin, destination, amount, currency=Currency(destination_bank+1))
+
+    def _rate(self, elapsed: float) -> float:
+        rate = self.tps or 5 / config.time_unit
+        if self.arrival != "bursty":
+            return rate
+        if elapsed % (self.burst_period * config.time_unit) < self.burst_duty * self.burst_period * config.time_unit:
+            return rate * self.burst_factor
+        # fora da rajada, a taxa que mantém a média (com um mínimo, para o gerador não parar)
+        return max(rate * (1 - self.burst_duty * self.burst_factor) / (1 - self.burst_duty), rate / 100)
+
+    def next_interval(self, rng: random.Random, elapsed: float) -> float:
+        rate = self._rate(elapsed)
+        if self.arrival == "fixed":
+            return 1 / rate
+        return rng.expovariate(rate)
+
+    def describe(self) -> str:
+        accounts = f"zipf({self.zipf})" if self.zipf else "uniformes"
+        international = "uniforme" if self.international_ratio is None else f"{self.international_ratio:.0%}"
+        tps = f"{self.tps}/s" if self.tps else "5 por unidade de tempo"
+        arrival = self.arrival
+        if arrival == "bursty":
+            arrival += f" ({self.burst_factor}x em {self.burst_duty:.0%} de cada {self.burst_period} unidades de tempo)"
+        loop = "aberta" if self.open_loop else "fechada"
+        return f"contas {accounts}, internacionais {international}, chegadas {arrival}, {tps} por banco, malha {loop}"
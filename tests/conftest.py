@@ -0,0 +1,29 @@
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import globals as config  # noqa: E402
+from payment_system.bank import Bank  # noqa: E402
+from utils.currency import Currency  # noqa: E402
+
+
+@pytest.fixture
+def banks() -> List[Bank]:
+    """
+    Um banco por moeda (banco i na moeda Currency(i + 1)), com reservas altas e 4 contas de 100_000
+    cada (sem cheque especial), registrados na lista global `banks`.
+    """
+    config.banks.clear()
+    for i, currency in enumerate(Currency):
+        bank = Bank(_id=i, currency=currency)
+        for reserve_currency in Currency:
+            getattr(bank.reserves, reserve_currency.name).deposit(10_000_000_000)
+        for _ in range(4):
+            bank.new_account(balance=100_000, overdraft_limit=0)
+        config.banks.append(bank)
+    yield config.banks
+    config.banks.clear()
@@ -0,0 +1,74 @@
+from payment_system.ingest import TransferBatch, read_transfers, split_by_origin, validate_transfers
+from utils.currency import Currency
+
+
+def test_read_transfers_rejects_malformed_jsonl_rows(tmp_path):
+    path = tmp_path / "transfers.jsonl"
+    path.write_text("\n".join([
+        '{"origin_bank": 0, "origin_account": 1, "destination_bank": 1, "destination_account": 2, "amount": 500}',
+        "[1, 2]",
+        "não é json",
+        '{"origin_bank": 0, "origin_account": 1, "destination_bank": 1, "destination_account": 2}',
+        '{"origin_bank": 0, "origin_account": 1, "destination_bank": 1, "destination_account": 2, "amount": 99999999999999999999}',
+        '{"origin_bank": 9999999999, "origin_account": 1, "destination_bank": 1, "destination_account": 2, "amount": 1}',
+        '{"origin_bank": 1, "origin_account": 3, "destination_bank": 0, "destination_account": 4, "amount": 7, "currency": "JPY"}',
+        '{"origin_bank": 1, "origin_account": 3, "destination_bank": 0, "destination_account": 4, "amount": 7, "currency": "XXX"}',
+    ]) + "\n")
+
+    batch, rejected = read_transfers(str(path))
+
+    assert list(batch.rows()) == [
+        ((0, 1), (1, 2), 500, Currency(2)),
+        ((1, 3), (0, 4), 7, Currency.JPY),
+    ]
+    assert list(batch.lines) == [1, 7]
+    assert rejected == [
+        (2, "linha malformada"),
+        (3, "linha malformada"),
+        (4, "linha malformada"),
+        (5, "número fora do intervalo"),
+        (6, "número fora do intervalo"),
+        (8, "linha malformada"),
+    ]
+    # todas as colunas continuam com o mesmo tamanho
+    assert {len(getattr(batch, column)) for column in TransferBatch._COLUMNS} == {2}
+
+
+def test_read_transfers_csv(tmp_path):
+    path = tmp_path / "transfers.csv"
+    path.write_text(
+        "origin_bank,origin_account,destination_bank,destination_account,amount,currency\n"
+        "0,1,0,2,100,\n"
+        "0,x,0,2,100,\n"
+    )
+    batch, rejected = read_transfers(str(path))
+    assert list(batch.rows()) == [((0, 1), (0, 2), 100, Currency(1))]
+    assert rejected == [(3, "linha malformada")]
+
+
+def test_validate_transfers_reports_first_failed_check():
+    batch = TransferBatch()
+    batch.append((0, 1), (1, 2), 100)
+    batch.append((5, 1), (1, 2), 100)
+    batch.append((0, 1), (1, 9), 100)
+    batch.append((0, 1), (1, 2), 0)
+    batch.append((1, 1), (0, 2), 100)
+
+    valid, rejected = validate_transfers(batch, [4, 4], origin_bank=0)
+
+    assert valid == [0]
+    assert rejected == [
+        (1, "banco de origem inexistente"),
+        (2, "conta de destino inexistente"),
+        (3, "valor não positivo"),
+        (4, "origem fora do banco 0"),
+    ]
+
+
+def test_split_by_origin_preserves_order():
+    batch = TransferBatch()
+    for i, origin_bank in enumerate([1, 0, 1, 0]):
+        batch.append((origin_bank, 1), (0, 2), 100 + i)
+    parts = split_by_origin(batch)
+    assert list(parts[0].amount) == [101, 103]
+    assert list(parts[1].amount) == [100, 102]
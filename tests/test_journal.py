@@ -0,0 +1,84 @@
+import os
+import time
+
+import globals as config
+from payment_system.journal import (
+    Journal, close_journal, encode_genesis, encode_pending, open_journal, read_records, recover,
+)
+from payment_system.latency import ENQUEUED
+from payment_system.payment_processor import TransactionExecutor
+from utils.currency import Currency
+from utils.transaction import Transaction, TransactionStatus
+
+
+def test_recover_rebuilds_balances_and_next_id(banks, tmp_path):
+    usd, jpy = banks[Currency.USD.value - 1], banks[Currency.JPY.value - 1]
+    journal = open_journal(str(tmp_path), "main", fsync=False)
+    try:
+        journal.append(b"".join(encode_genesis(bank.export_state()) for bank in banks))
+        transactions = [
+            Transaction(7, (usd._id, 1), (usd._id, 2), 3_000, Currency.USD),
+            Transaction(8, (usd._id, 2), (jpy._id, 3), 5_000, Currency.JPY),
+            Transaction(9, (usd._id, 3), (usd._id, 4), 500_000, Currency.USD),
+        ]
+        journal.append(b"".join(encode_pending(transaction) for transaction in transactions))
+        results = TransactionExecutor(0, usd).execute_batch(transactions)
+    finally:
+        close_journal()
+
+    assert results == [TransactionStatus.SUCCESSFUL, TransactionStatus.SUCCESSFUL, TransactionStatus.FAILED]
+    states, summary = recover(str(tmp_path))
+    assert summary == {"done": 3, "successful": 2, "pending": 0, "next_id": 10}
+    for bank, state in zip(banks, states):
+        assert [balance for balance, _ in state["accounts"]] == [acc.balance for acc in bank.accounts]
+        assert state["reserves"] == {
+            currency.name: getattr(bank.reserves, currency.name).balance for currency in Currency
+        }
+        assert state["bank_profit"] == bank.bank_profit
+
+
+def test_recover_skips_expired_transactions_in_counters(banks, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "scheduler", "priority")
+    monkeypatch.setattr(config, "sla_deadline", 1)
+    usd, jpy = banks[Currency.USD.value - 1], banks[Currency.JPY.value - 1]
+    transactions = [
+        Transaction(1, (usd._id, 1), (usd._id, 2), 3_000, Currency.USD),
+        Transaction(2, (usd._id, 2), (jpy._id, 3), 5_000, Currency.JPY),
+        Transaction(3, (usd._id, 3), (usd._id, 4), 3_000, Currency.USD),
+        Transaction(4, (usd._id, 4), (jpy._id, 1), 5_000, Currency.JPY),
+    ]
+    now = time.monotonic()
+    usd.latency.stamp(transactions[:2], ENQUEUED, now)
+    usd.latency.stamp(transactions[2:], ENQUEUED, now - 1_000)
+
+    journal = open_journal(str(tmp_path), "main", fsync=False)
+    try:
+        journal.append(b"".join(encode_genesis(bank.export_state()) for bank in banks))
+        journal.append(b"".join(encode_pending(transaction) for transaction in transactions))
+        results = TransactionExecutor(0, usd).execute_batch(transactions)
+    finally:
+        close_journal()
+
+    assert results == [TransactionStatus.SUCCESSFUL] * 2 + [TransactionStatus.FAILED] * 2
+    assert (usd.nacional_transactions, usd.internacional_transactions, jpy.internacional_transactions) == (1, 1, 1)
+    states, summary = recover(str(tmp_path))
+    assert summary["done"] == 4
+    for bank, state in zip(banks, states):
+        assert state["nacional_transactions"] == bank.nacional_transactions
+        assert state["internacional_transactions"] == bank.internacional_transactions
+
+
+def test_torn_tail_is_ignored_and_truncated(banks, tmp_path):
+    path = os.path.join(str(tmp_path), "main.wal")
+    journal = Journal(path, fsync=False)
+    journal.wait(journal.append(encode_genesis(banks[0].export_state())))
+    journal.close()
+    valid = os.path.getsize(path)
+
+    # escrita interrompida no meio de um registro
+    with open(path, "ab") as file:
+        file.write(encode_genesis(banks[1].export_state())[:-3])
+
+    assert [end for _, _, end in read_records(path)] == [valid]
+    Journal(path, fsync=False).close()
+    assert os.path.getsize(path) == valid
@@ -0,0 +1,17 @@
+from payment_system.latency import DEQUEUED, ENQUEUED, LatencyTracker
+from utils.currency import Currency
+from utils.transaction import Transaction
+
+
+def test_complete_fills_histograms_and_drain_evicts_unfinished():
+    tracker = LatencyTracker()
+    finished = Transaction(1, (0, 1), (0, 2), 100, Currency.BRL)
+    queued = Transaction(2, (0, 1), (0, 2), 100, Currency.BRL)
+    tracker.stamp((finished, queued), ENQUEUED, 1.0)
+    tracker.stamp((finished,), DEQUEUED, 1.5)
+    tracker.complete((finished,), 2.0)
+
+    assert sum(tracker.histograms["fila"][:-1]) == 1
+    assert tracker.histograms["total"][-1] == 1.0
+    assert tracker.drain() == 1
+    assert tracker.drain() == 0
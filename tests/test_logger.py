@@ -0,0 +1,26 @@
+from utils.logger import HotPathSampler, hot, set_log_sampling
+
+
+def test_sampler_keeps_one_in_every():
+    sampler = HotPathSampler(every=4)
+    taken = [sampler.take() for _ in range(12)]
+    assert taken.count(True) == 3
+    assert sampler.dropped == 9
+
+
+def test_sampler_rate_limit():
+    sampler = HotPathSampler(max_per_second=5)
+    assert sum(sampler.take() for _ in range(100)) <= 10
+
+
+def test_hot_without_sampling_follows_logger_level():
+    set_log_sampling(1, 0)
+    from utils.logger import LOGGER
+    level = LOGGER.level
+    try:
+        LOGGER.setLevel("INFO")
+        assert hot()
+        LOGGER.setLevel("ERROR")
+        assert not hot()
+    finally:
+        LOGGER.setLevel(level)
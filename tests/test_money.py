@@ -0,0 +1,43 @@
+from payment_system.payment_processor import TransactionExecutor
+from utils.currency import Currency
+from utils.money import QUANTUM, convert, fee, total_money
+from utils.transaction import Transaction, TransactionStatus
+
+
+def test_convert_rounds_down_to_destination_quantum():
+    for currency in Currency:
+        assert convert(123_457, Currency.USD, currency) % QUANTUM[currency] == 0
+    assert convert(1, Currency.BRL, Currency.CHF) == 0
+
+
+def test_fee_rounds_up():
+    assert fee(1, 100) == 1
+    assert fee(10_000, 100) == 100
+    assert fee(10_001, 100) == 101
+
+
+def test_international_transfer_below_quantum_fails_without_debit(banks):
+    brl, chf = banks[Currency.BRL.value - 1], banks[Currency.CHF.value - 1]
+    before = total_money(banks)
+    executor = TransactionExecutor(0, brl)
+
+    transaction = Transaction(1, (brl._id, 1), (chf._id, 1), 1, Currency.CHF)
+    assert executor.execute_batch([transaction]) == [TransactionStatus.FAILED]
+
+    assert brl.accounts[0].balance == 100_000
+    assert chf.accounts[0].balance == 100_000
+    assert brl.bank_profit == 0
+    assert total_money(banks) == before
+
+
+def test_international_transfer_conserves_money(banks):
+    usd, jpy = banks[Currency.USD.value - 1], banks[Currency.JPY.value - 1]
+    before = total_money(banks)
+    executor = TransactionExecutor(0, usd)
+
+    transaction = Transaction(1, (usd._id, 1), (jpy._id, 2), 5_000, Currency.JPY)
+    assert executor.execute_batch([transaction]) == [TransactionStatus.SUCCESSFUL]
+
+    assert usd.accounts[0].balance == 100_000 - 5_000 - fee(5_000, 100)
+    assert jpy.accounts[1].balance == 100_000 + convert(5_000, Currency.USD, Currency.JPY)
+    assert total_money(banks) == before
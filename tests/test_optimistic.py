@@ -0,0 +1,67 @@
+import globals as config
+from payment_system.payment_processor import OPTIMISTIC_RETRIES, TransactionExecutor
+from utils.currency import Currency
+from utils.money import total_money
+from utils.transaction import Transaction, TransactionStatus
+
+
+def _group(bank, amounts):
+    return [Transaction(i, (bank._id, 1), (bank._id, 2), amount, bank.currency) for i, amount in enumerate(amounts)]
+
+
+def test_optimistic_group_commits_once(banks, monkeypatch):
+    monkeypatch.setattr(config, "concurrency", "optimistic")
+    bank = banks[Currency.BRL.value - 1]
+    origin, destiny = bank.accounts[0], bank.accounts[1]
+
+    results = TransactionExecutor(0, bank).execute_batch(_group(bank, [30_000, 60_000, 20_000]))
+
+    assert results == [TransactionStatus.SUCCESSFUL, TransactionStatus.SUCCESSFUL, TransactionStatus.FAILED]
+    assert (origin.balance, destiny.balance) == (10_000, 190_000)
+    assert (origin.version, destiny.version) == (1, 1)
+    assert (bank.optimistic_commits, bank.optimistic_conflicts, bank.optimistic_fallbacks) == (1, 0, 0)
+
+
+def test_concurrent_write_forces_recompute(banks, monkeypatch):
+    monkeypatch.setattr(config, "concurrency", "optimistic")
+    bank = banks[Currency.BRL.value - 1]
+    origin, destiny = bank.accounts[0], bank.accounts[1]
+    before = total_money(banks)
+    withdrawal = origin.withdrawal
+    writes = []
+
+    def concurrent_writer(balance, amount):
+        # outro processador deposita na origem entre a leitura e a confirmação do grupo
+        if not writes:
+            writes.append(amount)
+            origin.balance += 5_000
+            origin.version += 1
+            bank.accounts[2].balance -= 5_000
+        return withdrawal(balance, amount)
+
+    monkeypatch.setattr(origin, "withdrawal", concurrent_writer)
+    results = TransactionExecutor(0, bank).execute_batch(_group(bank, [104_000]))
+
+    # com o saldo lido antes do depósito a transferência falharia; recalculada, ela passa
+    assert results == [TransactionStatus.SUCCESSFUL]
+    assert (origin.balance, destiny.balance) == (1_000, 204_000)
+    assert (bank.optimistic_commits, bank.optimistic_conflicts, bank.optimistic_fallbacks) == (1, 1, 0)
+    assert total_money(banks) == before
+
+
+def test_exhausted_retries_fall_back_to_locks(banks, monkeypatch):
+    monkeypatch.setattr(config, "concurrency", "optimistic")
+    bank = banks[Currency.BRL.value - 1]
+    destiny = bank.accounts[1]
+    withdrawal = bank.accounts[0].withdrawal
+
+    def always_conflicting(balance, amount):
+        destiny.version += 1
+        return withdrawal(balance, amount)
+
+    monkeypatch.setattr(bank.accounts[0], "withdrawal", always_conflicting)
+    results = TransactionExecutor(0, bank).execute_batch(_group(bank, [1_000]))
+
+    assert results == [TransactionStatus.SUCCESSFUL]
+    assert destiny.balance == 101_000
+    assert (bank.optimistic_commits, bank.optimistic_conflicts, bank.optimistic_fallbacks) == (0, OPTIMISTIC_RETRIES, 1)
@@ -0,0 +1,59 @@
+import globals as config
+from payment_system.latency import ENQUEUED, LatencyTracker
+from payment_system.scheduler import (
+    INTERNATIONAL, LARGE, NATIONAL, PRIORITY_CLASSES, ClassStats, PriorityItems, classify, expired,
+)
+from utils.currency import Currency
+from utils.transaction import Transaction
+
+
+def _transaction(i: int, priority_class: int) -> Transaction:
+    if priority_class == LARGE:
+        return Transaction(i, (0, 1), (0, 2), config.large_amount, Currency.BRL)
+    destination_bank = 0 if priority_class == NATIONAL else 1
+    return Transaction(i, (0, 1), (destination_bank, 2), 100, Currency(destination_bank + 1))
+
+
+def test_weighted_round_robin_follows_class_weights():
+    items = PriorityItems()
+    for priority_class in (LARGE, INTERNATIONAL, NATIONAL):
+        for i in range(70):
+            items.append((0.0, _transaction(i, priority_class)))
+
+    total = sum(spec.weight for spec in PRIORITY_CLASSES)
+    served = [classify(items.popleft()[1]) for _ in range(10 * total)]
+    assert [served.count(c) for c in range(len(PRIORITY_CLASSES))] == [10 * spec.weight for spec in PRIORITY_CLASSES]
+    assert items.depths() == [70 - 10 * spec.weight for spec in PRIORITY_CLASSES]
+
+
+def test_lone_class_is_served_in_fifo_order_and_pushback_goes_first():
+    items = PriorityItems()
+    items.extend((0.0, _transaction(i, INTERNATIONAL)) for i in range(3))
+    first = items.popleft()
+    items.extendleft([first])
+    assert [items.popleft()[1]._id for _ in range(3)] == [0, 1, 2]
+    assert len(items) == 0
+
+
+def test_expired_uses_enqueue_instant(monkeypatch):
+    monkeypatch.setattr(config, "scheduler", "priority")
+    monkeypatch.setattr(config, "sla_deadline", 1)
+    monkeypatch.setattr(config, "time_unit", 0.01)
+    latency = LatencyTracker()
+    old, fresh, untracked = (_transaction(i, NATIONAL) for i in range(3))
+    monkeypatch.setattr("payment_system.scheduler.time.monotonic", lambda: 100.0)
+    latency.stamp((old,), ENQUEUED, 99.0)
+    latency.stamp((fresh,), ENQUEUED, 99.995)
+
+    assert expired([old, fresh, untracked], latency) == {id(old)}
+
+
+def test_class_stats_export_round_trip():
+    stats = ClassStats()
+    stats.record([_transaction(0, NATIONAL), _transaction(1, LARGE)], [0.5, 2.0])
+    stats.record_expired([_transaction(2, LARGE)])
+    loaded = ClassStats()
+    loaded.load(stats.export())
+    assert [len(latencies) for latencies in loaded.latencies] == [1, 0, 1]
+    assert loaded.expired == [0, 0, 1]
+    assert loaded.latencies[LARGE].summary()["max"] == 2.0
@@ -0,0 +1,66 @@
+import random
+from threading import Thread
+
+from payment_system import settlement as settlement_module
+from payment_system.payment_processor import TransactionExecutor
+from payment_system.settlement import BatchSettlement
+from utils.currency import Currency
+from utils.money import total_money
+from utils.transaction import Transaction, TransactionStatus
+
+
+def test_reserve_never_accepts_more_than_known_balance_plus_pending(banks):
+    settlement = BatchSettlement(interval=1.0)
+    reserve = banks[0].reserves.USD
+    reserve.balance = 1_000
+
+    assert settlement.reserve(0, 1, Currency.USD, [600, 600, 400]) == [True, False, True]
+    settlement.credit(0, 1, Currency.USD, 300)
+    assert settlement.reserve(0, 1, Currency.USD, [301, 300]) == [False, True]
+    assert reserve.balance == 1_000
+
+    assert settlement.settle() == 1
+    assert reserve.balance == 0
+    assert settlement.settle() == 0
+    assert settlement.stats()["rejected"] == 2
+
+
+def test_concurrent_settlement_keeps_reserves_non_negative(banks):
+    settlement = BatchSettlement(interval=1.0)
+    banks[0].reserves.JPY.balance = 10_000
+    rng = random.Random(1)
+    moves = [[rng.randint(1, 300) for _ in range(2_000)] for _ in range(4)]
+
+    def worker(amounts):
+        for amount in amounts:
+            if settlement.reserve(0, 1, Currency.JPY, [amount]) == [True]:
+                settlement.credit(0, 1, Currency.JPY, amount // 2)
+
+    def settler():
+        for _ in range(200):
+            settlement.settle()
+            assert banks[0].reserves.JPY.balance >= 0
+
+    threads = [Thread(target=worker, args=(amounts,)) for amounts in moves] + [Thread(target=settler)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    settlement.settle()
+    assert banks[0].reserves.JPY.balance >= 0
+
+
+def test_batched_international_transfers_conserve_money(banks, monkeypatch):
+    settlement = BatchSettlement(interval=1.0)
+    monkeypatch.setattr(settlement_module, "_settlement", settlement)
+    usd, eur = banks[Currency.USD.value - 1], banks[Currency.EUR.value - 1]
+    before = total_money(banks)
+    executor = TransactionExecutor(0, usd)
+
+    transactions = [
+        Transaction(i, (usd._id, 1 + i % 4), (eur._id, 1 + (i + 1) % 4), 1_000 + i, Currency.EUR) for i in range(20)
+    ]
+    assert executor.execute_batch(transactions) == [TransactionStatus.SUCCESSFUL] * 20
+
+    settlement.settle()
+    assert total_money(banks) == before
@@ -0,0 +1,39 @@
+from threading import Thread
+
+from utils.sharded_counter import ShardedCounter
+
+
+def test_concurrent_adds_are_never_lost():
+    counter = ShardedCounter("teste", value=10)
+
+    def worker():
+        for _ in range(10_000):
+            counter.add()
+
+    threads = [Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # as parcelas das threads encerradas continuam somadas
+    assert counter.value() == 10 + 8 * 10_000
+
+
+def test_set_replaces_total():
+    counter = ShardedCounter("teste")
+    counter.add(5)
+    counter.set(42)
+    counter.add(-2)
+    assert counter.value() == 40
+
+
+def test_bank_counter_properties(banks):
+    bank = banks[0]
+    bank.add_profit(30)
+    bank.add_overdraft_interest(12)
+    bank.count_national(3)
+    assert (bank.bank_profit, bank.overdraft_interest, bank.nacional_transactions) == (42, 12, 3)
+
+    bank.bank_profit = 7
+    assert bank.bank_profit == 7
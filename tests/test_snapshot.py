@@ -0,0 +1,51 @@
+import pytest
+
+from payment_system.snapshot import read_snapshot, write_snapshot
+from utils.currency import Currency
+
+
+def _core(state: dict) -> dict:
+    return {key: state[key] for key in (
+        "_id", "currency", "reserves", "n_accounts", "nacional_transactions", "internacional_transactions",
+        "bank_profit", "overdraft_interest",
+    )}
+
+
+def test_snapshot_round_trip(banks, tmp_path):
+    banks[2].accounts[1].balance = -1_234
+    banks[2].accounts[1].overdraft_limit = 5_000
+    banks[3].add_profit(77)
+    states = [bank.export_state() for bank in banks]
+    path = str(tmp_path / "bancos.snap")
+    write_snapshot(path, states)
+
+    restored = read_snapshot(path)
+    assert [_core(state) for state in restored] == [_core(state) for state in states]
+    assert [state["accounts"] for state in restored] == [state["accounts"] for state in states]
+
+    # sem converter para tuplas, as contas voltam como os arrays do ledger compacto
+    balances, overdraft_limits = read_snapshot(path, ledger=True)[2]["accounts"]
+    assert list(balances) == [100_000, -1_234, 100_000, 100_000]
+    assert list(overdraft_limits) == [0, 5_000, 0, 0]
+
+
+def test_snapshot_loads_into_banks(banks, tmp_path):
+    banks[0].accounts[0].balance = 42
+    banks[0].reserves.EUR.balance = 7
+    path = str(tmp_path / "bancos.snap")
+    write_snapshot(path, [bank.export_state() for bank in banks])
+    banks[0].accounts[0].balance = 0
+    banks[0].reserves.EUR.balance = 0
+
+    for bank, state in zip(banks, read_snapshot(path)):
+        bank.load_state(state)
+    assert banks[0].accounts[0].balance == 42
+    assert banks[0].reserves.EUR.balance == 7
+    assert getattr(banks[1].reserves, Currency.USD.name).balance == 10_000_000_000
+
+
+def test_read_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "outro.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
@@ -0,0 +1,51 @@
+import threading
+
+from payment_system.transaction_queue import TransactionQueue
+from utils.currency import Currency
+from utils.stats import Histogram, merged, summarize
+from utils.transaction import Transaction
+
+
+def test_histogram_matches_exact_summary_within_bucket_error():
+    samples = [0.0005 * (i % 200 + 1) for i in range(10_000)]
+    histogram = Histogram()
+    histogram.extend(samples)
+    exact, approx = summarize(samples), histogram.summary()
+
+    assert approx["count"] == exact["count"]
+    assert approx["max"] == exact["max"]
+    assert abs(approx["mean"] - exact["mean"]) < 1e-9
+    for p in ("p50", "p95", "p99"):
+        assert exact[p] <= approx[p] <= exact[p] * 2 ** (1 / 8)
+
+
+def test_histogram_merge_and_export_round_trip():
+    a, b = Histogram(), Histogram()
+    a.extend([0.001, 0.002])
+    b.extend([0.5])
+    total = merged([a, Histogram.load(b.export())])
+    assert total.summary() == Histogram.load(total.export()).summary()
+    assert total.count == 3 and total.max == 0.5
+
+
+def test_get_batch_does_not_count_items_pushed_back_on_close():
+    queue = TransactionQueue()
+    queue.put(Transaction(1, (0, 1), (0, 2), 100, Currency.BRL))
+    threading.Timer(0.05, queue.close).start()
+
+    assert queue.get_batch(10, max_wait=1.0) == []
+    assert queue.dequeued == 0
+    assert queue.wait_histogram.count == 0
+    assert len(queue) == 1
+
+
+def test_put_and_put_batch_count_closed_queue_refusals_alike():
+    queue = TransactionQueue(capacity=2)
+    transactions = [Transaction(i, (0, 1), (0, 2), 100, Currency.BRL) for i in range(4)]
+    assert queue.put_batch(transactions[:3], block=False) == 2
+    assert queue.rejected == 1
+
+    queue.close()
+    assert not queue.put(transactions[3])
+    assert queue.put_batch(transactions, block=False) == 0
+    assert queue.rejected == 1 + 1 + 4
@@ -0,0 +1,11 @@
+import random
+
+from payment_system.workload import WorkloadProfile
+
+
+def test_transaction_never_targets_its_origin_account(banks):
+    rng = random.Random(42)
+    for profile in (WorkloadProfile(), WorkloadProfile(zipf=1.5, international_ratio=0.0)):
+        for i in range(2_000):
+            transaction = profile.transaction(0, i, rng)
+            assert transaction.destination != transaction.origin
@@ -0,0 +1,181 @@
+import json
+import time
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+from utils.currency import Currency, get_exchange_rate
+from utils.logger import LOGGER
+
+
+# Escala das taxas de câmbio em ponto fixo: 1.0 = RATE_SCALE (4 casas decimais, exato para a tabela)
+RATE_SCALE = 10_000
+
+
+class RateTable:
+    """
+    Uma classe para representar uma versão imutável da tabela de taxas de câmbio.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    As taxas ficam em uma matriz densa de inteiros em ponto fixo (multiplicadas por RATE_SCALE),
+    indexada por Currency.value: matrix[f.value][t.value] é a taxa de `f` para `t`.
+
+    ...
+
+    Atributos
+    ---------
+    version : int
+        Versão da tabela (cada troca de tabela gera uma versão nova).
+    matrix : Tuple[Tuple[int, ...], ...]
+        Matriz de taxas em ponto fixo (a linha e a coluna 0 não são usadas).
+
+    Métodos
+    -------
+    rate(f: Currency, t: Currency) -> int:
+        Retorna a taxa de `f` para `t` em ponto fixo.
+    from_rates(version: int, rates: Dict[str, Dict[str, float]]) -> RateTable:
+        (classmethod) Cria uma tabela a partir de taxas decimais indexadas pelos nomes das moedas.
+    """
+
+    def __init__(self, version: int, matrix: Tuple[Tuple[int, ...], ...]):
+        self.version = version
+        self.matrix = matrix
+
+    def rate(self, f: Currency, t: Currency) -> int:
+        return self.matrix[f.value][t.value]
+
+    @classmethod
+    def from_rates(cls, version: int, rates: Dict[str, Dict[str, float]]) -> "RateTable":
+        size = max(currency.value for currency in Currency) + 1
+        matrix = [[0] * size for _ in range(size)]
+        for f in Currency:
+            for t in Currency:
+                matrix[f.value][t.value] = round(rates[f.name][t.name] * RATE_SCALE)
+        return cls(version, tuple(tuple(row) for row in matrix))
+
+
+def default_rates() -> Dict[str, Dict[str, float]]:
+    """
+    Retorna as taxas originais da simulação (utils.currency.get_exchange_rate).
+    """
+    return {f.name: {t.name: get_exchange_rate(f, t) for t in Currency} for f in Currency}
+
+
+class RateBook:
+    """
+    Uma classe para guardar a tabela de câmbio em uso e trocá-la durante a simulação.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Leitores nunca bloqueiam: `current` é apenas uma referência para uma RateTable imutável, e a
+    troca é a atribuição dessa referência (atômica). Quem precisa de taxas consistentes (ex.: um
+    lote de transações) lê `current` uma única vez e usa sempre o mesmo objeto. Apenas trocas
+    concorrentes entre si são serializadas, para que as versões sejam sequenciais.
+
+    ...
+
+    Atributos
+    ---------
+    current : RateTable
+        Tabela em uso.
+
+    Métodos
+    -------
+    swap(rates: Dict[str, Dict[str, float]]) -> RateTable:
+        Troca a tabela em uso por uma nova versão com as taxas `rates` e a retorna.
+    """
+
+    def __init__(self):
+        self.current = RateTable.from_rates(1, default_rates())
+        self._swap_lock = Lock()
+
+    def swap(self, rates: Dict[str, Dict[str, float]]) -> RateTable:
+        with self._swap_lock:
+            table = RateTable.from_rates(self.current.version + 1, rates)
+            self.current = table
+        LOGGER.info(f"Tabela de câmbio trocada para a versão {table.version}.")
+        return table
+
+
+def load_rate_schedule(path: str) -> List[Tuple[float, Dict[str, Dict[str, float]]]]:
+    """
+    Lê um arquivo JSON de taxas de câmbio e retorna a lista de trocas [(instante, taxas)], ordenada
+    pelo instante (em unidades de tempo da simulação). O arquivo pode ter uma única tabela,
+    {"rates": {"USD": {"EUR": 0.98, ...}, ...}}, aplicada no instante 0, ou uma lista de tabelas
+    com o instante de cada uma: [{"at": 0, "rates": {...}}, {"at": 500, "rates": {...}}].
+    Moedas ausentes mantêm as taxas originais.
+    """
+    with open(path) as file:
+        data = json.load(file)
+    entries = data if isinstance(data, list) else [data]
+
+    schedule = []
+    for entry in entries:
+        rates = default_rates()
+        for f, row in entry["rates"].items():
+            rates[f].update(row)
+        schedule.append((float(entry.get("at", 0)), rates))
+    return sorted(schedule, key=lambda item: item[0])
+
+
+class RateScheduler(Thread):
+    """
+    Uma classe para trocar a tabela de câmbio nos instantes de uma lista de trocas.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    book : RateBook
+        Livro de taxas cujas tabelas serão trocadas.
+    schedule : List[Tuple[float, Dict[str, Dict[str, float]]]]
+        Trocas a realizar, com os instantes em segundos desde o início do scheduler.
+
+    Métodos
+    -------
+    run():
+        Aplica as trocas nos seus instantes, até o fim da lista ou até stop().
+    stop() -> None:
+        Interrompe o scheduler.
+    """
+
+    def __init__(self, book: RateBook, schedule: List[Tuple[float, Dict[str, Dict[str, float]]]]):
+        Thread.__init__(self, daemon=True)
+        self.book = book
+        self.schedule = schedule
+        self._stopped = Event()
+
+    def run(self):
+        start = time.monotonic()
+        for at, rates in self.schedule:
+            if self._stopped.wait(max(0.0, start + at - time.monotonic())):
+                return
+            self.book.swap(rates)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+# Tabela de câmbio usada por todos os processadores do processo
+RATES = RateBook()
+
+
+def start_rate_schedule(
+    schedule: Optional[List[Tuple[float, Dict[str, Dict[str, float]]]]], time_unit: float
+) -> Optional[RateScheduler]:
+    """
+    Aplica imediatamente as trocas do instante 0 de `schedule` (instantes em unidades de tempo) e
+    inicia um RateScheduler para as demais. Retorna o scheduler, ou None se não houver trocas futuras.
+    """
+    if not schedule:
+        return None
+    future = []
+    for at, rates in schedule:
+        if at <= 0:
+            RATES.swap(rates)
+        else:
+            future.append((at * time_unit, rates))
+    if not future:
+        return None
+    scheduler = RateScheduler(RATES, future)
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,202 @@
+import random
+import time
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import LOGGER
+
+
+# Valor de timeout para esperar indefinidamente por um lock
+BLOCK = -1
+
+# Limites superiores (em segundos) das faixas dos histogramas de espera por lock
+WAIT_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, float("inf"))
+WAIT_LABELS = ("<=1us", "<=10us", "<=100us", "<=1ms", "<=10ms", "<=100ms", "<=1s", ">1s")
+
+
+class LockTimeout(Exception):
+    """
+    Exceção levantada quando um conjunto de locks não pôde ser adquirido dentro das tentativas permitidas.
+    """
+
+
+class LockManager:
+    """
+    Uma classe para adquirir conjuntos de locks de contas sem deadlocks.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Todo lock de conta (de clientes, subcontas de reservas, etc.) é identificado por uma chave global
+    `lock_key` = (bank_id, account_id, ...) e os locks de um conjunto são sempre adquiridos em ordem
+    crescente de chave, então duas threads nunca esperam uma pela outra em ciclo. Objetos com a mesma
+    chave compartilham o mesmo lock e são adquiridos uma única vez.
+
+    Cada tentativa espera no máximo `timeout` segundos por lock; se algum lock não for obtido, todos os
+    locks já adquiridos são liberados e o conjunto é tentado de novo após um backoff aleatório, até
+    `retries` tentativas.
+
+    Com `stats` (ver enable_stats()), o tempo de espera de cada aquisição é registrado em histogramas
+    por conta (faixas de WAIT_BUCKETS). Cada thread escreve nos seus próprios histogramas, que só são
+    somados quando lidos. Sem `stats`, as aquisições não são cronometradas.
+
+    ...
+
+    Atributos
+    ---------
+    timeout : Optional[float]
+        Tempo máximo (em segundos) de espera por cada lock em uma tentativa (None = sem limite).
+    retries : int
+        Quantidade máxima de tentativas de adquirir um conjunto de locks.
+    backoff : float
+        Tempo base (em segundos) de espera entre duas tentativas.
+    stats : bool
+        Indica se o tempo de espera das aquisições é registrado nos histogramas.
+
+    Métodos
+    -------
+    enable_stats() -> None:
+        Passa a registrar o tempo de espera das aquisições nos histogramas.
+    acquire(accounts: Iterable, timeout: Optional[float] = None) -> List:
+        Adquire os locks de todas as contas de `accounts`, em ordem global, e os retorna.
+    release(held: List) -> None:
+        Libera os locks retornados por acquire().
+    hold(*accounts, timeout: Optional[float] = None):
+        Gerenciador de contexto que adquire e libera os locks de `accounts`.
+    histograms() -> Dict[tuple, List[int]]:
+        Retorna, por chave de conta, a quantidade de aquisições em cada faixa de espera.
+    report(top: int = 10) -> None:
+        Printa os histogramas das contas com maior tempo total de espera.
+    """
+
+    def __init__(
+        self, timeout: Optional[float] = 5.0, retries: int = 5, backoff: float = 0.001, stats: bool = False
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = False
+
+        self._local = local()
+        self._all_stats: List[Dict[tuple, list]] = []
+        self._stats_lock = Lock()
+        # trava uma conta (acc, timeout) -> bool; cronometrada apenas com `stats`
+        self._lock_one = self._lock_untimed
+        if stats:
+            self.enable_stats()
+
+    def enable_stats(self) -> None:
+        """
+        Passa a cronometrar as aquisições e a registrar as esperas nos histogramas. Deve ser chamado
+        antes de as threads começarem a adquirir locks.
+        """
+        self.stats = True
+        self._lock_one = self._lock_timed
+
+    @staticmethod
+    def _lock_untimed(acc, timeout: float) -> bool:
+        return acc.lock(timeout=timeout)
+
+    def _lock_timed(self, acc, timeout: float) -> bool:
+        start = time.perf_counter()
+        acquired = acc.lock(timeout=timeout)
+        self._record(acc.lock_key, time.perf_counter() - start)
+        return acquired
+
+    def _stats(self) -> Dict[tuple, list]:
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = self._local.stats = {}
+            with self._stats_lock:
+                self._all_stats.append(stats)
+        return stats
+
+    def _record(self, key: tuple, wait: float) -> None:
+        entry = self._stats().get(key)
+        if entry is None:
+            # [contagens por faixa..., tempo total de espera]
+            entry = self._stats()[key] = [0] * len(WAIT_BUCKETS) + [0.0]
+        for i, limit in enumerate(WAIT_BUCKETS):
+            if wait <= limit:
+                entry[i] += 1
+                break
+        entry[-1] += wait
+
+    @staticmethod
+    def ordered(accounts: Iterable) -> List:
+        """
+        Retorna as contas em ordem global de `lock_key`, sem chaves repetidas.
+        """
+        unique = {}
+        for acc in accounts:
+            unique.setdefault(acc.lock_key, acc)
+        return [unique[key] for key in sorted(unique)]
+
+    def acquire(self, accounts: Iterable, timeout: Optional[float] = None) -> List:
+        """
+        Adquire atomicamente os locks de `accounts`: ou todos são adquiridos, ou nenhum fica com quem
+        chama. `timeout` substitui o timeout padrão por lock (BLOCK = sem limite). Levanta LockTimeout
+        se o conjunto não for adquirido após `retries` tentativas.
+        Retorna as contas travadas, que devem ser passadas para release().
+        """
+        ordered = self.ordered(accounts)
+        timeout = self.timeout if timeout is None else timeout
+        lock_timeout = BLOCK if timeout is None or timeout < 0 else timeout
+        lock_one = self._lock_one
+
+        for attempt in range(self.retries):
+            held = []
+            for acc in ordered:
+                if not lock_one(acc, lock_timeout):
+                    break
+                held.append(acc)
+            else:
+                return held
+
+            self.release(held)
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+        keys = [acc.lock_key for acc in ordered]
+        raise LockTimeout(f"não foi possível adquirir os locks {keys} após {self.retries} tentativas")
+
+    def release(self, held: List) -> None:
+        for acc in reversed(held):
+            acc.unlock()
+
+    @contextmanager
+    def hold(self, *accounts, timeout: Optional[float] = None):
+        held = self.acquire(accounts, timeout)
+        try:
+            yield held
+        finally:
+            self.release(held)
+
+    def histograms(self) -> Dict[tuple, List[int]]:
+        """
+        Soma os histogramas de todas as threads. Cada valor tem uma contagem por faixa de WAIT_BUCKETS
+        seguida do tempo total de espera (em segundos).
+        """
+        merged: Dict[tuple, list] = {}
+        with self._stats_lock:
+            all_stats = list(self._all_stats)
+        for stats in all_stats:
+            for key, entry in list(stats.items()):
+                total = merged.setdefault(key, [0] * len(entry))
+                for i, value in enumerate(entry):
+                    total[i] += value
+        return merged
+
+    def report(self, top: int = 10) -> None:
+        """
+        Printa, com o LOGGER, os histogramas de espera das `top` contas com maior tempo total de espera.
+        """
+        hottest: List[Tuple[tuple, list]] = sorted(
+            self.histograms().items(), key=lambda item: item[1][-1], reverse=True
+        )[:top]
+        LOGGER.info(f"Espera por locks de contas ({top} contas com maior espera total):")
+        for key, entry in hottest:
+            buckets = ", ".join(f"{label}: {count}" for label, count in zip(WAIT_LABELS, entry) if count)
+            LOGGER.info(f"   > conta {key}: espera total = {entry[-1]:.4f}s ({buckets})")
+
+
+# Gerenciador de locks usado por todas as contas do processo
+LOCK_MANAGER = LockManager()
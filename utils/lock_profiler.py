@@ -0,0 +1,170 @@
+import time
+from threading import Lock
+from typing import List
+
+from utils.logger import LOGGER
+
+
+# Locks criados a partir de agora são instrumentados? (ver enable_lock_profiling())
+_enabled = False
+
+# Todos os locks instrumentados do processo
+_profiled: List["ProfiledLock"] = []
+_profiled_lock = Lock()
+
+
+class ProfiledLock:
+    """
+    Uma classe para representar um lock instrumentado, que se comporta como um threading.Lock e
+    registra quantas vezes foi adquirido, quanto tempo as threads esperaram por ele e quanto tempo
+    ele ficou travado.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Cada aquisição tenta primeiro travar o lock sem esperar; só se ele já estiver travado o tempo
+    de espera é medido (e a aquisição é contada como disputada). Os contadores só são alterados por
+    quem está com o lock, então não precisam de nenhuma sincronização extra.
+
+    ...
+
+    Atributos
+    ---------
+    name : str
+        Nome do lock no relatório (ex.: "banco 0: conta 12").
+    acquisitions : int
+        Quantidade de aquisições.
+    contended : int
+        Quantidade de aquisições que encontraram o lock travado.
+    wait_time : float
+        Tempo total (em segundos) de espera pelo lock.
+    max_wait : float
+        Maior espera (em segundos) por uma aquisição.
+    hold_time : float
+        Tempo total (em segundos) em que o lock ficou travado.
+
+    Métodos
+    -------
+    acquire(blocking: bool = True, timeout: float = -1) -> bool:
+        Adquire o lock, como threading.Lock.acquire().
+    release() -> None:
+        Libera o lock.
+    locked() -> bool:
+        Retorna se o lock está travado.
+    """
+
+    __slots__ = ("name", "acquisitions", "contended", "wait_time", "max_wait", "hold_time", "_lock", "_acquired_at")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.hold_time = 0.0
+        self._lock = Lock()
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            self._acquired_at = time.perf_counter()
+        else:
+            if not blocking:
+                return False
+            start = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            self._acquired_at = time.perf_counter()
+            wait = self._acquired_at - start
+            self.contended += 1
+            self.wait_time += wait
+            if wait > self.max_wait:
+                self.max_wait = wait
+        self.acquisitions += 1
+        return True
+
+    def release(self) -> None:
+        self.hold_time += time.perf_counter() - self._acquired_at
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def enable_lock_profiling() -> None:
+    """
+    Faz com que os locks criados a partir de agora por make_lock() sejam instrumentados e descarta
+    os locks instrumentados anteriores (ex.: herdados do processo pai, em um shard). Deve ser
+    chamada antes da criação dos bancos.
+    """
+    global _enabled
+    _enabled = True
+    with _profiled_lock:
+        _profiled.clear()
+
+
+def make_lock(name: str):
+    """
+    Cria o lock chamado `name`: um threading.Lock comum ou, com o profiling ativado, um
+    ProfiledLock. Com o profiling desativado o lock não tem nenhum custo adicional.
+    """
+    if not _enabled:
+        return Lock()
+    lock = ProfiledLock(name)
+    with _profiled_lock:
+        _profiled.append(lock)
+    return lock
+
+
+def set_lock_name(lock, name: str) -> None:
+    """
+    Renomeia `lock` no relatório, se ele for instrumentado.
+    """
+    if isinstance(lock, ProfiledLock):
+        lock.name = name
+
+
+def lock_profile(top: int = 0) -> List[dict]:
+    """
+    Retorna as estatísticas dos locks instrumentados adquiridos ao menos uma vez, da maior para a
+    menor espera total (apenas os `top` primeiros, se `top` > 0).
+    """
+    with _profiled_lock:
+        locks = [lock for lock in _profiled if lock.acquisitions]
+    locks.sort(key=lambda lock: (lock.wait_time, lock.contended, lock.hold_time), reverse=True)
+    if top > 0:
+        locks = locks[:top]
+    return [
+        {
+            "name": lock.name,
+            "acquisitions": lock.acquisitions,
+            "contended": lock.contended,
+            "wait_time": lock.wait_time,
+            "max_wait": lock.max_wait,
+            "hold_time": lock.hold_time,
+        }
+        for lock in locks
+    ]
+
+
+def report_lock_profile(top: int = 15) -> None:
+    """
+    Printa, com o LOGGER, as estatísticas dos `top` locks com maior espera total.
+    """
+    profile = lock_profile()
+    if not profile:
+        LOGGER.info("Profiling de locks: nenhum lock instrumentado foi adquirido.")
+        return
+    LOGGER.info(
+        f"Profiling de locks ({len(profile)} locks adquiridos, {sum(p['acquisitions'] for p in profile)} aquisições; "
+        f"{min(top, len(profile))} com maior espera total):"
+    )
+    for p in profile[:top]:
+        LOGGER.info(
+            f"   > {p['name']}: {p['acquisitions']} aquisições ({p['contended'] / p['acquisitions']:.1%} disputadas), "
+            f"espera total = {p['wait_time'] * 1000:.3f}ms (máx. {p['max_wait'] * 1000:.3f}ms), "
+            f"travado = {p['hold_time'] * 1000:.3f}ms (média {p['hold_time'] / p['acquisitions'] * 1e6:.1f}us)"
+        )
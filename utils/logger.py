@@ -1,4 +1,6 @@
-import logging, multiprocessing
+import atexit, itertools, logging, multiprocessing, queue, sys, time
+from threading import Thread
+from typing import Optional
 
 # Configura logger
 LOGGER = multiprocessing.get_logger()
@@ -6,3 +8,189 @@ CH = logging.StreamHandler()
 formatter = logging.Formatter("%(asctime)s.%(msecs)03d [%(levelname)s] %(message)s", "%H:%M:%S")
 CH.setFormatter(formatter)
 LOGGER.addHandler(CH)
+
+class HotPathSampler:
+    """
+    Uma classe que decide, antes de a mensagem ser montada, se uma mensagem emitida por transação
+    (caminho crítico) deve ser printada: apenas uma a cada `every` e no máximo `max_per_second` por
+    segundo (0 = sem limite). Quem emite chama hot() e só monta a mensagem se ela for printada, então
+    uma mensagem descartada custa apenas um incremento de contador (nem a f-string nem o LogRecord
+    são criados). Mensagens de ERROR ou mais graves não devem passar pelo sampler.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    every : int
+        Uma a cada `every` mensagens é printada.
+    max_per_second : int
+        Máximo de mensagens printadas por segundo (0 = sem limite).
+    dropped : int
+        Quantidade (aproximada) de mensagens descartadas.
+
+    Métodos
+    -------
+    take() -> bool:
+        Retorna se a próxima mensagem do caminho crítico deve ser printada.
+    """
+
+    def __init__(self, every: int = 1, max_per_second: int = 0):
+        self.every = max(every, 1)
+        self.max_per_second = max_per_second
+        self.dropped = 0
+        # itertools.count é incrementado atomicamente (sem lock) no CPython
+        self._seen = itertools.count()
+        self._second = 0
+        self._in_second = 0
+
+    def take(self) -> bool:
+        if next(self._seen) % self.every:
+            self.dropped += 1
+            return False
+        if self.max_per_second:
+            # contagem aproximada: uma corrida aqui só deixa passar uma mensagem a mais
+            second = int(time.time())
+            if second != self._second:
+                self._second, self._in_second = second, 0
+            self._in_second += 1
+            if self._in_second > self.max_per_second:
+                self.dropped += 1
+                return False
+        return True
+
+
+class BatchWriter(Thread):
+    """
+    Uma thread que escreve em lotes os registros de log enfileirados pelo AsyncHandler.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Cada lote (até `batch_size` registros, ou o que chegar em `flush_interval` segundos) é formatado
+    e escrito no stream com uma única chamada de write() e de flush().
+
+    ...
+
+    Atributos
+    ---------
+    records : queue.SimpleQueue
+        Fila de registros pendentes (None = fim).
+    stream : TextIO
+        Stream de saída dos logs.
+    batch_size : int
+        Quantidade máxima de registros por escrita.
+    flush_interval : float
+        Tempo máximo (em segundos) de espera para completar um lote.
+
+    Métodos
+    -------
+    run():
+        Escreve os registros enfileirados até receber None.
+    """
+
+    def __init__(self, records: queue.SimpleQueue, stream, batch_size: int = 512, flush_interval: float = 0.05):
+        Thread.__init__(self, name="BatchWriter", daemon=True)
+        self.records = records
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    def run(self):
+        done = False
+        while not done:
+            batch = [self.records.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.records.get(timeout=remaining) if remaining > 0 else self.records.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                self.stream.write("".join(formatter.format(record) + "\n" for record in batch))
+                self.stream.flush()
+
+
+class AsyncHandler(logging.Handler):
+    """
+    Um handler que apenas enfileira os registros (sem I/O nem lock de handler no caminho crítico)
+    para que um BatchWriter os escreva em lotes.
+    """
+
+    def __init__(self, records: queue.SimpleQueue):
+        logging.Handler.__init__(self)
+        self.records = records
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if not self.filter(record):
+            return False
+        # a mensagem é montada aqui, já que os argumentos podem mudar antes da escrita
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        self.records.put(record)
+        return True
+
+
+_sampler: Optional[HotPathSampler] = None
+_async_handler: Optional[AsyncHandler] = None
+_writer: Optional[BatchWriter] = None
+
+
+def set_log_sampling(every: int = 1, max_per_second: int = 0) -> None:
+    """
+    Amostra as mensagens do caminho crítico (ver HotPathSampler e hot()); every=1 e
+    max_per_second=0 desativam a amostragem.
+    """
+    global _sampler
+    _sampler = HotPathSampler(every, max_per_second) if every > 1 or max_per_second else None
+
+
+def hot(level: int = logging.INFO) -> bool:
+    """
+    Retorna se uma mensagem do caminho crítico com nível `level` deve ser printada: o LOGGER precisa
+    aceitar o nível e o sampler (se houver) precisa escolhê-la. Deve ser chamada antes de montar a
+    mensagem: `if hot(): LOGGER.info(f"...")`.
+    """
+    if not LOGGER.isEnabledFor(level):
+        return False
+    return _sampler is None or _sampler.take()
+
+
+def enable_async_logging() -> None:
+    """
+    Troca o handler síncrono CH por um AsyncHandler com BatchWriter. Pode ser chamada de novo em
+    um processo filho criado por fork, onde a thread escritora do processo pai não existe.
+    """
+    global _async_handler, _writer
+    if _async_handler is not None:
+        LOGGER.removeHandler(_async_handler)
+    LOGGER.removeHandler(CH)
+
+    records = queue.SimpleQueue()
+    _async_handler = AsyncHandler(records)
+    _async_handler.setLevel(CH.level)
+    _writer = BatchWriter(records, CH.stream or sys.stderr)
+    _writer.start()
+    LOGGER.addHandler(_async_handler)
+
+
+def disable_async_logging() -> None:
+    """
+    Escreve os registros pendentes e volta para o handler síncrono CH.
+    """
+    global _async_handler, _writer
+    if _async_handler is None:
+        return
+    LOGGER.removeHandler(_async_handler)
+    _async_handler.records.put(None)
+    _writer.join()
+    _async_handler = _writer = None
+    LOGGER.addHandler(CH)
+
+
+atexit.register(disable_async_logging)
@@ -0,0 +1,168 @@
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.logger import LOGGER
+
+
+# Amostra de uma métrica: (sufixo do nome, rótulos, valor)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+@dataclass
+class Metric:
+    """
+    Uma dataclass para representar uma família de métricas no formato de texto do Prometheus.
+
+    ...
+
+    Atributos
+    ---------
+    name : str
+        Nome da métrica.
+    kind : str
+        Tipo da métrica: "counter", "gauge" ou "histogram".
+    help : str
+        Descrição da métrica.
+    samples : List[Sample]
+        Amostras da métrica (sufixo do nome, rótulos e valor).
+    """
+
+    name: str
+    kind: str
+    help: str
+    samples: List[Sample] = field(default_factory=list)
+
+
+def counter(name: str, help: str, labels: Dict[str, str], value: float) -> Metric:
+    return Metric(name, "counter", help, [("", labels, value)])
+
+
+def gauge(name: str, help: str, labels: Dict[str, str], value: float) -> Metric:
+    return Metric(name, "gauge", help, [("", labels, value)])
+
+
+def histogram(
+    name: str, help: str, labels: Dict[str, str], buckets: Sequence[float], counts: Sequence[int], total: float
+) -> Metric:
+    """
+    Cria um histograma a partir das contagens por faixa (não cumulativas) de `buckets` (limites
+    superiores, o último podendo ser infinito) e da soma `total` dos valores observados.
+    """
+    samples: List[Sample] = []
+    cumulative = 0
+    for limit, count in zip(buckets, counts):
+        cumulative += count
+        le = "+Inf" if limit == float("inf") else repr(limit)
+        samples.append(("_bucket", dict(labels, le=le), cumulative))
+    if buckets[-1] != float("inf"):
+        samples.append(("_bucket", dict(labels, le="+Inf"), cumulative))
+    samples.append(("_sum", labels, total))
+    samples.append(("_count", labels, cumulative))
+    return Metric(name, "histogram", help, samples)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """
+    Uma classe para reunir as métricas do processo e exportá-las no formato de texto do Prometheus.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    As métricas não são atualizadas no caminho crítico: cada coletor registrado é uma função que,
+    no momento da leitura, monta as métricas a partir dos contadores que os processadores, os
+    geradores e as filas já mantêm. Famílias com o mesmo nome vindas de coletores diferentes (ex.:
+    uma por banco) são unidas em uma só.
+
+    ...
+
+    Métodos
+    -------
+    register(collector: Callable[[], Iterable[Metric]]) -> None:
+        Registra um coletor de métricas.
+    collect() -> List[Metric]:
+        Executa os coletores e retorna as famílias de métricas.
+    render() -> str:
+        Retorna as métricas no formato de texto do Prometheus.
+    """
+
+    def __init__(self):
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+        self._lock = Lock()
+
+    def register(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[Metric]:
+        with self._lock:
+            collectors = list(self._collectors)
+        families: Dict[str, Metric] = {}
+        for collector in collectors:
+            for metric in collector():
+                family = families.get(metric.name)
+                if family is None:
+                    families[metric.name] = Metric(metric.name, metric.kind, metric.help, list(metric.samples))
+                else:
+                    family.samples.extend(metric.samples)
+        return list(families.values())
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples:
+                rendered = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+                lines.append(f"{metric.name}{suffix}{{{rendered}}} {value}" if rendered else f"{metric.name}{suffix} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        try:
+            body = self.registry.render().encode()
+        except Exception as err:
+            LOGGER.error(f"Falha ao coletar as métricas: {err}")
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # cada leitura das métricas não deve gerar um log
+        pass
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve as métricas de `registry` em http://`host`:`port`/metrics a partir de uma thread separada.
+    Retorna o servidor, que deve ser encerrado com stop_metrics_server().
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    LOGGER.info(f"Métricas disponíveis em http://{host}:{port}/metrics")
+    return server
+
+
+def stop_metrics_server(server: Optional[ThreadingHTTPServer]) -> None:
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+# Registro de métricas do processo
+METRICS = MetricsRegistry()
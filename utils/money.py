@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional
+
+from utils.currency import Currency
+from utils.exchange_rates import RATE_SCALE, RATES, RateTable
+
+
+# Todos os valores monetários da simulação são inteiros em unidades mínimas (centavos) da moeda.
+
+# Escala das taxas percentuais em pontos-base: 1% = 100
+BPS_SCALE = 10_000
+
+# Taxa cobrada em transferências internacionais (1%)
+EXCHANGE_FEE_BPS = 100
+
+# Juros sobre o valor usado do cheque especial (5%)
+OVERDRAFT_INTEREST_BPS = 500
+
+# Regra de arredondamento por moeda: valores convertidos para a moeda são arredondados para baixo
+# até um múltiplo do seu quantum (ex.: ienes sem centavos, francos suíços em múltiplos de 5 centavos).
+# A diferença fica na reserva do banco que fez o câmbio.
+QUANTUM: Dict[Currency, int] = {
+    Currency.USD: 1,
+    Currency.EUR: 1,
+    Currency.GBP: 1,
+    Currency.JPY: 100,
+    Currency.CHF: 5,
+    Currency.BRL: 1,
+}
+
+
+def convert(amount: int, f: Currency, t: Currency, table: Optional[RateTable] = None) -> int:
+    """
+    Converte `amount` unidades mínimas de `f` para `t`, arredondando para baixo até o quantum de `t`
+    (valores abaixo do quantum viram 0). Usa `table` ou, se omitida, a tabela de câmbio em uso.
+    """
+    matrix = (table or RATES.current).matrix
+    converted = amount * matrix[f.value][t.value] // RATE_SCALE
+    return converted - converted % QUANTUM[t]
+
+
+def fee(amount: int, bps: int) -> int:
+    """
+    Retorna `bps` pontos-base de `amount`, arredondados para cima (o banco nunca cobra a menos).
+    """
+    return -(-amount * bps // BPS_SCALE)
+
+
+def total_money(banks: List) -> Dict[Currency, int]:
+    """
+    Soma, por moeda, o dinheiro de todos os bancos (ver Bank.money_totals()).
+    """
+    totals = {currency: 0 for currency in Currency}
+    for bank in banks:
+        for currency, amount in bank.money_totals().items():
+            totals[currency] += amount
+    return totals
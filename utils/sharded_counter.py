@@ -0,0 +1,70 @@
+from threading import local
+from typing import List
+
+from utils.lock_profiler import make_lock
+
+
+class ShardedCounter:
+    """
+    Uma classe para representar um contador atualizado por várias threads sem um lock compartilhado:
+    cada thread soma na sua própria parcela (shard) e o total só é calculado quando lido.
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    Cada parcela é escrita apenas pela thread dona dela, então add() não precisa de nenhum lock (o
+    único lock do contador é adquirido uma vez por thread, ao criar sua parcela). Uma leitura
+    concorrente com add() pode não enxergar as somas mais recentes, mas nunca perde nenhuma: com as
+    threads paradas, value() é exato. As parcelas de threads encerradas (ex.: PaymentProcessors
+    removidos pelo supervisor) continuam sendo somadas.
+
+    ...
+
+    Atributos
+    ---------
+    name : str
+        Nome do contador (usado no lock de criação das parcelas).
+
+    Métodos
+    -------
+    add(n: int = 1) -> None:
+        Soma `n` à parcela da thread atual.
+    value() -> int:
+        Retorna o total do contador (a soma das parcelas).
+    set(value: int) -> None:
+        Substitui o total do contador por `value`.
+    """
+
+    def __init__(self, name: str, value: int = 0):
+        self.name = name
+        self._base = value
+        self._shards: List[List[int]] = []
+        self._local = local()
+        self._lock = make_lock(f"{name}: parcelas")
+
+    def _shard(self) -> List[int]:
+        shard = [0]
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def add(self, n: int = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[0] += n
+
+    def value(self) -> int:
+        with self._lock:
+            shards = list(self._shards)
+        return self._base + sum(shard[0] for shard in shards)
+
+    def set(self, value: int) -> None:
+        """
+        Substitui o total do contador por `value`, zerando as parcelas. Não deve ser chamado
+        enquanto alguma thread estiver somando no contador.
+        """
+        with self._lock:
+            self._base = value
+            for shard in self._shards:
+                shard[0] = 0
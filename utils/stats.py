@@ -0,0 +1,149 @@
+import math
+from array import array
+from typing import Dict, Iterable, List
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """
+    Retorna o percentil `p` (0 a 100) de `samples`, já ordenadas, pelo método do vizinho mais
+    próximo (o valor retornado é sempre uma das amostras).
+    """
+    if not samples:
+        return 0.0
+    rank = min(len(samples) - 1, max(0, math.ceil(p / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    """
+    Retorna a quantidade, a média, os percentis 50, 95 e 99 e o máximo de `samples`.
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+# Faixas de Histogram: de HISTOGRAM_MIN segundos em diante, cada faixa é 2 ** (1 / HISTOGRAM_STEPS)
+# vezes maior que a anterior (até ~9% de erro relativo nos percentis)
+HISTOGRAM_MIN = 1e-6
+HISTOGRAM_STEPS = 8
+HISTOGRAM_BUCKETS = 40 * HISTOGRAM_STEPS
+
+
+class Histogram:
+    """
+    Uma classe para acumular amostras de tempo (em segundos) em memória constante: cada amostra só
+    incrementa a contagem da sua faixa (faixas geométricas a partir de HISTOGRAM_MIN), então a
+    quantidade, a média e o máximo são exatos e os percentis são aproximados pelo limite superior
+    da faixa. Histogramas de várias filas ou bancos podem ser somados com merge().
+    Se você adicionar novos atributos ou métodos, lembre-se de atualizar essa docstring.
+
+    ...
+
+    Atributos
+    ---------
+    counts : array
+        Quantidade de amostras em cada faixa.
+    count : int
+        Quantidade total de amostras.
+    total : float
+        Soma das amostras.
+    max : float
+        Maior amostra.
+
+    Métodos
+    -------
+    add(value: float) -> None:
+        Soma uma amostra ao histograma.
+    extend(values: Iterable[float]) -> None:
+        Soma várias amostras ao histograma.
+    merge(other: Histogram) -> None:
+        Soma as amostras de outro histograma a este.
+    summary() -> Dict[str, float]:
+        Retorna a quantidade, a média, os percentis 50, 95 e 99 e o máximo (como summarize()).
+    export() -> dict:
+        Retorna o histograma (serializável).
+    load(state: dict) -> Histogram:
+        Cria um histograma a partir de `state` (gerado por export()).
+    """
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * HISTOGRAM_BUCKETS))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float) -> None:
+        if value <= HISTOGRAM_MIN:
+            bucket = 0
+        else:
+            bucket = min(HISTOGRAM_BUCKETS - 1, math.ceil(math.log2(value / HISTOGRAM_MIN) * HISTOGRAM_STEPS))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "Histogram") -> None:
+        for bucket, n in enumerate(other.counts):
+            if n:
+                self.counts[bucket] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def _percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = min(self.count, max(1, math.ceil(p / 100 * self.count)))
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(HISTOGRAM_MIN * 2 ** (bucket / HISTOGRAM_STEPS), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self._percentile(50),
+            "p95": self._percentile(95),
+            "p99": self._percentile(99),
+            "max": self.max,
+        }
+
+    def export(self) -> dict:
+        return {"counts": array("q", self.counts), "count": self.count, "total": self.total, "max": self.max}
+
+    @classmethod
+    def load(cls, state: dict) -> "Histogram":
+        histogram = cls()
+        histogram.counts = array("q", state["counts"])
+        histogram.count = state["count"]
+        histogram.total = state["total"]
+        histogram.max = state["max"]
+        return histogram
+
+
+def merged(histograms: Iterable[Histogram]) -> Histogram:
+    """
+    Retorna um novo histograma com as amostras de todos os `histograms`.
+    """
+    total = Histogram()
+    for histogram in histograms:
+        total.merge(histogram)
+    return total
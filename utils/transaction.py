@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional, Tuple
@@ -58,7 +58,9 @@ class Transaction:
     exchange_fee: int = 0
     taxes: int = 0
     status: TransactionStatus = TransactionStatus.PENDING
-    created_at: datetime = datetime.now()
+    # default_factory, senão o default é avaliado uma única vez (na importação) e todas as
+    # transações compartilham o mesmo instante de criação
+    created_at: datetime = field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
 
     def set_status(self, status: TransactionStatus) -> None: